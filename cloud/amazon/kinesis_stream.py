@@ -31,9 +31,13 @@ options:
     required: true
   shards:
     description:
-      - "The number of shards you want to have with this stream. This can not
-      be modified after being created."
+      - "The number of shards you want to have with this stream."
       - "This is required when state == present"
+      - "Changing the number of shards of an existing stream uses uniform
+      scaling. Since a single update can at most double or halve the number
+      of open shards, larger changes are applied in several steps, waiting
+      for the stream to become ACTIVE in between. AWS limits how many times
+      a stream can be scaled within 24 hours."
     required: false
     default: None
   retention_period:
@@ -65,6 +69,13 @@ options:
     required: false
     default: null
     aliases: [ "resource_tags" ]
+  return_shards:
+    description:
+      - "Return the description of every shard of the stream. Disabling this
+      avoids paginating through all the shards of large streams."
+    required: false
+    default: true
+    version_added: "2.3"
 extends_documentation_fragment:
     - aws
     - ec2
@@ -105,6 +116,16 @@ EXAMPLES = '''
     wait_timeout: 600
   register: test_stream
 
+# Scale an existing stream to 50 shards without returning every shard:
+- name: Scale Kinesis Stream test-stream to 50 shards and wait for the stream to become ACTIVE
+  kinesis_stream:
+    name: test-stream
+    shards: 50
+    return_shards: no
+    wait: yes
+    wait_timeout: 1800
+  register: test_stream
+
 # Basic delete example:
 - name: Delete Kinesis Stream test-stream and wait for it to finish deleting.
   kinesis_stream:
@@ -136,6 +157,27 @@ retention_period_hours:
   returned: when state == present.
   type: int
   sample: 24
+shards_count:
+  description: Number of open shards of the Kinesis Stream.
+  returned: when state == present.
+  type: int
+  sample: 10
+shards:
+  description: List of the shards of the Kinesis Stream, including closed ones.
+  returned: when state == present and return_shards is true.
+  type: list
+  sample: [
+      {
+          "shard_id": "shardId-000000000000",
+          "hash_key_range": {
+              "starting_hash_key": "0",
+              "ending_hash_key": "340282366920938463463374607431768211455"
+          },
+          "sequence_number_range": {
+              "starting_sequence_number": "49566350442436787066553137349785003451034052914580545538"
+          }
+      }
+  ]
 tags:
   description: Dictionary containing all the tags associated with the Kinesis stream.
   returned: when state == present.
@@ -155,6 +197,7 @@ except ImportError:
 
 import re
 import datetime
+import random
 import time
 from functools import reduce
 
@@ -294,7 +337,59 @@ def get_tags(client, stream_name, check_mode=False):
     return success, err_msg, results
 
 
-def find_stream(client, stream_name, check_mode=False):
+def iter_shards(client, stream_name):
+    """Iterate over the shards of a Kinesis Stream, one page at a time.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        stream_name (str): Name of the Kinesis stream.
+
+    Basic Usage:
+        >>> client = boto3.client('kinesis')
+        >>> stream_name = 'test-stream'
+        >>> for shard in iter_shards(client, stream_name):
+        ...     print(shard['ShardId'])
+
+    Raises:
+        botocore.exceptions.ClientError
+
+    Returns:
+        Generator of dicts
+    """
+    params = {
+        'StreamName': stream_name,
+    }
+    if hasattr(client, 'list_shards'):
+        while True:
+            results = client.list_shards(**params)
+            for shard in results['Shards']:
+                yield shard
+            if not results.get('NextToken'):
+                break
+            params = {
+                'NextToken': results['NextToken'],
+            }
+    else:
+        while True:
+            results = client.describe_stream(**params)['StreamDescription']
+            for shard in results['Shards']:
+                yield shard
+            if not results['HasMoreShards'] or not results['Shards']:
+                break
+            params['ExclusiveStartShardId'] = results['Shards'][-1]['ShardId']
+
+
+def is_open_shard(shard):
+    """Check whether a shard is still open, i.e. has not been split or merged.
+    Args:
+        shard (dict): Shard description.
+
+    Returns:
+        Bool
+    """
+    return 'EndingSequenceNumber' not in shard.get('SequenceNumberRange', {})
+
+
+def find_stream(client, stream_name, check_mode=False, include_shards=True):
     """Retrieve a Kinesis Stream.
     Args:
         client (botocore.client.EC2): Boto3 client.
@@ -303,6 +398,9 @@ def find_stream(client, stream_name, check_mode=False):
     Kwargs:
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
+        include_shards (bool): Retrieve the description of every shard.
+            Otherwise only the number of open shards is returned.
+            default=True
 
     Basic Usage:
         >>> client = boto3.client('kinesis')
@@ -313,22 +411,24 @@ def find_stream(client, stream_name, check_mode=False):
     """
     err_msg = ''
     success = False
-    params = {
-        'StreamName': stream_name,
-    }
     results = dict()
-    has_more_shards = True
-    shards = list()
     try:
         if not check_mode:
-            while has_more_shards:
-                results = (
-                    client.describe_stream(**params)['StreamDescription']
+            results = get_stream_summary(client, stream_name)
+            if include_shards:
+                shards = list(iter_shards(client, stream_name))
+                results['Shards'] = shards
+                results['HasMoreShards'] = False
+                results['ShardsCount'] = (
+                    len([x for x in shards if is_open_shard(x)])
+                )
+            elif 'OpenShardCount' in results:
+                results['ShardsCount'] = results['OpenShardCount']
+            else:
+                results['ShardsCount'] = len(
+                    [x for x in iter_shards(client, stream_name)
+                     if is_open_shard(x)]
                 )
-                shards.extend(results.pop('Shards'))
-                has_more_shards = results['HasMoreShards']
-            results['Shards'] = shards
-            results['ShardsCount'] = len(shards)
         else:
             results = {
                 'HasMoreShards': True,
@@ -344,9 +444,91 @@ def find_stream(client, stream_name, check_mode=False):
     return success, err_msg, results
 
 
+def get_stream_summary(client, stream_name, check_mode=False):
+    """Retrieve the status of a Kinesis Stream without paginating its shards.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        stream_name (str): Name of the Kinesis stream.
+
+    Kwargs:
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('kinesis')
+        >>> stream_name = 'test-stream'
+        >>> get_stream_summary(client, stream_name)
+
+    Raises:
+        botocore.exceptions.ClientError
+
+    Returns:
+        Dict
+    """
+    if check_mode:
+        return {
+            'RetentionPeriodHours': 24,
+            'StreamName': stream_name,
+            'StreamARN': 'arn:aws:kinesis:east-side:123456789:stream/{0}'.format(stream_name),
+            'StreamStatus': 'ACTIVE'
+        }
+
+    params = {
+        'StreamName': stream_name,
+    }
+    if hasattr(client, 'describe_stream_summary'):
+        return client.describe_stream_summary(**params)['StreamDescriptionSummary']
+
+    params['Limit'] = 1
+    results = client.describe_stream(**params)['StreamDescription']
+    results.pop('Shards', None)
+    return results
+
+
+def backoff_delay(attempt, delay=1, max_delay=30):
+    """Compute the number of seconds to sleep before the next attempt.
+    The delay grows exponentially with the number of attempts, up to
+    max_delay, and half of it is randomized so that concurrent waiters
+    do not poll in lockstep.
+    Args:
+        attempt (int): Number of attempts made so far.
+
+    Kwargs:
+        delay (int): Delay before the first retry.
+            default=1
+        max_delay (int): Upper bound of the delay.
+            default=30
+
+    Basic Usage:
+        >>> backoff_delay(3)
+        6.21
+
+    Returns:
+        Float
+    """
+    ceiling = min(max_delay, delay * 2 ** attempt)
+    return ceiling / 2.0 + random.uniform(0, ceiling / 2.0)
+
+
+def is_throttled(error):
+    """Check whether a boto3 error was caused by API rate limiting.
+    Args:
+        error (botocore.exceptions.ClientError): The error raised.
+
+    Returns:
+        Bool
+    """
+    code = error.response.get('Error', {}).get('Code')
+    return code in ('LimitExceededException', 'ThrottlingException',
+                    'ProvisionedThroughputExceededException')
+
+
 def wait_for_status(client, stream_name, status, wait_timeout=300,
                     check_mode=False):
     """Wait for the the status to change for a Kinesis Stream.
+    The stream status is polled with exponential backoff, backing off
+    further when the API is throttling requests. Shards are not
+    retrieved.
     Args:
         client (botocore.client.EC2): Boto3 client
         stream_name (str): The name of the kinesis stream.
@@ -366,41 +548,52 @@ def wait_for_status(client, stream_name, status, wait_timeout=300,
     Returns:
         Tuple (bool, str, dict)
     """
-    polling_increment_secs = 5
     wait_timeout = time.time() + wait_timeout
     status_achieved = False
     stream = dict()
     err_msg = ""
+    attempt = 0
 
     while wait_timeout > time.time():
         try:
-            find_success, find_msg, stream = (
-                find_stream(client, stream_name, check_mode=check_mode)
+            summary = (
+                get_stream_summary(client, stream_name, check_mode=check_mode)
             )
             if check_mode:
                 status_achieved = True
                 break
 
             elif status != 'DELETING':
-                if find_success and stream:
-                    if stream.get('StreamStatus') == status:
-                        status_achieved = True
-                        break
-
-            elif status == 'DELETING' and not check_mode:
-                if not find_success:
+                if summary.get('StreamStatus') == status:
                     status_achieved = True
                     break
 
-            else:
-                time.sleep(polling_increment_secs)
+            attempt += 1
         except botocore.exceptions.ClientError as e:
-            err_msg = str(e)
+            if is_throttled(e):
+                attempt += 2
+            elif status == 'DELETING':
+                status_achieved = True
+                break
+            else:
+                err_msg = str(e)
+                attempt += 1
+
+        time.sleep(
+            min(backoff_delay(attempt), max(wait_timeout - time.time(), 0))
+        )
 
     if not status_achieved:
         err_msg = "Wait time out reached, while waiting for results"
     else:
         err_msg = "Status {0} achieved successfully".format(status)
+        if status != 'DELETING':
+            _, _, stream = (
+                find_stream(
+                    client, stream_name, check_mode=check_mode,
+                    include_shards=False
+                )
+            )
 
     return status_achieved, err_msg, stream
 
@@ -690,8 +883,137 @@ def retention_action(client, stream_name, retention_period=24,
     return success, err_msg
 
 
+def shard_count_steps(current_count, target_count):
+    """Compute the intermediate shard counts needed to reach a target.
+    UpdateShardCount can at most double or halve the number of open
+    shards of a stream in a single call.
+    Args:
+        current_count (int): Current number of open shards.
+        target_count (int): Desired number of open shards.
+
+    Basic Usage:
+        >>> shard_count_steps(10, 50)
+        [20, 40, 50]
+
+    Returns:
+        List
+    """
+    steps = list()
+    while current_count != target_count:
+        if target_count > current_count:
+            current_count = min(target_count, current_count * 2)
+        else:
+            current_count = max(target_count, (current_count + 1) // 2)
+        steps.append(current_count)
+    return steps
+
+
+def shard_action(client, stream_name, shard_count, check_mode=False):
+    """Update the number of open shards of an Amazon Kinesis Stream.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        stream_name (str): The name of the kinesis stream.
+        shard_count (int): Number of shards this stream will use.
+
+    Kwargs:
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('kinesis')
+        >>> stream_name = 'test-stream'
+        >>> shard_action(client, stream_name, 20)
+
+    Returns:
+        Tuple (bool, str)
+    """
+    success = False
+    err_msg = ''
+    params = {
+        'StreamName': stream_name,
+        'TargetShardCount': shard_count,
+        'ScalingType': 'UNIFORM_SCALING',
+    }
+    try:
+        if not check_mode:
+            client.update_shard_count(**params)
+        success = True
+        err_msg = (
+            'Shard count updated successfully to {0}'.format(shard_count)
+        )
+    except botocore.exceptions.ClientError as e:
+        err_msg = str(e)
+
+    return success, err_msg
+
+
+def reshard(client, current_stream, stream_name, number_of_shards,
+            wait=False, wait_timeout=300, check_mode=False):
+    """Scale an Amazon Kinesis Stream to a number of open shards.
+    The stream is scaled through as many UpdateShardCount calls as
+    needed, waiting for it to become ACTIVE between each of them.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        current_stream (dict): The current description of the stream.
+        stream_name (str): The name of the kinesis stream.
+        number_of_shards (int): Number of shards this stream will use.
+
+    Kwargs:
+        wait (bool): Wait until Stream is ACTIVE after the last update.
+            default=False
+        wait_timeout (int): How long to wait until this operation is considered failed.
+            default=300
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('kinesis')
+        >>> stream_name = 'test-stream'
+        >>> current_stream = find_stream(client, stream_name)[2]
+        >>> reshard(client, current_stream, stream_name, 500, wait=True)
+
+    Returns:
+        Tuple (bool, str, dict)
+    """
+    wait_timeout = time.time() + wait_timeout
+    steps = shard_count_steps(current_stream['ShardsCount'], number_of_shards)
+    for shard_count in steps:
+        if current_stream['StreamStatus'] != 'ACTIVE':
+            wait_success, wait_msg, current_stream = (
+                wait_for_status(
+                    client, stream_name, 'ACTIVE',
+                    max(wait_timeout - time.time(), 0),
+                    check_mode=check_mode
+                )
+            )
+            if not wait_success:
+                return wait_success, wait_msg, current_stream
+
+        success, err_msg = (
+            shard_action(client, stream_name, shard_count, check_mode)
+        )
+        if not success:
+            return success, err_msg, current_stream
+        if not check_mode:
+            current_stream['StreamStatus'] = 'UPDATING'
+
+    if wait:
+        wait_success, wait_msg, current_stream = (
+            wait_for_status(
+                client, stream_name, 'ACTIVE',
+                max(wait_timeout - time.time(), 0),
+                check_mode=check_mode
+            )
+        )
+        if not wait_success:
+            return wait_success, wait_msg, current_stream
+
+    return True, err_msg, current_stream
+
+
 def update(client, current_stream, stream_name, retention_period=None,
-           tags=None, wait=False, wait_timeout=300, check_mode=False):
+           tags=None, wait=False, wait_timeout=300, check_mode=False,
+           number_of_shards=None):
     """Update an Amazon Kinesis Stream.
     Args:
         client (botocore.client.EC2): Boto3 client.
@@ -707,6 +1029,9 @@ def update(client, current_stream, stream_name, retention_period=None,
             default=300
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
+        number_of_shards (int): Number of open shards this stream will be
+            scaled to.
+            default=None
 
     Basic Usage:
         >>> client = boto3.client('kinesis')
@@ -728,6 +1053,22 @@ def update(client, current_stream, stream_name, retention_period=None,
     success = True
     changed = False
     err_msg = ''
+    shards_count = current_stream.get('ShardsCount')
+    if number_of_shards and check_mode and shards_count is None:
+        # the stream is not read in check mode, so its shard count is
+        # unknown; report the requested count as a change
+        changed = True
+    elif number_of_shards and shards_count and shards_count != number_of_shards:
+        reshard_success, err_msg, current_stream = (
+            reshard(
+                client, current_stream, stream_name, number_of_shards,
+                wait, wait_timeout, check_mode=check_mode
+            )
+        )
+        if not reshard_success:
+            return reshard_success, changed, err_msg
+        changed = True
+
     if retention_period:
         if wait:
             wait_success, wait_msg, current_stream = (
@@ -783,7 +1124,10 @@ def update(client, current_stream, stream_name, retention_period=None,
                     return wait_success, False, wait_msg
             elif changed and not wait:
                 stream_found, stream_msg, current_stream = (
-                    find_stream(client, stream_name, check_mode=check_mode)
+                    find_stream(
+                        client, stream_name, check_mode=check_mode,
+                        include_shards=False
+                    )
                 )
                 if stream_found:
                     if current_stream['StreamStatus'] != 'ACTIVE':
@@ -819,7 +1163,8 @@ def update(client, current_stream, stream_name, retention_period=None,
 
 
 def create_stream(client, stream_name, number_of_shards=1, retention_period=None,
-                  tags=None, wait=False, wait_timeout=300, check_mode=False):
+                  tags=None, wait=False, wait_timeout=300, check_mode=False,
+                  return_shards=True):
     """Create an Amazon Kinesis Stream.
     Args:
         client (botocore.client.EC2): Boto3 client.
@@ -838,6 +1183,9 @@ def create_stream(client, stream_name, number_of_shards=1, retention_period=None
             default=300
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
+        return_shards (bool): Include the description of every shard in
+            the results.
+            default=True
 
     Basic Usage:
         >>> client = boto3.client('kinesis')
@@ -855,13 +1203,10 @@ def create_stream(client, stream_name, number_of_shards=1, retention_period=None
     results = dict()
 
     stream_found, stream_msg, current_stream = (
-        find_stream(client, stream_name, check_mode=check_mode)
+        find_stream(
+            client, stream_name, check_mode=check_mode, include_shards=False
+        )
     )
-    if stream_found:
-        if current_stream['ShardsCount'] != number_of_shards:
-            err_msg = 'Can not change the number of shards in a Kinesis Stream'
-            return success, changed, err_msg, results
-
     if stream_found and current_stream['StreamStatus'] == 'DELETING' and wait:
         wait_success, wait_msg, current_stream = (
             wait_for_status(
@@ -872,7 +1217,8 @@ def create_stream(client, stream_name, number_of_shards=1, retention_period=None
     if stream_found and current_stream['StreamStatus'] != 'DELETING':
         success, changed, err_msg = update(
             client, current_stream, stream_name, retention_period, tags,
-            wait, wait_timeout, check_mode=check_mode
+            wait, wait_timeout, check_mode=check_mode,
+            number_of_shards=number_of_shards
         )
     else:
         create_success, create_msg = (
@@ -915,7 +1261,10 @@ def create_stream(client, stream_name, number_of_shards=1, retention_period=None
                     return success, changed, err_msg, results
 
             stream_found, stream_msg, current_stream = (
-                find_stream(client, stream_name, check_mode=check_mode)
+                find_stream(
+                    client, stream_name, check_mode=check_mode,
+                    include_shards=False
+                )
             )
             if retention_period and current_stream['StreamStatus'] == 'ACTIVE':
                 changed, err_msg = (
@@ -938,7 +1287,10 @@ def create_stream(client, stream_name, number_of_shards=1, retention_period=None
 
     if success:
         _, _, results = (
-            find_stream(client, stream_name, check_mode=check_mode)
+            find_stream(
+                client, stream_name, check_mode=check_mode,
+                include_shards=return_shards
+            )
         )
         _, _, current_tags = (
             get_tags(client, stream_name, check_mode=check_mode)
@@ -983,7 +1335,9 @@ def delete_stream(client, stream_name, wait=False, wait_timeout=300,
     err_msg = ''
     results = dict()
     stream_found, stream_msg, current_stream = (
-        find_stream(client, stream_name, check_mode=check_mode)
+        find_stream(
+            client, stream_name, check_mode=check_mode, include_shards=False
+        )
     )
     if stream_found:
         success, err_msg = (
@@ -1027,6 +1381,7 @@ def main():
             wait=dict(default=True, required=False, type='bool'),
             wait_timeout=dict(default=300, required=False, type='int'),
             state=dict(default='present', choices=['present', 'absent']),
+            return_shards=dict(default=True, required=False, type='bool'),
         )
     )
     module = AnsibleModule(
@@ -1041,6 +1396,7 @@ def main():
     tags = module.params.get('tags')
     wait = module.params.get('wait')
     wait_timeout = module.params.get('wait_timeout')
+    return_shards = module.params.get('return_shards')
 
     if state == 'present' and not shards:
         module.fail_json(msg='Shards is required when state == present.')
@@ -1073,7 +1429,7 @@ def main():
         success, changed, err_msg, results = (
             create_stream(
                 client, stream_name, shards, retention_period, tags,
-                wait, wait_timeout, check_mode
+                wait, wait_timeout, check_mode, return_shards
             )
         )
     elif state == 'absent':
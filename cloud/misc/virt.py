@@ -55,6 +55,17 @@ options:
       - XML document used with the define command
     required: false
     default: null
+  stats:
+    description:
+      - List of statistics groups returned for every domain by the C(info)
+        command. They are retrieved for all domains in a single call, which
+        requires libvirt 1.2.8 or later; older versions fall back to the
+        default per domain information.
+      - Valid groups are C(state), C(cpu_total), C(balloon), C(vcpu),
+        C(interface) and C(block).
+    required: false
+    default: null
+    version_added: "2.3"
 requirements:
     - "python >= 2.6"
     - "libvirt-python"
@@ -72,6 +83,7 @@ EXAMPLES = '''
 ansible host -m virt -a "name=alpha command=status"
 ansible host -m virt -a "name=alpha command=get_xml"
 ansible host -m virt -a "name=alpha command=create uri=lxc:///"
+ansible host -m virt -a "command=info stats=state,cpu_total,balloon,block,interface"
 
 # a playbook example of defining and launching an LXC guest
 tasks:
@@ -94,6 +106,25 @@ list_vms:
         "build.example.org", 
         "dev.example.org"
     ]
+# for info command, one key per vm defined on the remote system
+build.example.org:
+    description: The information of the vm, including the raw statistics of
+      the requested groups under C(stats) when stats is set
+    type: dictionary
+    returned: success
+    sample: {
+        "state": "running",
+        "maxMem": "1048576",
+        "memory": "1048576",
+        "cpuTime": "2463060000000",
+        "stats": {
+            "state.state": 1,
+            "state.reason": 1,
+            "cpu.time": 2463060000000,
+            "balloon.current": 1048576,
+            "balloon.maximum": 1048576
+        }
+    }
 # for status command
 status:
     description: The status of the VM, among running, crashed, paused and shutdown
@@ -121,6 +152,15 @@ HOST_COMMANDS = ['freemem', 'list_vms', 'info', 'nodeinfo', 'virttype']
 ALL_COMMANDS.extend(VM_COMMANDS)
 ALL_COMMANDS.extend(HOST_COMMANDS)
 
+VIRT_STATS_GROUP_MAP = {
+   "state"     : "VIR_DOMAIN_STATS_STATE",
+   "cpu_total" : "VIR_DOMAIN_STATS_CPU_TOTAL",
+   "balloon"   : "VIR_DOMAIN_STATS_BALLOON",
+   "vcpu"      : "VIR_DOMAIN_STATS_VCPU",
+   "interface" : "VIR_DOMAIN_STATS_INTERFACE",
+   "block"     : "VIR_DOMAIN_STATS_BLOCK"
+}
+
 VIRT_STATE_NAME_MAP = {
    0 : "running",
    1 : "running",
@@ -155,35 +195,52 @@ class LibvirtConnection(object):
             raise Exception("hypervisor connection failure")
 
         self.conn = conn
+        self.domains = {}
 
     def find_vm(self, vmid):
         """
         Extra bonus feature: vmid = -1 returns a list of everything
         """
-        conn = self.conn
+        if vmid == -1:
+            return self.find_all_vms()
 
-        vms = []
+        if vmid in self.domains:
+            return self.domains[vmid]
 
-        # this block of code borrowed from virt-manager:
-        # get working domain's name
-        ids = conn.listDomainsID()
-        for id in ids:
-            vm = conn.lookupByID(id)
-            vms.append(vm)
-        # get defined domain
-        names = conn.listDefinedDomains()
-        for name in names:
-            vm = conn.lookupByName(name)
-            vms.append(vm)
+        try:
+            vm = self.conn.lookupByName(vmid)
+        except libvirt.libvirtError:
+            try:
+                vm = self.conn.lookupByUUIDString(vmid)
+            except libvirt.libvirtError:
+                raise VMNotFound("virtual machine %s not found" % vmid)
 
-        if vmid == -1:
-            return vms
+        self.domains[vmid] = vm
+        return vm
 
-        for vm in vms:
-            if vm.name() == vmid:
-                return vm
+    def find_all_vms(self):
+        conn = self.conn
+
+        if hasattr(conn, 'listAllDomains'):
+            vms = conn.listAllDomains(0)
+        else:
+            vms = []
+
+            # this block of code borrowed from virt-manager:
+            # get working domain's name
+            ids = conn.listDomainsID()
+            for id in ids:
+                vm = conn.lookupByID(id)
+                vms.append(vm)
+            # get defined domain
+            names = conn.listDefinedDomains()
+            for name in names:
+                vm = conn.lookupByName(name)
+                vms.append(vm)
 
-        raise VMNotFound("virtual machine %s not found" % vmid)
+        for vm in vms:
+            self.domains[vm.name()] = vm
+        return vms
 
     def shutdown(self, vmid):
         return self.find_vm(vmid).shutdown()
@@ -207,7 +264,10 @@ class LibvirtConnection(object):
         return self.find_vm(vmid).destroy()
 
     def undefine(self, vmid):
-        return self.find_vm(vmid).undefine()
+        vm = self.find_vm(vmid)
+        for key in [k for k, v in self.domains.items() if v is vm]:
+            del self.domains[key]
+        return vm.undefine()
 
     def get_status2(self, vm):
         state = vm.info()[0]
@@ -217,6 +277,12 @@ class LibvirtConnection(object):
         state = self.find_vm(vmid).info()[0]
         return VIRT_STATE_NAME_MAP.get(state,"unknown")
 
+    def get_all_stats(self, stats):
+        mask = 0
+        for group in stats:
+            mask |= getattr(libvirt, VIRT_STATS_GROUP_MAP[group])
+        return self.conn.getAllDomainStats(mask)
+
     def nodeinfo(self):
         return self.conn.getInfo()
 
@@ -224,26 +290,26 @@ class LibvirtConnection(object):
         return self.conn.getType()
 
     def get_xml(self, vmid):
-        vm = self.conn.lookupByName(vmid)
+        vm = self.find_vm(vmid)
         return vm.XMLDesc(0)
 
     def get_maxVcpus(self, vmid):
-        vm = self.conn.lookupByName(vmid)
+        vm = self.find_vm(vmid)
         return vm.maxVcpus()
 
     def get_maxMemory(self, vmid):
-        vm = self.conn.lookupByName(vmid)
+        vm = self.find_vm(vmid)
         return vm.maxMemory()
 
     def getFreeMemory(self):
         return self.conn.getFreeMemory()
 
     def get_autostart(self, vmid):
-        vm = self.conn.lookupByName(vmid)
+        vm = self.find_vm(vmid)
         return vm.autostart()
 
     def set_autostart(self, vmid, val):
-        vm = self.conn.lookupByName(vmid)
+        vm = self.find_vm(vmid)
         return vm.setAutostart(val)
 
     def define_from_xml(self, xml):
@@ -255,9 +321,11 @@ class Virt(object):
     def __init__(self, uri, module):
         self.module = module
         self.uri = uri
+        self.conn = None
 
     def __get_conn(self):
-        self.conn = LibvirtConnection(self.uri, self.module)
+        if self.conn is None:
+            self.conn = LibvirtConnection(self.uri, self.module)
         return self.conn
 
     def get_vm(self, vmid):
@@ -265,18 +333,22 @@ class Virt(object):
         return self.conn.find_vm(vmid)
 
     def state(self):
-        vms = self.list_vms()
+        self.__get_conn()
         state = []
-        for vm in vms:
-            state_blurb = self.conn.get_status(vm)
-            state.append("%s %s" % (vm,state_blurb))
+        for vm in self.conn.find_vm(-1):
+            state_blurb = self.conn.get_status2(vm)
+            state.append("%s %s" % (vm.name(),state_blurb))
         return state
 
-    def info(self):
-        vms = self.list_vms()
+    def info(self, stats=None):
+        self.__get_conn()
+        if stats and hasattr(self.conn.conn, 'getAllDomainStats'):
+            return self.info_stats(stats)
+
         info = dict()
-        for vm in vms:
-            data = self.conn.find_vm(vm).info()
+        for domain in self.conn.find_vm(-1):
+            vm = domain.name()
+            data = domain.info()
             # libvirt returns maxMem, memory, and cpuTime as long()'s, which
             # xmlrpclib tries to convert to regular int's during serialization.
             # This throws exceptions, so convert them to strings here and
@@ -289,7 +361,30 @@ class Virt(object):
                 "nrVirtCpu" : data[3],
                 "cpuTime"   : str(data[4]),
             }
-            info[vm]["autostart"] = self.conn.get_autostart(vm)
+            info[vm]["autostart"] = domain.autostart()
+
+        return info
+
+    def info_stats(self, stats):
+        """
+        Return the requested stats groups of all domains, retrieved with a
+        single bulk stats call
+        """
+        self.__get_conn()
+        info = dict()
+        for domain, data in self.conn.get_all_stats(stats):
+            vm = domain.name()
+            info[vm] = {"stats": data}
+            if "state.state" in data:
+                info[vm]["state"] = VIRT_STATE_NAME_MAP.get(data["state.state"],"unknown")
+            if "balloon.maximum" in data:
+                info[vm]["maxMem"] = str(data["balloon.maximum"])
+            if "balloon.current" in data:
+                info[vm]["memory"] = str(data["balloon.current"])
+            if "vcpu.current" in data:
+                info[vm]["nrVirtCpu"] = data["vcpu.current"]
+            if "cpu.time" in data:
+                info[vm]["cpuTime"] = str(data["cpu.time"])
 
         return info
 
@@ -424,6 +519,12 @@ def core(module):
     command    = module.params.get('command', None)
     uri        = module.params.get('uri', None)
     xml        = module.params.get('xml', None)
+    stats      = module.params.get('stats', None)
+
+    if stats:
+        invalid = [x for x in stats if x not in VIRT_STATS_GROUP_MAP]
+        if invalid:
+            module.fail_json(msg = "invalid stats groups: %s" % ", ".join(invalid))
 
     v = Virt(uri, module)
     res = {}
@@ -481,6 +582,10 @@ def core(module):
                 res = { command: res }
             return VIRT_SUCCESS, res
 
+        elif command == 'info':
+            # like the other host commands, the per domain dict is the result
+            return VIRT_SUCCESS, v.info(stats)
+
         elif hasattr(v, command):
             res = getattr(v, command)()
             if type(res) != dict:
@@ -500,6 +605,7 @@ def main():
         command = dict(choices=ALL_COMMANDS),
         uri = dict(default='qemu:///system'),
         xml = dict(),
+        stats = dict(type='list'),
     ))
 
     if not HAS_VIRT:
@@ -155,7 +155,7 @@ except ImportError:
 HAS_PYVMOMI = False
 try:
     import pyVmomi
-    from pyVmomi import vim
+    from pyVmomi import vim, vmodl
     HAS_PYVMOMI = True
 except ImportError:
     pass
@@ -178,112 +178,128 @@ class PyVmomiHelper(object):
         self.si = None
         self.smartconnect()
         self.datacenter = None
-        self.folders = None
+        self.folder_map = None
         self.foldermap = None
 
     def smartconnect(self):
         self.content = connect_to_api(self.module)
 
-    def _build_folder_tree(self, folder, tree={}, treepath=None):
-
-        tree = {'virtualmachines': [],
-                        'subfolders': {},
-                        'vimobj': folder,
-                        'name': folder.name}
-
-        children = None
-        if hasattr(folder, 'childEntity'):
-            children = folder.childEntity
-
-        if children:
-            for child in children:
-                if child == folder or child in tree:
-                    continue
-                if type(child) == vim.Folder:
-                    ctree = self._build_folder_tree(child)
-                    tree['subfolders'][child] = dict.copy(ctree)
-                elif type(child) == vim.VirtualMachine:
-                    tree['virtualmachines'].append(child)
-        else:
-            if type(folder) == vim.VirtualMachine:
-                return folder
-        return tree
+    def _retrieve_inventory(self):
 
+        ''' Retrieve the name, uuid and parent of all folders and vms
+        of the datacenter with a single property collector query '''
 
-    def _build_folder_map(self, folder, vmap={}, inpath='/'):
+        PropertyCollector = vmodl.query.PropertyCollector
+        view = self.content.viewManager.CreateContainerView(
+            self.datacenter.vmFolder, [vim.Folder, vim.VirtualMachine], True)
+        try:
+            traversal_spec = PropertyCollector.TraversalSpec(
+                name='traverseView', path='view', skip=False,
+                type=vim.view.ContainerView)
+            object_spec = PropertyCollector.ObjectSpec(
+                obj=view, skip=True, selectSet=[traversal_spec])
+            property_specs = [
+                PropertyCollector.PropertySpec(
+                    type=vim.Folder, pathSet=['name', 'parent']),
+                PropertyCollector.PropertySpec(
+                    type=vim.VirtualMachine,
+                    pathSet=['name', 'config.uuid', 'parent']),
+            ]
+            filter_spec = PropertyCollector.FilterSpec(
+                objectSet=[object_spec], propSet=property_specs)
+
+            collector = self.content.propertyCollector
+            objects = []
+            result = collector.RetrievePropertiesEx(
+                [filter_spec], PropertyCollector.RetrieveOptions())
+            while result:
+                objects.extend(result.objects)
+                if not result.token:
+                    break
+                result = collector.ContinueRetrievePropertiesEx(result.token)
+        finally:
+            view.Destroy()
+
+        return [(x.obj, dict([(y.name, y.val) for y in x.propSet]))
+                for x in objects]
+
+    def _build_inventory_index(self):
 
         ''' Build a searchable index for vms+uuids+folders '''
 
-        if type(folder) == tuple:
-            folder = folder[1]
+        if not self.datacenter:
+            self.get_datacenter()
+        root = self.datacenter.vmFolder
+
+        index = {'names': {}, 'uuids': {}, 'paths': {},
+                 'fvim_by_path': {}, 'path_by_fvim': {},
+                 'vvim_by_path': {}, 'path_by_vvim': {},
+                 'vvim_by_name': {}, 'name_by_vvim': {}}
+
+        inventory = self._retrieve_inventory()
+        folders = dict([x for x in inventory if isinstance(x[0], vim.Folder)])
+
+        def folder_path(folder):
+            if folder in index['path_by_fvim']:
+                return index['path_by_fvim'][folder]
+            if folder == root:
+                path = '/vm'
+            elif folder in folders and folders[folder].get('parent'):
+                path = folder_path(folders[folder]['parent'])
+                if path is not None:
+                    path = path + '/' + folders[folder]['name']
+            else:
+                path = None
+            if path is not None:
+                index['fvim_by_path'][path] = folder
+                index['path_by_fvim'][folder] = path
+                index['paths'].setdefault(path, [])
+                index['vvim_by_path'].setdefault(path, [])
+            return path
+
+        for obj, props in inventory:
+            if isinstance(obj, vim.Folder):
+                folder_path(obj)
+                continue
+
+            name = props.get('name')
+            uuid = props.get('config.uuid')
+            index['vvim_by_name'].setdefault(name, []).append(obj)
+            index['name_by_vvim'][obj] = name
+            if uuid:
+                index['names'].setdefault(name, []).append(uuid)
+                index['uuids'][uuid] = name
 
-        if not 'names' in vmap:
-            vmap['names'] = {}
-        if not 'uuids' in vmap:
-            vmap['uuids'] = {}
-        if not 'paths' in vmap:
-            vmap['paths'] = {}
+            if not isinstance(props.get('parent'), vim.Folder):
+                continue
+            path = folder_path(props['parent'])
+            if path is not None:
+                if uuid:
+                    index['paths'][path].append(uuid)
+                index['vvim_by_path'][path].append(obj)
+                index['path_by_vvim'][obj] = path
 
-        if inpath == '/':
-            thispath = '/vm'
-        else:
-            thispath = os.path.join(inpath, folder['name'])
-
-        if thispath not in vmap['paths']:
-            vmap['paths'][thispath] = []
-
-        # helpful for isolating folder objects later on
-        if not 'path_by_fvim' in vmap:
-            vmap['path_by_fvim'] = {}
-        if not 'fvim_by_path' in vmap:
-            vmap['fvim_by_path'] = {}
-        # store object by path and store path by object
-        vmap['fvim_by_path'][thispath] = folder['vimobj']
-        vmap['path_by_fvim'][folder['vimobj']] = thispath
-
-        # helpful for isolating vm objects later on
-        if not 'path_by_vvim' in vmap:
-            vmap['path_by_vvim'] = {}
-        if not 'vvim_by_path' in vmap:
-            vmap['vvim_by_path'] = {}
-        if thispath not in vmap['vvim_by_path']:
-            vmap['vvim_by_path'][thispath] = []
-    
-
-        for item in folder.items():
-            k = item[0]
-            v = item[1]
-
-            if k == 'name':
-                pass
-            elif k == 'subfolders':
-                for x in v.items():
-                    vmap = self._build_folder_map(x, vmap=vmap, inpath=thispath)
-            elif k == 'virtualmachines':
-                for x in v:
-                    if not x.config.name in vmap['names']:
-                        vmap['names'][x.config.name] = []
-                    vmap['names'][x.config.name].append(x.config.uuid)
-                    vmap['uuids'][x.config.uuid] = x.config.name
-                    vmap['paths'][thispath].append(x.config.uuid)
-
-                    if x not in vmap['vvim_by_path'][thispath]:
-                        vmap['vvim_by_path'][thispath].append(x)
-                    if x not in vmap['path_by_vvim']:
-                        vmap['path_by_vvim'][x] = thispath
-        return vmap
+        return index
 
     def getfolders(self):
 
-        if not self.datacenter:
-            self.get_datacenter()
-        self.folders = self._build_folder_tree(self.datacenter.vmFolder)
-        self.folder_map = self._build_folder_map(self.folders)
-        return (self.folders, self.folder_map)
+        ''' Return the inventory index, built once and reused until
+        the inventory is changed by this module '''
+
+        if not self.folder_map:
+            self.folder_map = self._build_inventory_index()
+        self.foldermap = self.folder_map
+        return self.folder_map
+
+    def invalidate_folders(self):
+        self.folder_map = None
+        self.foldermap = None
 
     def get_datacenter(self):
         self.datacenter = get_obj(self.content, [vim.Datacenter], 
                                    self.params['datacenter'])
+        if not self.datacenter:
+            self.module.fail_json(msg='No datacenter named %s was found' % self.params['datacenter'])
 
     def getvm(self, name=None, uuid=None, folder=None, name_match=None):
 
@@ -291,7 +307,6 @@ class PyVmomiHelper(object):
         # self.si.content.searchIndex.FindByInventoryPath('DC1/vm/test_folder')
 
         vm = None
-        folder_path = None
 
         if uuid:
             vm = self.content.searchIndex.FindByUuid(uuid=uuid, vmSearch=True)
@@ -301,18 +316,17 @@ class PyVmomiHelper(object):
             if self.params['folder'].endswith('/'):
                 self.params['folder'] = self.params['folder'][0:-1]
 
-            # Build the absolute folder path to pass into the search method
+            if not self.folder_map:
+                self.getfolders()
+
+            # Build the absolute folder path to look up in the index
             searchpath = None
             if self.params['folder'].startswith('/vm'):
-                searchpath = '%s' % self.params['datacenter']
-                searchpath += self.params['folder']
+                searchpath = self.params['folder']
             elif self.params['folder'].startswith('/'):
-                searchpath = '%s' % self.params['datacenter']
-                searchpath += '/vm' + self.params['folder']
+                searchpath = '/vm' + self.params['folder']
             else:
                 # need to look for matching absolute path
-                if not self.folders:
-                    self.getfolders()
                 paths = self.folder_map['paths'].keys()
                 paths = [x for x in paths if x.endswith(self.params['folder'])]
                 if len(paths) > 1:
@@ -321,42 +335,26 @@ class PyVmomiHelper(object):
                     searchpath = paths[0]
 
             if searchpath:
-                # get all objects for this path ...
-                fObj = self.content.searchIndex.FindByInventoryPath(searchpath)
-                if fObj:
-                    if isinstance(fObj, vim.Datacenter):
-                        fObj = fObj.vmFolder
-                    for cObj in fObj.childEntity:
-                        if not type(cObj) == vim.VirtualMachine:
-                            continue
-                        if cObj.name == name:
-                            vm = cObj
-                            break
+                for cObj in self.folder_map['vvim_by_path'].get(searchpath, []):
+                    if self.folder_map['name_by_vvim'][cObj] == name:
+                        vm = cObj
+                        break
 
         else:
             # FIXME - this is unused if folder has a default value
-            vmList = get_all_objs(self.content, [vim.VirtualMachine])
+            if not self.folder_map:
+                self.getfolders()
+            matches = self.folder_map['vvim_by_name'].get(name, [])
             if name_match:
-                if name_match == 'first':
-                    vm = get_obj(self.content, [vim.VirtualMachine], name)
-                elif name_match == 'last':
-                    matches = []
-                    vmList = get_all_objs(self.content, [vim.VirtualMachine])
-                    for thisvm in vmList:
-                        if thisvm.config.name == name:
-                            matches.append(thisvm)
-                    if matches:
-                        vm = matches[-1]
-            else:            
-                matches = []
-                vmList = get_all_objs(self.content, [vim.VirtualMachine])
-                for thisvm in vmList:
-                    if thisvm.config.name == name:
-                        matches.append(thisvm)
-                    if len(matches) > 1:
-                        module.fail_json(msg='more than 1 vm exists by the name %s. Please specify a uuid, or a folder, or a datacenter or name_match' % name)
-                    if matches:
-                        vm = matches[0]
+                if name_match == 'first' and matches:
+                    vm = matches[0]
+                elif name_match == 'last' and matches:
+                    vm = matches[-1]
+            else:
+                if len(matches) > 1:
+                    self.module.fail_json(msg='more than 1 vm exists by the name %s. Please specify a uuid, or a folder, or a datacenter or name_match' % name)
+                if matches:
+                    vm = matches[0]
 
         return vm
 
@@ -467,6 +465,7 @@ class PyVmomiHelper(object):
         # https://www.vmware.com/support/developer/converter-sdk/conv60_apireference/vim.ManagedEntity.html#destroy
         task = vm.Destroy()
         self.wait_for_task(task)
+        self.invalidate_folders()
 
         if task.info.state == 'error':
             return ({'changed': False, 'failed': True, 'msg': task.info.error.msg})
@@ -502,7 +501,7 @@ class PyVmomiHelper(object):
             self.module.fail_json(msg='No datacenter named %s was found' % self.params['datacenter'])
 
         if not self.foldermap:
-            self.folders, self.foldermap = self.getfolders()
+            self.getfolders()
 
         # find matching folders
         if self.params['folder'].startswith('/'):
@@ -631,6 +630,7 @@ class PyVmomiHelper(object):
         clonespec = vim.vm.CloneSpec(**clonespec_kwargs)
         task = template.Clone(folder=destfolder, name=self.params['name'], spec=clonespec)
         self.wait_for_task(task)
+        self.invalidate_folders()
 
         if task.info.state == 'error':
             # https://kb.vmware.com/selfservice/microsites/search.do?language=en_US&cmd=displayKC&externalId=2021361
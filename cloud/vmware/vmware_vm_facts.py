@@ -28,9 +28,51 @@ version_added: 2.0
 author: "Joseph Callen (@jcpowermac)"
 notes:
     - Tested on vSphere 5.5
+    - Properties of all virtual machines are retrieved in bulk through
+      the property collector, a page of objects at a time.
 requirements:
     - "python >= 2.6"
     - PyVmomi
+options:
+    properties:
+        description:
+            - List of virtual machine property paths to retrieve, for example
+              C(config.hardware.numCPU) or C(guest.ipAddress).
+            - When set, the facts of each virtual machine are a dictionary of
+              these property paths instead of the default summary fields.
+        required: false
+        default: null
+        version_added: 2.3
+    key:
+        description:
+            - Which attribute the returned virtual machines are keyed by.
+              Virtual machine names are not unique, use C(uuid) to avoid
+              collisions.
+        required: false
+        default: name
+        choices: ['name', 'uuid']
+        version_added: 2.3
+    folder:
+        description:
+            - Inventory path of a folder, for example C(DC1/vm/web). Only
+              virtual machines in this folder and its subfolders are returned.
+        required: false
+        default: null
+        version_added: 2.3
+    cluster:
+        description:
+            - Name of a cluster. Only virtual machines of this cluster are
+              returned.
+        required: false
+        default: null
+        version_added: 2.3
+    power_state:
+        description:
+            - Only return virtual machines in this power state.
+        required: false
+        default: null
+        choices: ['poweredOn', 'poweredOff', 'suspended']
+        version_added: 2.3
 extends_documentation_fragment: vmware.documentation
 '''
 
@@ -41,6 +83,20 @@ EXAMPLES = '''
     hostname: esxi_or_vcenter_ip_or_hostname
     username: username
     password: password
+
+- name: Gather cpu and memory of the running virtual machines of a cluster
+  local_action:
+    module: vmware_vm_facts
+    hostname: esxi_or_vcenter_ip_or_hostname
+    username: username
+    password: password
+    cluster: cluster1
+    power_state: poweredOn
+    key: uuid
+    properties:
+      - name
+      - config.hardware.numCPU
+      - config.hardware.memoryMB
 '''
 
 try:
@@ -49,43 +105,129 @@ try:
 except ImportError:
     HAS_PYVMOMI = False
 
+import datetime
+
+# maximum number of objects returned by each property collector call
+PAGE_SIZE = 1000
+
+SUMMARY_PROPERTIES = ['summary.config.guestFullName',
+                      'summary.runtime.powerState',
+                      'summary.guest.ipAddress']
+
+
+def get_container(content, folder=None, cluster=None):
+    if folder:
+        container = content.searchIndex.FindByInventoryPath(folder)
+        if container is None:
+            raise ValueError("Unable to find folder %s" % folder)
+        if isinstance(container, vim.Datacenter):
+            container = container.vmFolder
+        return container
+    if cluster:
+        for obj in get_all_objs(content, [vim.ClusterComputeResource]):
+            if obj.name == cluster:
+                return obj
+        raise ValueError("Unable to find cluster %s" % cluster)
+    return content.rootFolder
+
+
+def retrieve_properties(content, container, vimtype, path_set):
+    """Yield (object, properties) for every object of a type in a container,
+    fetching a page of objects per property collector call."""
+    PropertyCollector = vmodl.query.PropertyCollector
+    view = content.viewManager.CreateContainerView(container, [vimtype], True)
+    try:
+        traversal_spec = PropertyCollector.TraversalSpec(
+            name='traverseView', path='view', skip=False,
+            type=vim.view.ContainerView)
+        object_spec = PropertyCollector.ObjectSpec(
+            obj=view, skip=True, selectSet=[traversal_spec])
+        property_spec = PropertyCollector.PropertySpec(
+            type=vimtype, pathSet=path_set)
+        filter_spec = PropertyCollector.FilterSpec(
+            objectSet=[object_spec], propSet=[property_spec])
+
+        collector = content.propertyCollector
+        result = collector.RetrievePropertiesEx(
+            [filter_spec], PropertyCollector.RetrieveOptions(maxObjects=PAGE_SIZE))
+        while result:
+            for obj in result.objects:
+                yield obj.obj, dict([(x.name, x.val) for x in obj.propSet])
+            if not result.token:
+                break
+            result = collector.ContinueRetrievePropertiesEx(result.token)
+    finally:
+        view.Destroy()
+
+
+def serialize(value):
+    if isinstance(value, vmodl.ManagedObject):
+        return value._moId
+    if isinstance(value, vmodl.DynamicData):
+        return dict([(x.name, serialize(getattr(value, x.name)))
+                     for x in value._GetPropertyList()
+                     if getattr(value, x.name) is not None])
+    if isinstance(value, (list, tuple)):
+        return [serialize(x) for x in value]
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
 
 # https://github.com/vmware/pyvmomi-community-samples/blob/master/samples/getallvms.py
-def get_all_virtual_machines(content):
-    virtual_machines = get_all_objs(content, [vim.VirtualMachine])
+def get_all_virtual_machines(content, properties=None, key='name',
+                             folder=None, cluster=None, power_state=None):
+    container = get_container(content, folder, cluster)
+    path_set = set(['name', 'config.uuid', 'runtime.powerState'])
+    path_set.update(properties or SUMMARY_PROPERTIES)
     _virtual_machines = {}
 
-    for vm in virtual_machines:
-        _ip_address = ""
-        summary = vm.summary
-        if summary.guest is not None:
-            _ip_address = summary.guest.ipAddress
-            if _ip_address is None:
-                _ip_address = ""
-
-        virtual_machine = {
-            summary.config.name: {
-                "guest_fullname": summary.config.guestFullName,
-                "power_state": summary.runtime.powerState,
-                "ip_address": _ip_address
+    for vm, props in retrieve_properties(content, container,
+                                         vim.VirtualMachine, list(path_set)):
+        if power_state and props.get('runtime.powerState') != power_state:
+            continue
+        if key == 'uuid':
+            vm_key = props.get('config.uuid', vm._moId)
+        else:
+            vm_key = props.get('name')
+
+        if properties:
+            virtual_machine = dict([(x, serialize(props.get(x)))
+                                    for x in properties])
+        else:
+            virtual_machine = {
+                "guest_fullname": props.get('summary.config.guestFullName'),
+                "power_state": props.get('summary.runtime.powerState'),
+                "ip_address": props.get('summary.guest.ipAddress') or ""
             }
-        }
 
-        _virtual_machines.update(virtual_machine)
+        _virtual_machines[vm_key] = virtual_machine
     return _virtual_machines
 
 
 def main():
 
     argument_spec = vmware_argument_spec()
-    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=False)
+    argument_spec.update(
+        properties=dict(type='list', default=None),
+        key=dict(default='name', choices=['name', 'uuid']),
+        folder=dict(type='str', default=None),
+        cluster=dict(type='str', default=None),
+        power_state=dict(default=None,
+                         choices=['poweredOn', 'poweredOff', 'suspended']),
+    )
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=False,
+                           mutually_exclusive=[['folder', 'cluster']])
 
     if not HAS_PYVMOMI:
         module.fail_json(msg='pyvmomi is required for this module')
 
     try:
         content = connect_to_api(module)
-        _virtual_machines = get_all_virtual_machines(content)
+        _virtual_machines = get_all_virtual_machines(
+            content, module.params['properties'], module.params['key'],
+            module.params['folder'], module.params['cluster'],
+            module.params['power_state'])
         module.exit_json(changed=False, virtual_machines=_virtual_machines)
     except vmodl.RuntimeFault as runtime_fault:
         module.fail_json(msg=runtime_fault.msg)
@@ -26,6 +26,9 @@ except ImportError:
     except ImportError:
         # Let snippet from module_utils/basic.py return a proper error in this case
         pass
+import random
+import threading
+import time
 import urllib
 
 DOCUMENTATION = '''
@@ -66,6 +69,16 @@ options:
     required: false
     default: "@"
     aliases: [ "name" ]
+  records:
+    description:
+      - A list of records to manage in one go, each entry is a dictionary with the keys C(type), C(record), C(value), C(ttl), C(priority), C(port), C(proto), C(service) and C(weight).
+      - Missing keys default to the module options of the same name, C(record) defaults to C(@).
+      - The records of the zone are listed once and only the records that differ are created, updated or deleted.
+      - C(solo) and C(state) apply to every entry. With C(state=absent) an entry without a value deletes all records of that name and type.
+      - Mutually exclusive with C(type).
+    required: false
+    default: null
+    version_added: "2.3"
   service:
     description: Record service. Required for C(type=SRV)
     required: false
@@ -176,9 +189,47 @@ EXAMPLES = '''
     weight: 20
     type: SRV
     value: fooserver.my.com
+
+# make sure a set of records exist, creating or updating only the ones that differ
+- cloudflare_dns:
+    zone: my.com
+    records:
+      - type: A
+        record: www
+        value: 192.0.2.10
+      - type: MX
+        record: '@'
+        value: mail.my.com
+        priority: 10
+      - type: TXT
+        record: '@'
+        value: v=spf1 mx -all
+    ttl: 3600
+    account_email: test@example.com
+    account_api_token: dummyapitoken
 '''
 
 RETURN = '''
+result:
+    description: the records changed by C(records) mode
+    returned: success, if records is set
+    type: dictionary
+    contains:
+        created:
+            description: records created, each with its type, name and content
+            returned: success
+            type: list
+            sample: [ { type: A, name: www.my.com, content: 192.0.2.10 } ]
+        updated:
+            description: records updated, each with its type, name and content
+            returned: success
+            type: list
+            sample: []
+        deleted:
+            description: records deleted, each with its type, name and content
+            returned: success
+            type: list
+            sample: []
 record:
     description: dictionary containing the record data
     returned: success, except on record deletion
@@ -269,10 +320,20 @@ record:
             sample: sample.com
 '''
 
+class CloudflareAPIError(Exception):
+    pass
+
 class CloudflareAPI(object):
 
     cf_api_endpoint = 'https://api.cloudflare.com/client/v4'
     changed = False
+    # largest page size accepted when listing dns records
+    per_page = 100
+    # number of api calls issued concurrently
+    max_workers = 4
+    # number of retries of rate limited api calls
+    max_retries = 5
+    record_types = ['A','AAAA','CNAME','TXT','SRV','MX','NS','SPF']
 
     def __init__(self, module):
         self.module            = module
@@ -307,6 +368,16 @@ class CloudflareAPI(object):
         if not self.record.endswith(self.zone):
             self.record = self.record + '.' + self.zone
 
+        self.main_thread = threading.currentThread()
+        self.zone_ids = {}
+
+    def _fail(self,msg):
+        # fail_json() must not be called from worker threads, errors are
+        # reported by the main thread once the workers are done
+        if threading.currentThread() is not self.main_thread:
+            raise CloudflareAPIError(msg)
+        self.module.fail_json(msg=msg)
+
     def _cf_simple_api_call(self,api_call,method='GET',payload=None):
         headers = { 'X-Auth-Email': self.account_email,
                     'X-Auth-Key': self.account_api_token,
@@ -316,17 +387,27 @@ class CloudflareAPI(object):
             try:
                 data = json.dumps(payload)
             except Exception, e:
-                self.module.fail_json(msg="Failed to encode payload as JSON: {0}".format(e))
-
-        resp, info = fetch_url(self.module,
-                               self.cf_api_endpoint + api_call,
-                               headers=headers,
-                               data=data,
-                               method=method,
-                               timeout=self.timeout)
+                self._fail("Failed to encode payload as JSON: {0}".format(e))
+
+        for attempt in range(self.max_retries + 1):
+            resp, info = fetch_url(self.module,
+                                   self.cf_api_endpoint + api_call,
+                                   headers=headers,
+                                   data=data,
+                                   method=method,
+                                   timeout=self.timeout)
+            if info['status'] != 429 or attempt == self.max_retries:
+                break
+            # rate limited, back off before retrying
+            delay = 2 ** attempt
+            try:
+                delay = max(delay, int(info.get('retry-after')))
+            except (TypeError, ValueError):
+                pass
+            time.sleep(delay + random.random())
 
         if info['status'] not in [200,304,400,401,403,429,405,415]:
-            self.module.fail_json(msg="Failed API call {0}; got unexpected HTTP code {1}".format(api_call,info['status']))
+            self._fail("Failed API call {0}; got unexpected HTTP code {1}".format(api_call,info['status']))
 
         error_msg = ''
         if info['status'] == 401:
@@ -365,7 +446,7 @@ class CloudflareAPI(object):
 
         # received an error status but no data with details on what failed
         if  (info['status'] not in [200,304]) and (result is None):
-            self.module.fail_json(msg=error_msg)
+            self._fail(error_msg)
 
         if not result['success']:
             error_msg += "; Error details: "
@@ -374,10 +455,48 @@ class CloudflareAPI(object):
                 if 'error_chain' in error:
                     for chain_error in error['error_chain']:
                         error_msg += "code: {0}, error: {1}; ".format(chain_error['code'],chain_error['message'])
-            self.module.fail_json(msg=error_msg)
+            self._fail(error_msg)
 
         return result, info['status']
 
+    def _cf_concurrent_api_calls(self,api_calls):
+        # api_calls is a list of (api_call,method,payload) tuples
+        results = [None] * len(api_calls)
+        errors = []
+
+        def worker(offset):
+            for i in range(offset, len(api_calls), self.max_workers):
+                if errors:
+                    return
+                api_call,method,payload = api_calls[i]
+                try:
+                    results[i] = self._cf_simple_api_call(api_call,method,payload)
+                except:
+                    # anything raised in a worker, including the SystemExit
+                    # of a fail_json() called by fetch_url, is handed over to
+                    # the main thread
+                    errors.append(get_exception())
+                    return
+
+        threads = []
+        for offset in range(min(self.max_workers, len(api_calls))):
+            thread = threading.Thread(target=worker, args=(offset,))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            error = errors[0]
+            if isinstance(error, SystemExit):
+                # the result has already been reported by fail_json()
+                raise error
+            if isinstance(error, CloudflareAPIError):
+                self.module.fail_json(msg=str(error))
+            self.module.fail_json(msg="API call failed: {0}".format(error))
+
+        return results
+
     def _cf_api_call(self,api_call,method='GET',payload=None):
         result, status = self._cf_simple_api_call(api_call,method,payload)
 
@@ -387,18 +506,19 @@ class CloudflareAPI(object):
             pagination = result['result_info']
             if pagination['total_pages'] > 1:
                 next_page = int(pagination['page']) + 1
-                parameters = ['page={0}'.format(next_page)]
+                parameters = []
                 # strip "page" parameter from call parameters (if there are any)
                 if '?' in api_call:
                     raw_api_call,query = api_call.split('?',1)
-                    parameters += [param for param in query.split('&') if not param.startswith('page')]
+                    parameters += [param for param in query.split('&') if not param.startswith('page=')]
                 else:
                     raw_api_call = api_call
-                while next_page <= pagination['total_pages']:
-                    raw_api_call += '?' + '&'.join(parameters)
-                    result, status = self._cf_simple_api_call(raw_api_call,method,payload)
+                # fetch the remaining pages concurrently
+                page_calls = []
+                for page in range(next_page, pagination['total_pages'] + 1):
+                    page_calls.append((raw_api_call + '?' + '&'.join(['page={0}'.format(page)] + parameters),method,payload))
+                for result, status in self._cf_concurrent_api_calls(page_calls):
                     data += result['result']
-                    next_page += 1
 
         return data, status
 
@@ -406,6 +526,9 @@ class CloudflareAPI(object):
         if not zone:
             zone = self.zone
 
+        if zone in self.zone_ids:
+            return self.zone_ids[zone]
+
         zones = self.get_zones(zone)
         if len(zones) > 1:
             self.module.fail_json(msg="More than one zone matches {0}".format(zone))
@@ -413,6 +536,7 @@ class CloudflareAPI(object):
         if len(zones) < 1:
             self.module.fail_json(msg="No zone found with name {0}".format(zone))
 
+        self.zone_ids[zone] = zones[0]['id']
         return zones[0]['id']
 
     def get_zones(self,name=None):
@@ -436,17 +560,16 @@ class CloudflareAPI(object):
         if (not value) and (value is not None):
             value = self.value
 
-        zone_id = self._get_zone_id()
+        zone_id = self._get_zone_id(zone_name)
         api_call = '/zones/{0}/dns_records'.format(zone_id)
-        query = {}
+        query = {'per_page': self.per_page}
         if type:
             query['type'] = type
         if record:
             query['name'] = record
         if value:
             query['content'] = value
-        if query:
-            api_call += '?' + urllib.urlencode(query)
+        api_call += '?' + urllib.urlencode(query)
 
         records,status = self._cf_api_call(api_call)
         return records
@@ -484,14 +607,43 @@ class CloudflareAPI(object):
                     result, info = self._cf_api_call('/zones/{0}/dns_records/{1}'.format(rr['zone_id'],rr['id']),'DELETE')
         return self.changed
 
-    def ensure_dns_record(self,**kwargs):
+    def _record_params(self,spec):
+        # map one entry of the records option to the parameters of a single
+        # record, missing attributes default to the module level options
         params = {}
-        for param in ['port','priority','proto','service','ttl','type','record','value','weight','zone']:
-          if param in kwargs:
-              params[param] = kwargs[param]
-          else:
-              params[param] = getattr(self,param)
-
+        for param in ['port','priority','proto','service','ttl','type','weight']:
+            params[param] = spec.get(param, getattr(self,param))
+        # convert the way the int module options are, so that the values
+        # compare equal to the ones returned by the API
+        for param in ['port','priority','ttl','weight']:
+            if params[param] is not None:
+                try:
+                    params[param] = int(params[param])
+                except (TypeError, ValueError):
+                    self.module.fail_json(msg="{0} must be an integer for record {1}, got {2}".format(param,spec.get('record', spec.get('name', '@')),params[param]))
+        params['record'] = spec.get('record', spec.get('name', '@'))
+        params['value'] = spec.get('value', spec.get('content'))
+        params['zone'] = self.zone
+
+        if params['type'] not in self.record_types:
+            self.module.fail_json(msg="Unsupported record type {0} for record {1}, must be one of {2}".format(params['type'],params['record'],', '.join(self.record_types)))
+
+        if params['record'] == '@':
+            params['record'] = self.zone
+        if (params['type'] in ['CNAME','NS','MX','SRV']) and (params['value'] is not None):
+            params['value'] = params['value'].rstrip('.')
+        if params['type'] == 'SRV':
+            if (params['proto'] is not None) and (not params['proto'].startswith('_')):
+                params['proto'] = '_' + params['proto']
+            if (params['service'] is not None) and (not params['service'].startswith('_')):
+                params['service'] = '_' + params['service']
+        if not params['record'].endswith(self.zone):
+            params['record'] = params['record'] + '.' + self.zone
+        return params
+
+    def _build_record(self,params):
+        # returns the record to send to the API along with the name and
+        # content the record is listed with by cloudflare
         search_value = params['value']
         search_record = params['record']
         new_record = None
@@ -502,13 +654,6 @@ class CloudflareAPI(object):
             if not params['value']:
                 self.module.fail_json(msg="You must provide a non-empty value to create this record type")
 
-            # there can only be one CNAME per record
-            # ignoring the value when searching for existing
-            # CNAME records allows us to update the value if it
-            # changes
-            if params['type'] == 'CNAME':
-                search_value = None
-
             new_record = {
                 "type": params['type'],
                 "name": params['record'],
@@ -545,6 +690,36 @@ class CloudflareAPI(object):
             search_value = str(params['weight']) + '\t' + str(params['port']) + '\t' + params['value']
             search_record = params['service'] + '.' + params['proto'] + '.' + params['record']
 
+        return new_record, search_record, search_value
+
+    def _needs_update(self,cur_record,new_record,params):
+        if (params['ttl'] is not None) and (cur_record['ttl'] != params['ttl'] ):
+            return True
+        if (params['priority'] is not None) and ('priority' in cur_record) and (cur_record['priority'] != params['priority']):
+            return True
+        if ('data' in new_record) and ('data' in cur_record):
+            if (cur_record['data'] > new_record['data']) - (cur_record['data'] < new_record['data']):
+                return True
+        if (params['type'] == 'CNAME') and (cur_record['content'] != new_record['content']):
+            return True
+        return False
+
+    def ensure_dns_record(self,**kwargs):
+        params = {}
+        for param in ['port','priority','proto','service','ttl','type','record','value','weight','zone']:
+          if param in kwargs:
+              params[param] = kwargs[param]
+          else:
+              params[param] = getattr(self,param)
+
+        new_record, search_record, search_value = self._build_record(params)
+        # there can only be one CNAME per record
+        # ignoring the value when searching for existing
+        # CNAME records allows us to update the value if it
+        # changes
+        if params['type'] == 'CNAME':
+            search_value = None
+
         zone_id = self._get_zone_id(params['zone'])
         records = self.get_dns_records(params['zone'],params['type'],search_record,search_value)
         # in theory this should be impossible as cloudflare does not allow
@@ -553,29 +728,99 @@ class CloudflareAPI(object):
             self.module.fail_json(msg="More than one record already exists for the given attributes. That should be impossible, please open an issue!")
         # record already exists, check if it must be updated
         if len(records) == 1:
-            cur_record = records[0]
-            do_update = False
-            if (params['ttl'] is not None) and (cur_record['ttl'] != params['ttl'] ):
-                do_update = True
-            if (params['priority'] is not None) and ('priority' in cur_record) and (cur_record['priority'] != params['priority']):
-                do_update = True
-            if ('data' in new_record) and ('data' in cur_record):
-                if (cur_record['data'] > new_record['data']) - (cur_record['data'] < new_record['data']):
-                    do_update = True
-            if (type == 'CNAME') and (cur_record['content'] != new_record['content']):
-                do_update = True
-            if do_update:
+            if self._needs_update(records[0],new_record,params):
+                result = records
                 if not self.module.check_mode:
                     result, info = self._cf_api_call('/zones/{0}/dns_records/{1}'.format(zone_id,records[0]['id']),'PUT',new_record)
                 self.changed = True
                 return result,self.changed
             else:
                 return records,self.changed
+        result = new_record
         if not self.module.check_mode:
             result, info = self._cf_api_call('/zones/{0}/dns_records'.format(zone_id),'POST',new_record)
         self.changed = True
         return result,self.changed
 
+    def sync_dns_records(self,records):
+        zone_id = self._get_zone_id(self.zone)
+        api_call = '/zones/{0}/dns_records?{1}'.format(zone_id,urllib.urlencode({'per_page': self.per_page}))
+        zone_records, status = self._cf_api_call(api_call)
+
+        # index the zone once, the diff is computed locally
+        index = {}
+        by_name = {}
+        for rr in zone_records:
+            index[(rr['type'],rr['name'],rr['content'])] = rr
+            by_name.setdefault((rr['type'],rr['name']),[]).append(rr)
+
+        diff = {'created': [], 'updated': [], 'deleted': []}
+        creates = []
+        updates = []
+        deletes = {}
+        keep = set()
+        solo_names = set()
+
+        def summary(record_type,name,content):
+            return {'type': record_type, 'name': name, 'content': content}
+
+        for spec in records:
+            params = self._record_params(spec)
+            name_key = (params['type'],params['record'])
+
+            if self.state == 'absent':
+                if params['value'] is None and params['type'] != 'SRV':
+                    matches = by_name.get(name_key,[])
+                else:
+                    new_record, search_record, search_value = self._build_record(params)
+                    matches = [rr for rr in [index.get((params['type'],search_record,search_value))] if rr]
+                for rr in matches:
+                    deletes[rr['id']] = rr
+                continue
+
+            new_record, search_record, search_value = self._build_record(params)
+            name_key = (params['type'],search_record)
+            # there can only be one CNAME per record, match it on the name
+            # so that a changed value results in an update
+            if params['type'] == 'CNAME':
+                existing = by_name.get(name_key,[])[:1]
+            else:
+                existing = [rr for rr in [index.get((params['type'],search_record,search_value))] if rr]
+
+            if self.is_solo:
+                solo_names.add(name_key)
+
+            if existing:
+                cur_record = existing[0]
+                keep.add(cur_record['id'])
+                if self._needs_update(cur_record,new_record,params):
+                    updates.append(('/zones/{0}/dns_records/{1}'.format(zone_id,cur_record['id']),'PUT',new_record))
+                    diff['updated'].append(summary(params['type'],search_record,search_value))
+            else:
+                creates.append(('/zones/{0}/dns_records'.format(zone_id),'POST',new_record))
+                diff['created'].append(summary(params['type'],search_record,search_value))
+
+        # solo removes every other record of the same name and type
+        for name_key in solo_names:
+            for rr in by_name.get(name_key,[]):
+                if rr['id'] not in keep:
+                    deletes[rr['id']] = rr
+
+        delete_calls = []
+        for rr in sorted(deletes.values(), key=lambda rr: rr['id']):
+            delete_calls.append(('/zones/{0}/dns_records/{1}'.format(zone_id,rr['id']),'DELETE',None))
+            diff['deleted'].append(summary(rr['type'],rr['name'],rr['content']))
+
+        if delete_calls or creates or updates:
+            self.changed = True
+            if not self.module.check_mode:
+                # deletes go first so that solo replacements do not clash
+                # with the records they replace
+                self._cf_concurrent_api_calls(delete_calls)
+                self._cf_concurrent_api_calls(creates + updates)
+
+        return diff,self.changed
+
 def main():
     module = AnsibleModule(
         argument_spec = dict(
@@ -585,6 +830,7 @@ def main():
             priority          = dict(required=False, default=1, type='int'),
             proto             = dict(required=False, default=None, choices=[ 'tcp', 'udp' ], type='str'),
             record            = dict(required=False, default='@', aliases=['name'], type='str'),
+            records           = dict(required=False, default=None, type='list'),
             service           = dict(required=False, default=None, type='str'),
             solo              = dict(required=False, default=None, type='bool'),
             state             = dict(required=False, default='present', choices=['present', 'absent'], type='str'),
@@ -597,7 +843,6 @@ def main():
         ),
         supports_check_mode = True,
         required_if = ([
-                ('state','present',['record','type']),
                 ('type','MX',['priority','value']),
                 ('type','SRV',['port','priority','proto','service','value','weight']),
                 ('type','A',['value']),
@@ -610,6 +855,9 @@ def main():
        ),
        required_one_of = (
             [['record','value','type']]
+        ),
+       mutually_exclusive = (
+            [['records','type']]
         )
     )
 
@@ -620,6 +868,16 @@ def main():
     if cf_api.is_solo and cf_api.state == 'absent':
         module.fail_json(msg="solo=true can only be used with state=present")
 
+    if module.params['records'] is not None:
+        for spec in module.params['records']:
+            if not isinstance(spec,dict):
+                module.fail_json(msg="Each entry of records must be a dictionary, got {0}".format(spec))
+        diff,changed = cf_api.sync_dns_records(module.params['records'])
+        module.exit_json(changed=changed,result=diff)
+
+    if cf_api.state == 'present' and cf_api.type is None:
+        module.fail_json(msg="state is present but the following is missing: type")
+
     # perform add, delete or update (only the TTL can be updated) of one or
     # more records
     if cf_api.state == 'present':
@@ -34,6 +34,7 @@ notes:
   - Best run as a local_action in your playbook
   - Tested with manager and above account privilege level
   - C(provision) facts were added in 2.2
+  - C(timing) and C(cache) facts were added in 2.3
 requirements:
   - bigsuds
 options:
@@ -79,6 +80,40 @@ options:
     default: null
     choices: []
     aliases: []
+  max_concurrency:
+    description:
+      - Maximum number of iControl calls issued concurrently while
+        collecting facts. Each worker thread uses its own connection,
+        sharing the BIG-IP session when C(session) is enabled. The time
+        spent on each fact category is returned in the C(timing) fact.
+    required: false
+    default: 1
+    version_added: "2.3"
+  cache_ttl:
+    description:
+      - Number of seconds during which facts are served from a local
+        snapshot instead of the device. Snapshots are kept per server,
+        port, user, filter and fact category. C(0) disables the cache.
+    required: false
+    default: 0
+    version_added: "2.3"
+  cache_path:
+    description:
+      - Directory holding the fact snapshots.
+    required: false
+    default: "~/.ansible/cache/bigip_facts"
+    version_added: "2.3"
+  cache_refresh:
+    description:
+      - How expired snapshots are refreshed. C(full) fetches the fact
+        category again. C(incremental) only fetches the object list and
+        reuses the snapshot when no object was added or removed; changes
+        to the attributes of existing objects are not detected until
+        the snapshot is refreshed in C(full) mode.
+    required: false
+    default: full
+    choices: ['full', 'incremental']
+    version_added: "2.3"
 extends_documentation_fragment: f5
 '''
 
@@ -90,6 +125,26 @@ EXAMPLES = '''
       password: "secret"
       include: "interface,vlan"
   delegate_to: localhost
+
+- name: Collect BIG-IP virtual server and pool facts concurrently
+  bigip_facts:
+      server: "lb.mydomain.com"
+      user: "admin"
+      password: "secret"
+      session: true
+      include: "virtual_server,pool,node"
+      max_concurrency: 8
+  delegate_to: localhost
+
+- name: Reuse BIG-IP pool facts between batches of a rolling deploy
+  bigip_facts:
+      server: "lb.mydomain.com"
+      user: "admin"
+      password: "secret"
+      include: "pool"
+      cache_ttl: 600
+      cache_refresh: incremental
+  delegate_to: localhost
 '''
 
 try:
@@ -100,8 +155,15 @@ else:
     bigsuds_found = True
 
 import fnmatch
+import hashlib
+import json
+import os
 import re
+import tempfile
+import threading
+import time
 import traceback
+from multiprocessing.pool import ThreadPool
 
 
 class F5(object):
@@ -114,12 +176,37 @@ class F5(object):
     """
 
     def __init__(self, host, user, password, session=False, validate_certs=True, port=443):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.validate_certs = validate_certs
+        self.port = port
+        self.session_id = None
         self.api = bigip_api(host, user, password, validate_certs, port)
         if session:
             self.start_session()
 
     def start_session(self):
-        self.api = self.api.with_session_id()
+        self.session_id = self.api.System.Session.get_session_identifier()
+        self.api = self.api.with_session_id(self.session_id)
+
+    def new_api(self):
+        """Return a new iControl API instance sharing this session, if any."""
+        api = bigip_api(self.host, self.user, self.password,
+                        self.validate_certs, self.port)
+        if self.session_id:
+            api = api.with_session_id(self.session_id)
+        return api
+
+    def enable_thread_apis(self):
+        """Hand each calling thread its own iControl API instance.
+
+        suds clients are not safe to share between threads, so worker
+        threads get a client of their own which reuses the session of the
+        main one.
+        """
+        if not isinstance(self.api, ThreadLocalApi):
+            self.api = ThreadLocalApi(self.api, self.new_api)
 
     def get_api(self):
         return self.api
@@ -143,6 +230,177 @@ class F5(object):
         return self.api.System.Session.get_active_folder()
 
 
+class ThreadLocalApi(object):
+    """Thread local iControl API class.
+
+    Proxies attribute access to an iControl API instance owned by the
+    calling thread.
+
+    Attributes:
+        owner: Thread which owns the original API instance.
+    """
+
+    def __init__(self, api, factory):
+        self.owner = threading.current_thread()
+        self._api = api
+        self._factory = factory
+        self._local = threading.local()
+
+    def __getattr__(self, name):
+        if threading.current_thread() is self.owner:
+            return getattr(self._api, name)
+        api = getattr(self._local, 'api', None)
+        if api is None:
+            api = self._local.api = self._factory()
+        return getattr(api, name)
+
+
+class FactCache(object):
+    """Fact cache class.
+
+    On-disk snapshot of the facts of each fact category, keyed by device
+    and filter.
+
+    Attributes:
+        path: Directory holding the snapshot files.
+        key: List identifying the device and filter of the snapshots.
+        ttl: Seconds during which a snapshot is used as is.
+        incremental: Whether expired snapshots are kept for categories
+            whose get_list() membership did not change.
+        now: Time the freshness of the snapshots is judged at, so that a
+            snapshot found fresh stays fresh for the whole run.
+        entries: Snapshots loaded so far, each file is read once.
+    """
+
+    def __init__(self, path, key, ttl, incremental=False):
+        self.path = path
+        self.key = key
+        self.ttl = ttl
+        self.incremental = incremental
+        self.now = time.time()
+        self.entries = {}
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def get_file(self, name):
+        digest = hashlib.sha1(json.dumps(self.key + [name]).encode('utf-8'))
+        return os.path.join(self.path, digest.hexdigest() + '.json')
+
+    def load(self, name):
+        if name not in self.entries:
+            try:
+                f = open(self.get_file(name))
+                try:
+                    self.entries[name] = json.load(f)
+                finally:
+                    f.close()
+            except (IOError, ValueError):
+                self.entries[name] = None
+        return self.entries[name]
+
+    def is_fresh(self, entry):
+        return entry is not None and \
+            self.now - entry['timestamp'] < self.ttl
+
+    def save(self, name, facts, members=None):
+        entry = dict(timestamp=time.time(), members=members, facts=facts)
+        fd, tmp = tempfile.mkstemp(dir=self.path)
+        f = os.fdopen(fd, 'w')
+        try:
+            json.dump(entry, f, default=str)
+        finally:
+            f.close()
+        os.rename(tmp, self.get_file(name))
+
+
+class FactFetcher(object):
+    """Fact fetcher class.
+
+    Issues the per-field iControl calls of every fact category through a
+    bounded pool of worker threads and keeps a timing breakdown of each
+    category. When a fact cache is given, fresh snapshots are returned
+    without contacting the device.
+
+    Attributes:
+        max_concurrency: Maximum number of concurrent iControl calls.
+        cache: Optional FactCache instance.
+        lists: Cache of get_list() responses keyed by object class.
+        timing: Seconds spent fetching each fact category.
+        sources: Origin of each fact category, one of cache, unchanged
+            or device.
+    """
+
+    def __init__(self, f5, max_concurrency=1, cache=None):
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.lists = {}
+        self.timing = {}
+        self.sources = {}
+        self.entry = None
+        self.members = None
+        self.pool = None
+        if max_concurrency > 1:
+            f5.enable_thread_apis()
+            self.pool = ThreadPool(max_concurrency)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def get_list(self, api_obj):
+        key = api_obj.__class__.__name__
+        if key not in self.lists:
+            self.lists[key] = list(api_obj.get_list())
+        self.members = self.lists[key]
+        return self.lists[key]
+
+    def get_unchanged(self, names):
+        """Return cached facts if the object list did not change."""
+        if self.cache is None or not self.cache.incremental or \
+           self.entry is None or self.entry['members'] is None:
+            return None
+        if sorted(self.entry['members']) != sorted(names):
+            return None
+        return self.entry['facts']
+
+    def fetch_fields(self, api_obj, fields):
+        """Return a list of (field, response) tuples for supported fields."""
+        def fetch(field):
+            try:
+                return (field, getattr(api_obj, "get_" + field)())
+            except (MethodNotFound, WebFault):
+                return None
+
+        if self.pool is None or len(fields) < 2:
+            responses = [fetch(field) for field in fields]
+        else:
+            responses = self.pool.map(fetch, fields)
+        return [x for x in responses if x is not None]
+
+    def collect(self, name, generator, *args):
+        start = time.time()
+        try:
+            self.entry = None
+            self.members = None
+            if self.cache is not None:
+                self.entry = self.cache.load(name)
+                if self.cache.is_fresh(self.entry):
+                    self.sources[name] = 'cache'
+                    return self.entry['facts']
+            facts = generator(*args)
+            if self.entry is not None and facts is self.entry['facts']:
+                self.sources[name] = 'unchanged'
+            else:
+                self.sources[name] = 'device'
+            if self.cache is not None:
+                self.cache.save(name, facts, self.members)
+            return facts
+        finally:
+            self.timing[name] = round(time.time() - start, 3)
+
+
 class Interfaces(object):
     """Interfaces class.
 
@@ -158,7 +416,7 @@ class Interfaces(object):
         self.interfaces = api.Networking.Interfaces.get_list()
         if regex:
             re_filter = re.compile(regex)
-            self.interfaces = filter(re_filter.search, self.interfaces)
+            self.interfaces = [x for x in self.interfaces if re_filter.search(x)]
 
     def get_list(self):
         return self.interfaces
@@ -263,7 +521,7 @@ class SelfIPs(object):
         self.self_ips = api.Networking.SelfIPV2.get_list()
         if regex:
             re_filter = re.compile(regex)
-            self.self_ips = filter(re_filter.search, self.self_ips)
+            self.self_ips = [x for x in self.self_ips if re_filter.search(x)]
 
     def get_list(self):
         return self.self_ips
@@ -317,7 +575,7 @@ class Trunks(object):
         self.trunks = api.Networking.Trunk.get_list()
         if regex:
             re_filter = re.compile(regex)
-            self.trunks = filter(re_filter.search, self.trunks)
+            self.trunks = [x for x in self.trunks if re_filter.search(x)]
 
     def get_list(self):
         return self.trunks
@@ -377,7 +635,7 @@ class Vlans(object):
         self.vlans = api.Networking.VLAN.get_list()
         if regex:
             re_filter = re.compile(regex)
-            self.vlans = filter(re_filter.search, self.vlans)
+            self.vlans = [x for x in self.vlans if re_filter.search(x)]
 
     def get_list(self):
         return self.vlans
@@ -471,7 +729,7 @@ class VirtualServers(object):
         self.virtual_servers = api.LocalLB.VirtualServer.get_list()
         if regex:
             re_filter = re.compile(regex)
-            self.virtual_servers = filter(re_filter.search, self.virtual_servers)
+            self.virtual_servers = [x for x in self.virtual_servers if re_filter.search(x)]
 
     def get_list(self):
         return self.virtual_servers
@@ -621,7 +879,7 @@ class Pools(object):
         self.pool_names = api.LocalLB.Pool.get_list()
         if regex:
             re_filter = re.compile(regex)
-            self.pool_names = filter(re_filter.search, self.pool_names)
+            self.pool_names = [x for x in self.pool_names if re_filter.search(x)]
 
     def get_list(self):
         return self.pool_names
@@ -726,7 +984,7 @@ class Devices(object):
         self.devices = api.Management.Device.get_list()
         if regex:
             re_filter = re.compile(regex)
-            self.devices = filter(re_filter.search, self.devices)
+            self.devices = [x for x in self.devices if re_filter.search(x)]
 
     def get_list(self):
         return self.devices
@@ -831,7 +1089,7 @@ class DeviceGroups(object):
         self.device_groups = api.Management.DeviceGroup.get_list()
         if regex:
             re_filter = re.compile(regex)
-            self.device_groups = filter(re_filter.search, self.device_groups)
+            self.device_groups = [x for x in self.device_groups if re_filter.search(x)]
 
     def get_list(self):
         return self.device_groups
@@ -879,7 +1137,7 @@ class TrafficGroups(object):
         self.traffic_groups = api.Management.TrafficGroup.get_list()
         if regex:
             re_filter = re.compile(regex)
-            self.traffic_groups = filter(re_filter.search, self.traffic_groups)
+            self.traffic_groups = [x for x in self.traffic_groups if re_filter.search(x)]
 
     def get_list(self):
         return self.traffic_groups
@@ -927,7 +1185,7 @@ class Rules(object):
         self.rules = api.LocalLB.Rule.get_list()
         if regex:
             re_filter = re.compile(regex)
-            self.traffic_groups = filter(re_filter.search, self.rules)
+            self.rules = [x for x in self.rules if re_filter.search(x)]
 
     def get_list(self):
         return self.rules
@@ -960,7 +1218,7 @@ class Nodes(object):
         self.nodes = api.LocalLB.NodeAddressV2.get_list()
         if regex:
             re_filter = re.compile(regex)
-            self.nodes = filter(re_filter.search, self.nodes)
+            self.nodes = [x for x in self.nodes if re_filter.search(x)]
 
     def get_list(self):
         return self.nodes
@@ -1014,7 +1272,7 @@ class VirtualAddresses(object):
         self.virtual_addresses = api.LocalLB.VirtualAddressV2.get_list()
         if regex:
             re_filter = re.compile(regex)
-            self.virtual_addresses = filter(re_filter.search, self.virtual_addresses)
+            self.virtual_addresses = [x for x in self.virtual_addresses if re_filter.search(x)]
 
     def get_list(self):
         return self.virtual_addresses
@@ -1071,7 +1329,7 @@ class AddressClasses(object):
         self.address_classes = api.LocalLB.Class.get_address_class_list()
         if regex:
             re_filter = re.compile(regex)
-            self.address_classes = filter(re_filter.search, self.address_classes)
+            self.address_classes = [x for x in self.address_classes if re_filter.search(x)]
 
     def get_list(self):
         return self.address_classes
@@ -1103,7 +1361,7 @@ class Certificates(object):
         self.certificates = [x['certificate']['cert_info']['id'] for x in self.certificate_list]
         if regex:
             re_filter = re.compile(regex)
-            self.certificates = filter(re_filter.search, self.certificates)
+            self.certificates = [x for x in self.certificates if re_filter.search(x)]
             self.certificate_list = [x for x in self.certificate_list if x['certificate']['cert_info']['id'] in self.certificates]
 
     def get_list(self):
@@ -1130,7 +1388,7 @@ class Keys(object):
         self.keys = [x['key_info']['id'] for x in self.key_list]
         if regex:
             re_filter = re.compile(regex)
-            self.keys = filter(re_filter.search, self.keys)
+            self.keys = [x for x in self.keys if re_filter.search(x)]
             self.key_list = [x for x in self.key_list if x['key_info']['id'] in self.keys]
 
     def get_list(self):
@@ -1155,7 +1413,7 @@ class ProfileClientSSL(object):
         self.profiles = api.LocalLB.ProfileClientSSL.get_list()
         if regex:
             re_filter = re.compile(regex)
-            self.profiles = filter(re_filter.search, self.profiles)
+            self.profiles = [x for x in self.profiles if re_filter.search(x)]
 
     def get_list(self):
         return self.profiles
@@ -1371,23 +1629,18 @@ class ProvisionInfo(object):
         return result
 
 
-def generate_dict(api_obj, fields):
+def generate_dict(api_obj, fields, fetcher=None):
+    if fetcher is None:
+        fetcher = FactFetcher(None)
     result_dict = {}
-    lists = []
-    supported_fields = []
-    if api_obj.get_list():
-        for field in fields:
-            try:
-                api_response = getattr(api_obj, "get_" + field)()
-            except (MethodNotFound, WebFault):
-                pass
-            else:
-                lists.append(api_response)
-                supported_fields.append(field)
-        for i, j in enumerate(api_obj.get_list()):
-            temp = {}
-            temp.update([(item[0], item[1][i]) for item in zip(supported_fields, lists)])
-            result_dict[j] = temp
+    names = fetcher.get_list(api_obj)
+    unchanged = fetcher.get_unchanged(names)
+    if unchanged is not None:
+        return unchanged
+    if names:
+        responses = fetcher.fetch_fields(api_obj, fields)
+        for i, j in enumerate(names):
+            result_dict[j] = dict([(field, response[i]) for field, response in responses])
     return result_dict
 
 
@@ -1403,7 +1656,7 @@ def generate_simple_dict(api_obj, fields):
     return result_dict
 
 
-def generate_interface_dict(f5, regex):
+def generate_interface_dict(f5, regex, fetcher=None):
     interfaces = Interfaces(f5.get_api(), regex)
     fields = ['active_media', 'actual_flow_control', 'bundle_state',
               'description', 'dual_media_state', 'enabled_state', 'if_index',
@@ -1415,29 +1668,29 @@ def generate_interface_dict(f5, regex):
               'sfp_media_state', 'stp_active_edge_port_state',
               'stp_enabled_state', 'stp_link_type',
               'stp_protocol_detection_reset_state']
-    return generate_dict(interfaces, fields)
+    return generate_dict(interfaces, fields, fetcher)
 
 
-def generate_self_ip_dict(f5, regex):
+def generate_self_ip_dict(f5, regex, fetcher=None):
     self_ips = SelfIPs(f5.get_api(), regex)
     fields = ['address', 'allow_access_list', 'description',
               'enforced_firewall_policy', 'floating_state', 'fw_rule',
               'netmask', 'staged_firewall_policy', 'traffic_group',
               'vlan', 'is_traffic_group_inherited']
-    return generate_dict(self_ips, fields)
+    return generate_dict(self_ips, fields, fetcher)
 
 
-def generate_trunk_dict(f5, regex):
+def generate_trunk_dict(f5, regex, fetcher=None):
     trunks = Trunks(f5.get_api(), regex)
     fields = ['active_lacp_state', 'configured_member_count', 'description',
               'distribution_hash_option', 'interface', 'lacp_enabled_state',
               'lacp_timeout_option', 'link_selection_policy', 'media_speed',
               'media_status', 'operational_member_count', 'stp_enabled_state',
               'stp_protocol_detection_reset_state']
-    return generate_dict(trunks, fields)
+    return generate_dict(trunks, fields, fetcher)
 
 
-def generate_vlan_dict(f5, regex):
+def generate_vlan_dict(f5, regex, fetcher=None):
     vlans = Vlans(f5.get_api(), regex)
     fields = ['auto_lasthop', 'cmp_hash_algorithm', 'description',
               'dynamic_forwarding', 'failsafe_action', 'failsafe_state',
@@ -1446,10 +1699,10 @@ def generate_vlan_dict(f5, regex):
               'sflow_poll_interval', 'sflow_poll_interval_global',
               'sflow_sampling_rate', 'sflow_sampling_rate_global',
               'source_check_state', 'true_mac_address', 'vlan_id']
-    return generate_dict(vlans, fields)
+    return generate_dict(vlans, fields, fetcher)
 
 
-def generate_vs_dict(f5, regex):
+def generate_vs_dict(f5, regex, fetcher=None):
     virtual_servers = VirtualServers(f5.get_api(), regex)
     fields = ['actual_hardware_acceleration', 'authentication_profile',
               'auto_lasthop', 'bw_controller_policy', 'clone_pool',
@@ -1467,10 +1720,10 @@ def generate_vs_dict(f5, regex):
               'source_address_translation_type', 'source_port_behavior',
               'staged_firewall_policy', 'translate_address_state',
               'translate_port_state', 'type', 'vlan', 'wildmask']
-    return generate_dict(virtual_servers, fields)
+    return generate_dict(virtual_servers, fields, fetcher)
 
 
-def generate_pool_dict(f5, regex):
+def generate_pool_dict(f5, regex, fetcher=None):
     pools = Pools(f5.get_api(), regex)
     fields = ['action_on_service_down', 'active_member_count',
               'aggregate_dynamic_ratio', 'allow_nat_state',
@@ -1484,10 +1737,10 @@ def generate_pool_dict(f5, regex):
               'queue_on_connection_limit_state', 'queue_time_limit',
               'reselect_tries', 'server_ip_tos', 'server_link_qos',
               'simple_timeout', 'slow_ramp_time']
-    return generate_dict(pools, fields)
+    return generate_dict(pools, fields, fetcher)
 
 
-def generate_device_dict(f5, regex):
+def generate_device_dict(f5, regex, fetcher=None):
     devices = Devices(f5.get_api(), regex)
     fields = ['active_modules', 'base_mac_address', 'blade_addresses',
               'build', 'chassis_id', 'chassis_type', 'comment',
@@ -1497,55 +1750,55 @@ def generate_device_dict(f5, regex):
               'optional_modules', 'platform_id', 'primary_mirror_address',
               'product', 'secondary_mirror_address', 'software_version',
               'timelimited_modules', 'timezone', 'unicast_addresses']
-    return generate_dict(devices, fields)
+    return generate_dict(devices, fields, fetcher)
 
 
-def generate_device_group_dict(f5, regex):
+def generate_device_group_dict(f5, regex, fetcher=None):
     device_groups = DeviceGroups(f5.get_api(), regex)
     fields = ['all_preferred_active', 'autosync_enabled_state', 'description',
               'device', 'full_load_on_sync_state',
               'incremental_config_sync_size_maximum',
               'network_failover_enabled_state', 'sync_status', 'type']
-    return generate_dict(device_groups, fields)
+    return generate_dict(device_groups, fields, fetcher)
 
 
-def generate_traffic_group_dict(f5, regex):
+def generate_traffic_group_dict(f5, regex, fetcher=None):
     traffic_groups = TrafficGroups(f5.get_api(), regex)
     fields = ['auto_failback_enabled_state', 'auto_failback_time',
               'default_device', 'description', 'ha_load_factor',
               'ha_order', 'is_floating', 'mac_masquerade_address',
               'unit_id']
-    return generate_dict(traffic_groups, fields)
+    return generate_dict(traffic_groups, fields, fetcher)
 
 
-def generate_rule_dict(f5, regex):
+def generate_rule_dict(f5, regex, fetcher=None):
     rules = Rules(f5.get_api(), regex)
     fields = ['definition', 'description', 'ignore_vertification',
               'verification_status']
-    return generate_dict(rules, fields)
+    return generate_dict(rules, fields, fetcher)
 
 
-def generate_node_dict(f5, regex):
+def generate_node_dict(f5, regex, fetcher=None):
     nodes = Nodes(f5.get_api(), regex)
     fields = ['address', 'connection_limit', 'description', 'dynamic_ratio',
               'monitor_instance', 'monitor_rule', 'monitor_status',
               'object_status', 'rate_limit', 'ratio', 'session_status']
-    return generate_dict(nodes, fields)
+    return generate_dict(nodes, fields, fetcher)
 
 
-def generate_virtual_address_dict(f5, regex):
+def generate_virtual_address_dict(f5, regex, fetcher=None):
     virtual_addresses = VirtualAddresses(f5.get_api(), regex)
     fields = ['address', 'arp_state', 'auto_delete_state', 'connection_limit',
               'description', 'enabled_state', 'icmp_echo_state',
               'is_floating_state', 'netmask', 'object_status',
               'route_advertisement_state', 'traffic_group']
-    return generate_dict(virtual_addresses, fields)
+    return generate_dict(virtual_addresses, fields, fetcher)
 
 
-def generate_address_class_dict(f5, regex):
+def generate_address_class_dict(f5, regex, fetcher=None):
     address_classes = AddressClasses(f5.get_api(), regex)
     fields = ['address_class', 'description']
-    return generate_dict(address_classes, fields)
+    return generate_dict(address_classes, fields, fetcher)
 
 
 def generate_certificate_dict(f5, regex):
@@ -1558,7 +1811,7 @@ def generate_key_dict(f5, regex):
     return dict(zip(keys.get_list(), keys.get_key_list()))
 
 
-def generate_client_ssl_profile_dict(f5, regex):
+def generate_client_ssl_profile_dict(f5, regex, fetcher=None):
     profiles = ProfileClientSSL(f5.get_api(), regex)
     fields = ['alert_timeout', 'allow_nonssl_state', 'authenticate_depth',
               'authenticate_once_state', 'ca_file', 'cache_size',
@@ -1579,7 +1832,7 @@ def generate_client_ssl_profile_dict(f5, regex):
               'server_name', 'session_ticket_state', 'sni_default_state',
               'sni_require_state', 'ssl_option', 'strict_resume_state',
               'unclean_shutdown_state', 'is_base_profile', 'is_system_profile']
-    return generate_dict(profiles, fields)
+    return generate_dict(profiles, fields, fetcher)
 
 
 def generate_system_info_dict(f5):
@@ -1607,6 +1860,52 @@ def generate_provision_dict(f5):
     return generate_simple_dict(provisioned, fields)
 
 
+def generate_facts(f5, fetcher, include, regex):
+    facts = {}
+    if 'interface' in include:
+        facts['interface'] = fetcher.collect('interface', generate_interface_dict, f5, regex, fetcher)
+    if 'self_ip' in include:
+        facts['self_ip'] = fetcher.collect('self_ip', generate_self_ip_dict, f5, regex, fetcher)
+    if 'trunk' in include:
+        facts['trunk'] = fetcher.collect('trunk', generate_trunk_dict, f5, regex, fetcher)
+    if 'vlan' in include:
+        facts['vlan'] = fetcher.collect('vlan', generate_vlan_dict, f5, regex, fetcher)
+    if 'virtual_server' in include:
+        facts['virtual_server'] = fetcher.collect('virtual_server', generate_vs_dict, f5, regex, fetcher)
+    if 'pool' in include:
+        facts['pool'] = fetcher.collect('pool', generate_pool_dict, f5, regex, fetcher)
+    if 'provision' in include:
+        facts['provision'] = fetcher.collect('provision', generate_provision_dict, f5)
+    if 'device' in include:
+        facts['device'] = fetcher.collect('device', generate_device_dict, f5, regex, fetcher)
+    if 'device_group' in include:
+        facts['device_group'] = fetcher.collect('device_group', generate_device_group_dict, f5, regex, fetcher)
+    if 'traffic_group' in include:
+        facts['traffic_group'] = fetcher.collect('traffic_group', generate_traffic_group_dict, f5, regex, fetcher)
+    if 'rule' in include:
+        facts['rule'] = fetcher.collect('rule', generate_rule_dict, f5, regex, fetcher)
+    if 'node' in include:
+        facts['node'] = fetcher.collect('node', generate_node_dict, f5, regex, fetcher)
+    if 'virtual_address' in include:
+        facts['virtual_address'] = fetcher.collect('virtual_address', generate_virtual_address_dict, f5, regex, fetcher)
+    if 'address_class' in include:
+        facts['address_class'] = fetcher.collect('address_class', generate_address_class_dict, f5, regex, fetcher)
+    if 'software' in include:
+        facts['software'] = fetcher.collect('software', generate_software_list, f5)
+    if 'certificate' in include:
+        facts['certificate'] = fetcher.collect('certificate', generate_certificate_dict, f5, regex)
+    if 'key' in include:
+        facts['key'] = fetcher.collect('key', generate_key_dict, f5, regex)
+    if 'client_ssl_profile' in include:
+        facts['client_ssl_profile'] = fetcher.collect('client_ssl_profile', generate_client_ssl_profile_dict, f5, regex, fetcher)
+    if 'system_info' in include:
+        facts['system_info'] = fetcher.collect('system_info', generate_system_info_dict, f5)
+    facts['timing'] = fetcher.timing
+    if fetcher.cache is not None:
+        facts['cache'] = fetcher.sources
+    return facts
+
+
 def main():
     argument_spec = f5_argument_spec()
 
@@ -1614,6 +1913,10 @@ def main():
         session=dict(type='bool', default=False),
         include=dict(type='list', required=True),
         filter=dict(type='str', required=False),
+        max_concurrency=dict(type='int', default=1),
+        cache_ttl=dict(type='int', default=0),
+        cache_path=dict(type='path', default='~/.ansible/cache/bigip_facts'),
+        cache_refresh=dict(default='full', choices=['full', 'incremental']),
     )
     argument_spec.update(meta_args)
 
@@ -1631,6 +1934,13 @@ def main():
     validate_certs = module.params['validate_certs']
     session = module.params['session']
     fact_filter = module.params['filter']
+    max_concurrency = module.params['max_concurrency']
+    cache_ttl = module.params['cache_ttl']
+    cache_path = module.params['cache_path']
+    cache_refresh = module.params['cache_refresh']
+
+    if max_concurrency < 1:
+        module.fail_json(msg="max_concurrency must be at least 1")
 
     if validate_certs:
         import ssl
@@ -1655,59 +1965,38 @@ def main():
         facts = {}
 
         if len(include) > 0:
-            f5 = F5(server, user, password, session, validate_certs, server_port)
-            saved_active_folder = f5.get_active_folder()
-            saved_recursive_query_state = f5.get_recursive_query_state()
-            if saved_active_folder != "/":
-                f5.set_active_folder("/")
-            if saved_recursive_query_state != "STATE_ENABLED":
-                f5.enable_recursive_query_state()
-
-            if 'interface' in include:
-                facts['interface'] = generate_interface_dict(f5, regex)
-            if 'self_ip' in include:
-                facts['self_ip'] = generate_self_ip_dict(f5, regex)
-            if 'trunk' in include:
-                facts['trunk'] = generate_trunk_dict(f5, regex)
-            if 'vlan' in include:
-                facts['vlan'] = generate_vlan_dict(f5, regex)
-            if 'virtual_server' in include:
-                facts['virtual_server'] = generate_vs_dict(f5, regex)
-            if 'pool' in include:
-                facts['pool'] = generate_pool_dict(f5, regex)
-            if 'provision' in include:
-                facts['provision'] = generate_provision_dict(f5)
-            if 'device' in include:
-                facts['device'] = generate_device_dict(f5, regex)
-            if 'device_group' in include:
-                facts['device_group'] = generate_device_group_dict(f5, regex)
-            if 'traffic_group' in include:
-                facts['traffic_group'] = generate_traffic_group_dict(f5, regex)
-            if 'rule' in include:
-                facts['rule'] = generate_rule_dict(f5, regex)
-            if 'node' in include:
-                facts['node'] = generate_node_dict(f5, regex)
-            if 'virtual_address' in include:
-                facts['virtual_address'] = generate_virtual_address_dict(f5, regex)
-            if 'address_class' in include:
-                facts['address_class'] = generate_address_class_dict(f5, regex)
-            if 'software' in include:
-                facts['software'] = generate_software_list(f5)
-            if 'certificate' in include:
-                facts['certificate'] = generate_certificate_dict(f5, regex)
-            if 'key' in include:
-                facts['key'] = generate_key_dict(f5, regex)
-            if 'client_ssl_profile' in include:
-                facts['client_ssl_profile'] = generate_client_ssl_profile_dict(f5, regex)
-            if 'system_info' in include:
-                facts['system_info'] = generate_system_info_dict(f5)
-
-            # restore saved state
-            if saved_active_folder and saved_active_folder != "/":
-                f5.set_active_folder(saved_active_folder)
-            if saved_recursive_query_state and \
-               saved_recursive_query_state != "STATE_ENABLED":
-                f5.set_recursive_query_state(saved_recursive_query_state)
+            cache = None
+            if cache_ttl > 0:
+                try:
+                    cache = FactCache(os.path.expanduser(cache_path),
+                                      [server, server_port, user, fact_filter],
+                                      cache_ttl, cache_refresh == 'incremental')
+                except OSError as e:
+                    module.fail_json(msg="unable to create cache_path %s: %s" % (cache_path, e))
+
+            if cache is not None and \
+               all([cache.is_fresh(cache.load(x)) for x in include]):
+                facts = generate_facts(None, FactFetcher(None, cache=cache),
+                                       include, regex)
+            else:
+                f5 = F5(server, user, password, session, validate_certs, server_port)
+                saved_active_folder = f5.get_active_folder()
+                saved_recursive_query_state = f5.get_recursive_query_state()
+                if saved_active_folder != "/":
+                    f5.set_active_folder("/")
+                if saved_recursive_query_state != "STATE_ENABLED":
+                    f5.enable_recursive_query_state()
+
+                fetcher = FactFetcher(f5, max_concurrency, cache)
+                facts = generate_facts(f5, fetcher, include, regex)
+                fetcher.close()
+
+                # restore saved state
+                if saved_active_folder and saved_active_folder != "/":
+                    f5.set_active_folder(saved_active_folder)
+                if saved_recursive_query_state and \
+                   saved_recursive_query_state != "STATE_ENABLED":
+                    f5.set_recursive_query_state(saved_recursive_query_state)
 
         result = {'ansible_facts': facts}
 
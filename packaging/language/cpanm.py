@@ -30,6 +30,8 @@ options:
   name:
     description:
       - The name of the Perl library to install. You may use the "full distribution path", e.g.  MIYAGAWA/Plack-0.99_05.tar.gz
+      - Since version 2.3 this may be a list of libraries, which are checked and installed with a single perl and cpanm call.
+        A minimum version can be given for each of them in the cpanm C(Module~version) form.
     required: false
     default: null
     aliases: ["pkg"]
@@ -67,6 +69,7 @@ options:
   version:
     description:
       - minimum version of perl module to consider acceptable
+      - Can only be used with a single I(name).
     required: false
     default: false
     version_added: "2.1"
@@ -114,22 +117,37 @@ EXAMPLES = '''
 # install Dancer if it's not already installed
 # OR the installed version is older than version 1.0
 - cpanm: name=Dancer version=1.0
+
+# install the libraries missing from a list in one go
+- cpanm:
+    name:
+      - Dancer~1.0
+      - Plack
+      - JSON::XS
 '''
 
-def _is_package_installed(module, name, locallib, cpanm, version):
-    cmd = ""
+# Prints 1 or 0 for each Module or Module~version argument, depending on
+# whether the module can be loaded in at least that version
+_CHECK_SCRIPT = r"""
+for (@ARGV) {
+    my ($name, $version) = split /~/, $_, 2;
+    my $ok = $name =~ /^\w+(?:::\w+)*$/ && eval "require $name; 1";
+    $ok &&= eval { $name->VERSION($version); 1 } if $ok && defined $version;
+    print $ok ? "1\n" : "0\n";
+}
+"""
+
+def _missing_packages(module, names, locallib, cpanm, version):
     if locallib:
         os.environ["PERL5LIB"] = "%s/lib/perl5" % locallib
-    cmd = "%s perl -e ' use %s" % (cmd, name)
-    if version:
-       cmd = "%s %s;'" % (cmd, version)
-    else:
-       cmd = "%s;'" % cmd
-    res, stdout, stderr = module.run_command(cmd, check_rc=False)
-    if res == 0:
-       return True
-    else:
-       return False
+    args = list(names)
+    if version and len(args) == 1:
+        args[0] = "%s~%s" % (args[0], version)
+    res, stdout, stderr = module.run_command(["perl", "-e", _CHECK_SCRIPT] + args, check_rc=False)
+    results = stdout.split()
+    if res != 0 or len(results) != len(names):
+        return list(names)
+    return [name for name, result in zip(names, results) if result != "1"]
 
 def _build_cmd_line(name, from_path, notest, locallib, mirror, mirror_only, installdeps, cpanm, use_sudo):
     # this code should use "%s" like everything else and just return early but not fixing all of it now.
@@ -169,7 +187,7 @@ def _get_cpanm_path(module):
 
 def main():
     arg_spec = dict(
-        name=dict(default=None, required=False, aliases=['pkg']),
+        name=dict(default=None, required=False, aliases=['pkg'], type='list'),
         from_path=dict(default=None, required=False, type='path'),
         notest=dict(default=False, type='bool'),
         locallib=dict(default=None, required=False, type='path'),
@@ -199,10 +217,16 @@ def main():
 
     changed   = False
 
-    installed = _is_package_installed(module, name, locallib, cpanm, version)
+    if name and version and len(name) > 1:
+        module.fail_json(msg="version can only be used with a single name, use Module~version instead")
+
+    if name:
+        missing = _missing_packages(module, name, locallib, cpanm, version)
+    else:
+        missing = []
 
-    if not installed:
-        cmd       = _build_cmd_line(name, from_path, notest, locallib, mirror, mirror_only, installdeps, cpanm, use_sudo)
+    if missing or not name:
+        cmd       = _build_cmd_line(" ".join(missing), from_path, notest, locallib, mirror, mirror_only, installdeps, cpanm, use_sudo)
 
         rc_cpanm, out_cpanm, err_cpanm = module.run_command(cmd, check_rc=False)
 
@@ -58,6 +58,7 @@ EXAMPLES = '''
 '''
 
 import os
+import re
 
 def get_local_version(pear_output):
     """Take pear remoteinfo output and get the installed version"""
@@ -77,10 +78,74 @@ def get_repository_version(pear_output):
             return line.rsplit(None, 1)[-1].strip()
     return None
 
-def query_package(module, name, state="present"):
+CHANNEL_ALIASES = {
+    'pear': 'pear.php.net',
+    'pecl': 'pecl.php.net',
+    'doc': 'doc.php.net',
+}
+
+def package_key(name):
+    """Normalize a package name to channel/package, pear names are case insensitive"""
+    name = name.lower()
+    if '/' in name:
+        channel, name = name.split('/', 1)
+    else:
+        channel = 'pear.php.net'
+    return "%s/%s" % (CHANNEL_ALIASES.get(channel, channel), name)
+
+# terminal escape sequences pear wraps captions and headlines in when TERM is set
+ESCAPE_RE = re.compile(r'\x1b(\[[0-9;]*[A-Za-z]|[()][A-Za-z0-9])')
+
+def get_installed_packages(pear_output):
+    """Take pear list -a output and get the installed version of each package"""
+    installed = {}
+    channel = None
+    for line in ESCAPE_RE.sub('', pear_output).split('\n'):
+        # captions are upper-cased when pear can't print them in bold
+        if line.lower().startswith('installed packages, channel '):
+            channel = line.split()[-1].rstrip(':')
+            continue
+        fields = line.split()
+        if channel is None or len(fields) < 2 or line.startswith('=') or line.startswith('('):
+            continue
+        if fields[0].lower() == 'package' and fields[1].lower() == 'version':
+            continue
+        installed[package_key("%s/%s" % (channel, fields[0]))] = fields[1]
+    return installed
+
+def get_upgradable_packages(pear_output):
+    """Take pear list-upgrades output and get the packages having a newer version"""
+    upgradable = {}
+    for line in pear_output.split('\n'):
+        fields = line.split()
+        # e.g. "pear.php.net Archive_Tar 1.4.0 (stable) 1.4.3 (stable) 20.7kB"
+        if len(fields) >= 4 and '.' in fields[0] and fields[0] != 'Channel':
+            upgradable[package_key("%s/%s" % (fields[0], fields[1]))] = True
+    return upgradable
+
+def build_index(module, state):
+    """Query the installed packages, and the upgradable ones for state=latest, at once.
+    Returns None if pear could not list them."""
+    rc, stdout, stderr = module.run_command("pear list -a", check_rc=False)
+    if rc != 0:
+        return None
+    index = {'installed': get_installed_packages(stdout), 'upgradable': {}}
+
+    if state == 'latest':
+        rc, stdout, stderr = module.run_command("pear list-upgrades", check_rc=False)
+        if rc != 0:
+            return None
+        index['upgradable'] = get_upgradable_packages(stdout)
+    return index
+
+def query_package(module, name, state="present", index=None):
     """Query the package status in both the local system and the repository.
     Returns a boolean to indicate if the package is installed,
     and a second boolean to indicate if the package is up-to-date."""
+    if index is not None:
+        key = package_key(name)
+        return key in index['installed'], key not in index['upgradable']
+
     if state == "present":
         lcmd = "pear info %s" % (name)
         lrc, lstdout, lstderr = module.run_command(lcmd, check_rc=False)
@@ -107,63 +172,64 @@ def query_package(module, name, state="present"):
 
 
 def remove_packages(module, packages):
-    remove_c = 0
-    # Using a for loop incase of error, we can report the package that failed
+    index = build_index(module, 'absent')
+    # Query the packages first, to see if we even need to remove
+    to_remove = []
     for package in packages:
-        # Query the package first, to see if we even need to remove
-        installed, updated = query_package(module, package)
-        if not installed:
-            continue
+        installed, updated = query_package(module, package, index=index)
+        if installed:
+            to_remove.append(package)
 
-        cmd = "pear uninstall %s" % (package)
+    if to_remove:
+        # Remove them all at once
+        cmd = "pear uninstall %s" % (" ".join(to_remove))
         rc, stdout, stderr = module.run_command(cmd, check_rc=False)
 
         if rc != 0:
-            module.fail_json(msg="failed to remove %s" % (package))
-
-        remove_c += 1
-
-    if remove_c > 0:
+            module.fail_json(msg="failed to remove %s" % (" ".join(to_remove)), stdout=stdout, stderr=stderr)
 
-        module.exit_json(changed=True, msg="removed %s package(s)" % remove_c)
+        module.exit_json(changed=True, msg="removed %s package(s)" % len(to_remove))
 
     module.exit_json(changed=False, msg="package(s) already absent")
 
 
 def install_packages(module, state, packages):
-    install_c = 0
+    index = build_index(module, state)
+    to_install = []
 
-    for i, package in enumerate(packages):
+    for package in packages:
         # if the package is installed and state == present
         # or state == latest and is up-to-date then skip
-        installed, updated = query_package(module, package)
+        installed, updated = query_package(module, package, index=index)
         if installed and (state == 'present' or (state == 'latest' and updated)):
             continue
 
+        to_install.append(package)
+
+    if to_install:
         if state == 'present':
             command = 'install'
 
         if state == 'latest':
             command = 'upgrade'
 
-        cmd = "pear %s %s" % (command, package)
+        # Install them all at once
+        cmd = "pear %s %s" % (command, " ".join(to_install))
         rc, stdout, stderr = module.run_command(cmd, check_rc=False)
 
         if rc != 0:
-            module.fail_json(msg="failed to install %s" % (package))
-
-        install_c += 1
+            module.fail_json(msg="failed to install %s" % (" ".join(to_install)), stdout=stdout, stderr=stderr)
 
-    if install_c > 0:
-        module.exit_json(changed=True, msg="installed %s package(s)" % (install_c))
+        module.exit_json(changed=True, msg="installed %s package(s)" % (len(to_install)))
 
     module.exit_json(changed=False, msg="package(s) already installed")
 
 
 def check_packages(module, packages, state):
+    index = build_index(module, state)
     would_be_changed = []
     for package in packages:
-        installed, updated = query_package(module, package)
+        installed, updated = query_package(module, package, index=index)
         if ((state in ["present", "latest"] and not installed) or
                 (state == "absent" and installed) or
                 (state == "latest" and not updated)):
@@ -224,4 +290,5 @@ def main():
 # import module snippets
 from ansible.module_utils.basic import *
 
-main()
+if __name__ == '__main__':
+    main()
@@ -91,6 +91,71 @@ EXAMPLES = '''
 import os
 import re
 
+APK_DB = '/lib/apk/db/installed'
+
+def dependency_name(dependency):
+    # strip version constraints, conflicts and provider prefixes are no
+    # package names
+    if dependency.startswith('!') or ':' in dependency:
+        return None
+    return re.split('[<>=~]', dependency)[0]
+
+def read_installed_db(module):
+    # Index the installed database once instead of querying apk for every
+    # package: name -> dict(version, depends, virtual)
+    try:
+        f = open(APK_DB)
+    except IOError:
+        return None
+    try:
+        data = f.read()
+    finally:
+        f.close()
+    installed = {}
+    provides = {}
+    pkg = None
+    for line in data.split('\n'):
+        if line.startswith('P:'):
+            pkg = dict(version=None, depends=[], virtual=False)
+            installed[line[2:]] = pkg
+        elif pkg is None:
+            continue
+        elif line.startswith('V:'):
+            pkg['version'] = line[2:]
+        elif line.startswith('D:'):
+            pkg['depends'] = [d for d in map(dependency_name, line[2:].split()) if d]
+        elif line.startswith('p:'):
+            for provided in line[2:].split():
+                provides[provided.split('=')[0]] = pkg
+        elif line.startswith('T:'):
+            pkg['virtual'] = (line[2:] == 'virtual meta package')
+        elif line == '':
+            pkg = None
+    for name, pkg in provides.items():
+        installed.setdefault(name, pkg)
+    return installed
+
+def get_upgradable(module):
+    # Names of the installed packages with a newer version available, from
+    # a single apk version call
+    cmd = "%s version -l '<'" % (APK_PATH)
+    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+    upgradable = []
+    for line in stdout.split('\n'):
+        match = re.match(r'^(\S+?)-\d[^-\s]*-r\d+\s+<\s', line)
+        if match:
+            upgradable.append(match.group(1))
+    return upgradable
+
+def build_index(module, state):
+    installed = read_installed_db(module)
+    if installed is None:
+        return None
+    index = dict(installed=installed, upgradable=None)
+    if state == 'latest':
+        index['upgradable'] = get_upgradable(module)
+    return index
+
 def update_package_db(module):
     cmd = "%s update" % (APK_PATH)
     rc, stdout, stderr = module.run_command(cmd, check_rc=False)
@@ -99,7 +164,9 @@ def update_package_db(module):
     else:
         module.fail_json(msg="could not update package db")
 
-def query_package(module, name):
+def query_package(module, name, index=None):
+    if index is not None:
+        return name in index['installed']
     cmd = "%s -v info --installed %s" % (APK_PATH, name)
     rc, stdout, stderr = module.run_command(cmd, check_rc=False)
     if rc == 0:
@@ -107,7 +174,9 @@ def query_package(module, name):
     else:
         return False
 
-def query_latest(module, name):
+def query_latest(module, name, index=None):
+    if index is not None and index['upgradable'] is not None:
+        return name not in index['upgradable']
     cmd = "%s version %s" % (APK_PATH, name)
     rc, stdout, stderr = module.run_command(cmd, check_rc=False)
     search_pattern = "(%s)-[\d\.\w]+-[\d\w]+\s+(.)\s+[\d\.\w]+-[\d\w]+\s+" % (name)
@@ -116,7 +185,9 @@ def query_latest(module, name):
         return False
     return True
 
-def query_virtual(module, name):
+def query_virtual(module, name, index=None):
+    if index is not None:
+        return name in index['installed'] and index['installed'][name]['virtual']
     cmd = "%s -v info --description %s" % (APK_PATH, name)
     rc, stdout, stderr = module.run_command(cmd, check_rc=False)
     search_pattern = "^%s: virtual meta package" % (name)
@@ -124,7 +195,11 @@ def query_virtual(module, name):
         return True
     return False
 
-def get_dependencies(module, name):
+def get_dependencies(module, name, index=None):
+    if index is not None:
+        if name in index['installed']:
+            return index['installed'][name]['depends']
+        return []
     cmd = "%s -v info --depends %s" % (APK_PATH, name)
     rc, stdout, stderr = module.run_command(cmd, check_rc=False)
     dependencies = stdout.split()
@@ -149,24 +224,25 @@ def install_packages(module, names, state):
     upgrade = False
     to_install = []
     to_upgrade = []
+    index = build_index(module, state)
     for name in names:
         # Check if virtual package
-        if query_virtual(module, name):
+        if query_virtual(module, name, index):
             # Get virtual package dependencies
-            dependencies = get_dependencies(module, name)
+            dependencies = get_dependencies(module, name, index)
             for dependency in dependencies:
-                if state == 'latest' and not query_latest(module, dependency):
+                if state == 'latest' and not query_latest(module, dependency, index):
                     to_upgrade.append(dependency)
         else:
-            if not query_package(module, name):
+            if not query_package(module, name, index):
                 to_install.append(name)
-            elif state == 'latest' and not query_latest(module, name):
+            elif state == 'latest' and not query_latest(module, name, index):
                 to_upgrade.append(name)
     if to_upgrade:
         upgrade = True
     if not to_install and not upgrade:
         module.exit_json(changed=False, msg="package(s) already installed")
-    packages = " ".join(to_install) + " ".join(to_upgrade)
+    packages = " ".join(to_install + to_upgrade)
     if upgrade:
         if module.check_mode:
             cmd = "%s add --upgrade --simulate %s" % (APK_PATH, packages)
@@ -184,8 +260,9 @@ def install_packages(module, names, state):
 
 def remove_packages(module, names):
     installed = []
+    index = build_index(module, 'absent')
     for name in names:
-        if query_package(module, name):
+        if query_package(module, name, index):
             installed.append(name)
     if not installed:
         module.exit_json(changed=False, msg="package(s) already removed")
@@ -49,32 +49,126 @@ options:
         required: false
         default: "no"
         choices: [ "yes", "no" ]
+    cache_valid_time:
+        description:
+            - With I(update_cache), skip the update if the package lists are
+              younger than this many seconds.
+        required: false
+        default: 0
+        version_added: "2.3"
 notes:  []
 '''
 EXAMPLES = '''
 - opkg: name=foo state=present
 - opkg: name=foo state=present update_cache=yes
+- opkg: name=foo,bar state=present update_cache=yes cache_valid_time=86400
 - opkg: name=foo state=absent
 - opkg: name=foo,bar state=absent
 - opkg: name=foo state=present force=overwrite
 '''
 
+import glob
+import os
 import pipes
+import time
+
+OPKG_CONF = '/etc/opkg.conf'
+OPKG_STATUS = '/usr/lib/opkg/status'
+OPKG_LISTS = ['/var/opkg-lists', '/var/lib/opkg/lists']
+
+def lists_dirs():
+    """ Returns the directories opkg may keep the package lists in. """
+
+    dirs = []
+    try:
+        f = open(OPKG_CONF)
+    except IOError:
+        return list(OPKG_LISTS)
+    try:
+        for line in f:
+            fields = line.split()
+            if len(fields) == 3 and fields[0] == 'lists_dir':
+                dirs.append(fields[2])
+    finally:
+        f.close()
+    return dirs + OPKG_LISTS
+
+
+def lists_are_fresh(cache_valid_time):
+    """ Returns whether the package lists were updated less than cache_valid_time seconds ago. """
+
+    if cache_valid_time <= 0:
+        return False
+
+    lists = []
+    for path in lists_dirs():
+        lists.extend(glob.glob(os.path.join(path, '*')))
+    if not lists:
+        return False
+
+    return time.time() - max([os.path.getmtime(path) for path in lists]) < cache_valid_time
+
 
 def update_package_db(module, opkg_path):
     """ Updates packages list. """
 
+    if lists_are_fresh(module.params["cache_valid_time"]):
+        return
+
     rc, out, err = module.run_command("%s update" % opkg_path)
 
     if rc != 0:
         module.fail_json(msg="could not update package db")
 
 
-def query_package(module, opkg_path, name, state="present"):
+def parse_status(data):
+    """ Returns the installed packages in an opkg status file as a dict of name to version. """
+
+    installed = {}
+    for stanza in data.split("\n\n"):
+        fields = {}
+        for line in stanza.splitlines():
+            if ":" in line and not line[0].isspace():
+                key, value = line.split(":", 1)
+                fields[key] = value.strip()
+        # Status is "want flags status", e.g. "install user installed"
+        if "Package" in fields and fields.get("Status", "").split()[-1:] == ["installed"]:
+            installed[fields["Package"]] = fields.get("Version", "")
+    return installed
+
+
+def get_installed(module, opkg_path):
+    """ Returns the installed packages as a dict of name to version.
+
+    Reads the opkg status file, falling back to a single opkg list-installed.
+    """
+
+    if os.path.exists(OPKG_STATUS):
+        try:
+            return parse_status(open(OPKG_STATUS).read())
+        except IOError:
+            pass
+
+    rc, out, err = module.run_command("%s list-installed" % opkg_path)
+    if rc != 0:
+        module.fail_json(msg="could not list installed packages", stdout=out, stderr=err)
+
+    installed = {}
+    for line in out.splitlines():
+        fields = line.split(" - ")
+        if len(fields) >= 2:
+            installed[fields[0]] = fields[1]
+    return installed
+
+
+def query_package(module, opkg_path, name, state="present", installed=None):
     """ Returns whether a package is installed or not. """
 
     if state == "present":
 
+        if installed is not None:
+            return name in installed
+
         rc, out, err = module.run_command("%s list-installed | grep -q \"^%s \"" % (pipes.quote(opkg_path), pipes.quote(name)), use_unsafe_shell=True)
         if rc == 0:
             return True
@@ -90,21 +184,20 @@ def remove_packages(module, opkg_path, packages):
     if force:
         force = "--force-%s" % force
 
-    remove_c = 0
-    # Using a for loop incase of error, we can report the package that failed
-    for package in packages:
-        # Query the package first, to see if we even need to remove
-        if not query_package(module, opkg_path, package):
-            continue
+    installed = get_installed(module, opkg_path)
+    # Query the packages first, to see if we even need to remove
+    to_remove = [package for package in packages if query_package(module, opkg_path, package, installed=installed)]
+    remove_c = len(to_remove)
 
-        rc, out, err = module.run_command("%s remove %s %s" % (opkg_path, force, package))
-
-        if query_package(module, opkg_path, package):
-            module.fail_json(msg="failed to remove %s: %s" % (package, out))
+    if remove_c > 0:
 
-        remove_c += 1
+        # Remove all of them at once, checking afterwards which ones failed
+        rc, out, err = module.run_command("%s remove %s %s" % (opkg_path, force, " ".join(to_remove)))
 
-    if remove_c > 0:
+        installed = get_installed(module, opkg_path)
+        failed = [package for package in to_remove if query_package(module, opkg_path, package, installed=installed)]
+        if failed:
+            module.fail_json(msg="failed to remove %s: %s" % (" ".join(failed), out), stderr=err)
 
         module.exit_json(changed=True, msg="removed %s package(s)" % remove_c)
 
@@ -119,20 +212,20 @@ def install_packages(module, opkg_path, packages):
     if force:
         force = "--force-%s" % force
 
-    install_c = 0
+    installed = get_installed(module, opkg_path)
+    to_install = [package for package in packages if not query_package(module, opkg_path, package, installed=installed)]
+    install_c = len(to_install)
 
-    for package in packages:
-        if query_package(module, opkg_path, package):
-            continue
-
-        rc, out, err = module.run_command("%s install %s %s" % (opkg_path, force, package))
+    if install_c > 0:
 
-        if not query_package(module, opkg_path, package):
-            module.fail_json(msg="failed to install %s: %s" % (package, out))
+        # Install all of them at once, checking afterwards which ones failed
+        rc, out, err = module.run_command("%s install %s %s" % (opkg_path, force, " ".join(to_install)))
 
-        install_c += 1
+        installed = get_installed(module, opkg_path)
+        failed = [package for package in to_install if not query_package(module, opkg_path, package, installed=installed)]
+        if failed:
+            module.fail_json(msg="failed to install %s: %s" % (" ".join(failed), out), stderr=err)
 
-    if install_c > 0:
         module.exit_json(changed=True, msg="installed %s package(s)" % (install_c))
 
     module.exit_json(changed=False, msg="package(s) already present")
@@ -144,7 +237,8 @@ def main():
             name = dict(aliases=["pkg"], required=True),
             state = dict(default="present", choices=["present", "installed", "absent", "removed"]),
             force = dict(default="", choices=["", "depends", "maintainer", "reinstall", "overwrite", "downgrade", "space", "postinstall", "remove", "checksum", "removal-of-dependent-packages"]),
-            update_cache = dict(default="no", aliases=["update-cache"], type='bool')
+            update_cache = dict(default="no", aliases=["update-cache"], type='bool'),
+            cache_valid_time = dict(default=0, type='int')
         )
     )
 
@@ -155,7 +249,10 @@ def main():
     if p["update_cache"]:
         update_package_db(module, opkg_path)
 
-    pkgs = p["name"].split(",")
+    pkgs = []
+    for package in p["name"].split(","):
+        if package not in pkgs:
+            pkgs.append(package)
 
     if p["state"] in ["present", "installed"]:
         install_packages(module, opkg_path, pkgs)
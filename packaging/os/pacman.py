@@ -152,6 +152,88 @@ def query_package(module, pacman_path, name, state="present"):
         return True, True, True
 
 
+def get_installed_versions(module, pacman_path, names):
+    """Query the local versions of all names with a single pacman -Q call. Returns a dict of the installed names to their (package name, version), as names may be satisfied by a package providing them, or None if the output cannot be mapped back to the names"""
+    cmd = "%s -Q %s" % (pacman_path, " ".join(names))
+    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+    missing = re.findall(r"package '([^']+)' was not found", stderr)
+    found = [line.split() for line in stdout.split('\n') if line.strip()]
+    if len(found) + len(missing) != len(names):
+        return None
+
+    installed = {}
+    for name in names:
+        if name in missing:
+            missing.remove(name)
+        else:
+            pkg = found.pop(0)
+            installed[name] = (pkg[0], pkg[-1])
+    return installed
+
+def get_sync_versions(module, pacman_path):
+    """Get the versions of all packages in the sync databases with a single pacman -Sl call, keyed by name and by repo/name"""
+    cmd = "%s -Sl" % (pacman_path)
+    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+    versions = {}
+    for line in stdout.split('\n'):
+        fields = line.split()
+        if len(fields) < 3:
+            continue
+        repo, name, version = fields[:3]
+        # the first repository providing a package wins, as with pacman -S
+        if name not in versions:
+            versions[name] = version
+        versions["%s/%s" % (repo, name)] = version
+    return versions
+
+def query_packages(module, pacman_path, names, state="present"):
+    """Query the status of all names at once, see query_package. Returns a dict of name to the (installed, up-to-date, unknown) booleans. The repository is only queried for state=latest"""
+    installed = get_installed_versions(module, pacman_path, names)
+    if installed is None:
+        status = {}
+        for name in names:
+            status[name] = query_package(module, pacman_path, name)
+        return status
+
+    sync = {}
+    if state == "latest" and installed:
+        sync = get_sync_versions(module, pacman_path)
+
+    status = {}
+    for name in names:
+        if name not in installed:
+            status[name] = (False, False, False)
+            continue
+        pkgname, lversion = installed[name]
+        rversion = sync.get(name, sync.get(pkgname))
+        if state != "latest":
+            status[name] = (True, True, False)
+        elif rversion is None:
+            # package is installed but cannot fetch remote Version
+            status[name] = (True, True, True)
+        else:
+            status[name] = (True, (lversion == rversion), False)
+    return status
+
+def failed_packages(output, targets):
+    """Pick the targets named in pacman's error messages, all of them if none are named"""
+    errors = [line for line in output.split('\n') if line.startswith('error:') or line.startswith('::')]
+    failed = []
+    for target in targets:
+        pattern = r"(?<![\w.+-])%s(?![\w.+-])" % re.escape(target.split('/')[-1])
+        for line in errors:
+            if re.search(pattern, line):
+                failed.append(target)
+                break
+    return failed or targets
+
+def unique(items):
+    result = []
+    for item in items:
+        if item not in result:
+            result.append(item)
+    return result
+
 def update_package_db(module, pacman_path):
     if module.params["force"]:
         args = "Syy"
@@ -194,25 +276,20 @@ def remove_packages(module, pacman_path, packages):
     else:
         args = "R"
 
-    remove_c = 0
-    # Using a for loop incase of error, we can report the package that failed
-    for package in packages:
-        # Query the package first, to see if we even need to remove
-        installed, updated, unknown = query_package(module, pacman_path, package)
-        if not installed:
-            continue
+    status = query_packages(module, pacman_path, packages)
+    targets = unique([package for package in packages if status[package][0]])
 
-        cmd = "%s -%s %s --noconfirm" % (pacman_path, args, package)
+    if targets:
+        # Remove all packages in one transaction, pacman's errors tell which
+        # package failed
+        cmd = "%s -%s %s --noconfirm" % (pacman_path, args, " ".join(targets))
         rc, stdout, stderr = module.run_command(cmd, check_rc=False)
 
         if rc != 0:
-            module.fail_json(msg="failed to remove %s" % (package))
+            module.fail_json(msg="failed to remove %s" % (" ".join(failed_packages(stdout + stderr, targets))),
+                             stdout=stdout, stderr=stderr)
 
-        remove_c += 1
-
-    if remove_c > 0:
-
-        module.exit_json(changed=True, msg="removed %s package(s)" % remove_c)
+        module.exit_json(changed=True, msg="removed %s package(s)" % len(targets))
 
     module.exit_json(changed=False, msg="package(s) already absent")
 
@@ -222,9 +299,12 @@ def install_packages(module, pacman_path, state, packages, package_files):
     package_err = []
     message = ""
 
+    status = query_packages(module, pacman_path, packages, state)
+    repo_targets = []
+    file_targets = []
     for i, package in enumerate(packages):
         # if the package is installed and state == present or state == latest and is up-to-date then skip
-        installed, updated, latestError = query_package(module, pacman_path, package)
+        installed, updated, latestError = status[package]
         if latestError and state == 'latest':
             package_err.append(package)
 
@@ -232,17 +312,24 @@ def install_packages(module, pacman_path, state, packages, package_files):
             continue
 
         if package_files[i]:
-            params = '-U %s' % package_files[i]
+            file_targets.append(package_files[i])
         else:
-            params = '-S %s' % package
+            repo_targets.append(package)
 
-        cmd = "%s %s --noconfirm --needed" % (pacman_path, params)
+    # Install all packages in one transaction, pacman cannot mix repository
+    # packages and package files though
+    for args, targets in [('-S', unique(repo_targets)), ('-U', unique(file_targets))]:
+        if not targets:
+            continue
+
+        cmd = "%s %s %s --noconfirm --needed" % (pacman_path, args, " ".join(targets))
         rc, stdout, stderr = module.run_command(cmd, check_rc=False)
 
         if rc != 0:
-            module.fail_json(msg="failed to install %s" % (package))
+            module.fail_json(msg="failed to install %s" % (" ".join(failed_packages(stdout + stderr, targets))),
+                             stdout=stdout, stderr=stderr)
 
-        install_c += 1
+        install_c += len(targets)
 
     if state == 'latest' and len(package_err) > 0:
         message = "But could not ensure 'latest' state for %s package(s) as remote version could not be fetched." % (package_err)
@@ -254,8 +341,9 @@ def install_packages(module, pacman_path, state, packages, package_files):
 
 def check_packages(module, pacman_path, packages, state):
     would_be_changed = []
+    status = query_packages(module, pacman_path, packages, state)
     for package in packages:
-        installed, updated, unknown = query_package(module, pacman_path, package)
+        installed, updated, unknown = status[package]
         if ((state in ["present", "latest"] and not installed) or
                 (state == "absent" and installed) or
                 (state == "latest" and not updated)):
@@ -272,16 +360,20 @@ def check_packages(module, pacman_path, packages, state):
 def expand_package_groups(module, pacman_path, pkgs):
     expanded = []
 
-    for pkg in pkgs:
-        cmd = "%s -Sgq %s" % (pacman_path, pkg)
-        rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+    # Look up all names with a single call, pacman -Sg lists the members of
+    # the names which are groups as "group package" lines
+    cmd = "%s -Sg %s" % (pacman_path, " ".join(pkgs))
+    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+    groups = {}
+    for line in stdout.split('\n'):
+        fields = line.split()
+        if len(fields) == 2:
+            groups.setdefault(fields[0], []).append(fields[1])
 
-        if rc == 0:
+    for pkg in pkgs:
+        if pkg in groups:
             # A group was found matching the name, so expand it
-            for name in stdout.split('\n'):
-                name = name.strip()
-                if name:
-                    expanded.append(name)
+            expanded.extend(groups[pkg])
         else:
             expanded.append(pkg)
 
@@ -82,6 +82,14 @@ options:
         required: false
         choices: [ "yes", "no" ]
         default: no
+    cache_valid_time:
+        version_added: "2.3"
+        description:
+            - Skip updating the repository catalogue if it was updated less
+              than this many seconds ago. C(0) updates it on every run, unless
+              I(cached) is set.
+        required: false
+        default: 0
 author: "bleader (@bleader)" 
 notes:
     - When using pkgsite, be careful that already in cache packages won't be downloaded again.
@@ -96,20 +104,57 @@ EXAMPLES = '''
 
 # Remove packages foo and bar 
 - pkgng: name=foo,bar state=absent
+
+# Install packages foo and bar, updating the catalogue at most once an hour
+- pkgng: name=foo,bar cache_valid_time=3600
 '''
 
 
+import fnmatch
+import glob
+import os
 import re
+import time
 from ansible.module_utils.basic import AnsibleModule
 
-def query_package(module, pkgng_path, name, dir_arg):
-
-    rc, out, err = module.run_command("%s %s info -g -e %s" % (pkgng_path, dir_arg, name))
-
-    if rc == 0:
-        return True
-
-    return False
+def query_installed(module, pkgng_path, dir_arg, annotations=False):
+    # Fetch the installed packages with a single pkg query instead of one
+    # pkg info per package: name -> dict(version, origin, annotations)
+    rc, out, err = module.run_command("%s %s query -a '%%n %%v %%o'" % (pkgng_path, dir_arg))
+    if rc != 0:
+        module.fail_json(msg="failed to query installed packages: %s" % out, stderr=err)
+
+    installed = {}
+    for line in out.splitlines():
+        fields = line.split()
+        if len(fields) == 3:
+            installed[fields[0]] = dict(version=fields[1], origin=fields[2], annotations={})
+
+    if annotations:
+        # packages without annotations are left out of this query, hence the
+        # separate query above
+        rc, out, err = module.run_command("%s %s query -a '%%n %%At %%Av'" % (pkgng_path, dir_arg))
+        if rc != 0:
+            module.fail_json(msg="failed to query annotations: %s" % out, stderr=err)
+        for line in out.splitlines():
+            fields = line.split(' ', 2)
+            if len(fields) == 3 and fields[0] in installed:
+                installed[fields[0]]['annotations'][fields[1]] = fields[2]
+
+    return installed
+
+def match_installed(installed, name):
+    # Names of the installed packages matching name, like pkg info -g -e does
+    # for globs, name-version and origins
+    if name in installed:
+        return [name]
+    matches = []
+    for pkgname, pkg in installed.items():
+        if (fnmatch.fnmatchcase(pkgname, name) or
+                fnmatch.fnmatchcase("%s-%s" % (pkgname, pkg['version']), name) or
+                pkg['origin'] == name):
+            matches.append(pkgname)
+    return matches
 
 def pkgng_older_than(module, pkgng_path, compare_version):
 
@@ -127,34 +172,53 @@ def pkgng_older_than(module, pkgng_path, compare_version):
             new_pkgng = False
     return not new_pkgng
 
+def catalogue_is_fresh(module, cache_valid_time):
+    # The repository catalogues are sqlite databases pkg update refreshes,
+    # skip the update if the newest one is recent enough
+    if cache_valid_time <= 0:
+        return False
+    root = module.params["rootdir"] or module.params["chroot"] or "/"
+    catalogues = glob.glob(os.path.join(root, "var/db/pkg/repo-*.sqlite"))
+    if not catalogues:
+        return False
+    newest = max([os.path.getmtime(catalogue) for catalogue in catalogues])
+    return time.time() - newest < cache_valid_time
+
 
 def remove_packages(module, pkgng_path, packages, dir_arg):
 
-    remove_c = 0
-    # Using a for loop incase of error, we can report the package that failed
+    installed = query_installed(module, pkgng_path, dir_arg)
+    to_remove = []
     for package in packages:
         # Query the package first, to see if we even need to remove
-        if not query_package(module, pkgng_path, package, dir_arg):
-            continue
+        if match_installed(installed, package) and package not in to_remove:
+            to_remove.append(package)
 
-        if not module.check_mode:
-            rc, out, err = module.run_command("%s %s delete -y %s" % (pkgng_path, dir_arg, package))
+    if not to_remove:
+        return (False, "package(s) already absent")
 
-        if not module.check_mode and query_package(module, pkgng_path, package, dir_arg):
-            module.fail_json(msg="failed to remove %s: %s" % (package, out))
-
-        remove_c += 1
-
-    if remove_c > 0:
-
-        return (True, "removed %s package(s)" % remove_c)
+    if not module.check_mode:
+        # Remove all packages at once, check afterwards which of them failed.
+        # Only glob patterns are passed with -g, so that plain names do not
+        # match more packages than they used to
+        globs = [package for package in to_remove if [c for c in "*?[" if c in package]]
+        names = [package for package in to_remove if package not in globs]
+        out = err = ""
+        for args, batch in (("", names), ("-g ", globs)):
+            if batch:
+                rc, o, e = module.run_command("%s %s delete %s-y %s" % (pkgng_path, dir_arg, args, " ".join(batch)))
+                out += o
+                err += e
 
-    return (False, "package(s) already absent")
+        installed = query_installed(module, pkgng_path, dir_arg)
+        failed = [package for package in to_remove if match_installed(installed, package)]
+        if failed:
+            module.fail_json(msg="failed to remove %s: %s" % (" ".join(failed), out), stderr=err)
 
+    return (True, "removed %s package(s)" % len(to_remove))
 
-def install_packages(module, pkgng_path, packages, cached, pkgsite, dir_arg):
 
-    install_c = 0
+def install_packages(module, pkgng_path, packages, cached, pkgsite, dir_arg, cache_valid_time=0):
 
     # as of pkg-1.1.4, PACKAGESITE is deprecated in favor of repository definitions
     # in /usr/local/etc/pkg/repos
@@ -168,7 +232,7 @@ def install_packages(module, pkgng_path, packages, cached, pkgsite, dir_arg):
     batch_var = 'env BATCH=yes' # This environment variable skips mid-install prompts,
                                 # setting them to their default values.
 
-    if not module.check_mode and not cached:
+    if not module.check_mode and not cached and not catalogue_is_fresh(module, cache_valid_time):
         if old_pkgng:
             rc, out, err = module.run_command("%s %s update" % (pkgsite, pkgng_path))
         else:
@@ -176,82 +240,55 @@ def install_packages(module, pkgng_path, packages, cached, pkgsite, dir_arg):
         if rc != 0:
             module.fail_json(msg="Could not update catalogue")
 
+    installed = query_installed(module, pkgng_path, dir_arg)
+    to_install = []
     for package in packages:
-        if query_package(module, pkgng_path, package, dir_arg):
-            continue
+        if not match_installed(installed, package) and package not in to_install:
+            to_install.append(package)
 
-        if not module.check_mode:
-            if old_pkgng:
-                rc, out, err = module.run_command("%s %s %s install -g -U -y %s" % (batch_var, pkgsite, pkgng_path, package))
-            else:
-                rc, out, err = module.run_command("%s %s %s install %s -g -U -y %s" % (batch_var, pkgng_path, dir_arg, pkgsite, package))
+    if not to_install:
+        return (False, "package(s) already present")
 
-        if not module.check_mode and not query_package(module, pkgng_path, package, dir_arg):
-            module.fail_json(msg="failed to install %s: %s" % (package, out), stderr=err)
-
-        install_c += 1
-
-    if install_c > 0:
-        return (True, "added %s package(s)" % (install_c))
-
-    return (False, "package(s) already present")
-
-def annotation_query(module, pkgng_path, package, tag, dir_arg):
-    rc, out, err = module.run_command("%s %s info -g -A %s" % (pkgng_path, dir_arg, package))
-    match = re.search(r'^\s*(?P<tag>%s)\s*:\s*(?P<value>\w+)' % tag, out, flags=re.MULTILINE)
-    if match:
-        return match.group('value')
-    return False
-
-
-def annotation_add(module, pkgng_path, package, tag, value, dir_arg):
-    _value = annotation_query(module, pkgng_path, package, tag, dir_arg)
-    if not _value:
-        # Annotation does not exist, add it.
-        rc, out, err = module.run_command('%s %s annotate -y -A %s %s "%s"'
-            % (pkgng_path, dir_arg, package, tag, value))
-        if rc != 0:
-            module.fail_json("could not annotate %s: %s"
-                % (package, out), stderr=err)
-        return True
-    elif _value != value:
-        # Annotation exists, but value differs
-        module.fail_json(
-            mgs="failed to annotate %s, because %s is already set to %s, but should be set to %s"
-            % (package, tag, _value, value))
-        return False
-    else:
+    if not module.check_mode:
+        # Install all packages in one transaction, check afterwards which of
+        # them failed
+        names = " ".join(to_install)
+        if old_pkgng:
+            rc, out, err = module.run_command("%s %s %s install -g -U -y %s" % (batch_var, pkgsite, pkgng_path, names))
+        else:
+            rc, out, err = module.run_command("%s %s %s install %s -g -U -y %s" % (batch_var, pkgng_path, dir_arg, pkgsite, names))
+
+        installed = query_installed(module, pkgng_path, dir_arg)
+        failed = [package for package in to_install if not match_installed(installed, package)]
+        if failed:
+            module.fail_json(msg="failed to install %s: %s" % (" ".join(failed), out), stderr=err)
+
+    return (True, "added %s package(s)" % (len(to_install)))
+
+def annotation_targets(module, package, tag, value, operation, annotations):
+    # Work out whether the annotation of an installed package must change,
+    # see annotate_packages
+    _value = annotations.get(tag)
+    if operation == '+':
+        if _value is None:
+            # Annotation does not exist, add it.
+            return True
+        elif _value != value:
+            # Annotation exists, but value differs
+            module.fail_json(
+                msg="failed to annotate %s, because %s is already set to %s, but should be set to %s"
+                % (package, tag, _value, value))
         # Annotation exists, nothing to do
         return False
-
-def annotation_delete(module, pkgng_path, package, tag, value, dir_arg):
-    _value = annotation_query(module, pkgng_path, package, tag, dir_arg)
-    if _value:
-        rc, out, err = module.run_command('%s %s annotate -y -D %s %s'
-            % (pkgng_path, dir_arg, package, tag))
-        if rc != 0:
-            module.fail_json("could not delete annotation to %s: %s"
-                % (package, out), stderr=err)
-        return True
-    return False
-
-def annotation_modify(module, pkgng_path, package, tag, value, dir_arg):
-    _value = annotation_query(module, pkgng_path, package, tag, dir_arg)
-    if not value:
-        # No such tag
-        module.fail_json("could not change annotation to %s: tag %s does not exist"
-            % (package, tag))
-    elif _value == value:
-        # No change in value
-        return False
+    elif operation == '-':
+        return _value is not None
     else:
-        rc,out,err = module.run_command('%s %s annotate -y -M %s %s "%s"'
-            % (pkgng_path, dir_arg, package, tag, value))
-        if rc != 0:
-            module.fail_json("could not change annotation annotation to %s: %s"
-                % (package, out), stderr=err)
-        return True
-
+        if _value is None:
+            # No such tag
+            module.fail_json(msg="could not change annotation to %s: tag %s does not exist"
+                % (package, tag))
+        # Change unless the value is the same
+        return _value != value
 
 def annotate_packages(module, pkgng_path, packages, annotation, dir_arg):
     annotate_c = 0
@@ -261,15 +298,44 @@ def annotate_packages(module, pkgng_path, packages, annotation, dir_arg):
         re.split(r',', annotation))
 
     operation = {
-        '+': annotation_add,
-        '-': annotation_delete,
-        ':': annotation_modify
+        '+': '-A',
+        '-': '-D',
+        ':': '-M'
     }
 
-    for package in packages:
-        for _annotation in annotations:
-            if operation[_annotation['operation']](module, pkgng_path, package, _annotation['tag'], _annotation['value']):
-                annotate_c += 1
+    installed = query_installed(module, pkgng_path, dir_arg, annotations=True)
+
+    for _annotation in annotations:
+        # Annotate all packages needing the change with a single command,
+        # matching their names with an anchored regular expression
+        targets = []
+        for package in packages:
+            for name in match_installed(installed, package):
+                if name not in targets and annotation_targets(module, name, _annotation['tag'],
+                        _annotation['value'], _annotation['operation'], installed[name]['annotations']):
+                    targets.append(name)
+        if not targets:
+            continue
+
+        # keep the index in step for the following annotations
+        for name in targets:
+            if _annotation['operation'] == '-':
+                del installed[name]['annotations'][_annotation['tag']]
+            else:
+                installed[name]['annotations'][_annotation['tag']] = _annotation['value']
+
+        annotate_c += len(targets)
+        if module.check_mode:
+            continue
+
+        pattern = "^(%s)$" % "|".join([re.sub(r'([.\[\]()*+?{}|^$\\])', r'\\\1', name) for name in targets])
+        cmd = "%s %s annotate -y %s -x '%s' %s" % (pkgng_path, dir_arg, operation[_annotation['operation']], pattern, _annotation['tag'])
+        if _annotation['operation'] != '-':
+            cmd += ' "%s"' % _annotation['value']
+        rc, out, err = module.run_command(cmd)
+        if rc != 0:
+            module.fail_json(msg="could not annotate %s: %s"
+                % (" ".join(targets), out), stderr=err)
 
     if annotate_c > 0:
         return (True, "added %s annotations." % annotate_c)
@@ -302,7 +368,8 @@ def main():
                 pkgsite         = dict(default="", required=False),
                 rootdir         = dict(default="", required=False, type='path'),
                 chroot          = dict(default="", required=False, type='path'),
-                autoremove      = dict(default=False, type='bool')),
+                autoremove      = dict(default=False, type='bool'),
+                cache_valid_time = dict(default=0, type='int')),
             supports_check_mode = True,
             mutually_exclusive  =[["rootdir", "chroot"]])
 
@@ -327,7 +394,7 @@ def main():
         dir_arg = '--chroot %s' % (p["chroot"])
 
     if p["state"] == "present":
-        _changed, _msg = install_packages(module, pkgng_path, pkgs, p["cached"], p["pkgsite"], dir_arg)
+        _changed, _msg = install_packages(module, pkgng_path, pkgs, p["cached"], p["pkgsite"], dir_arg, p["cache_valid_time"])
         changed = changed or _changed
         msgs.append(_msg)
 
@@ -146,6 +146,30 @@ options:
     default: False
     choices: [ "yes", "no" ]
 
+  usepkg:
+    description:
+      - Use binary packages from PKGDIR when they are available, building
+        the others (--usepkg)
+    required: false
+    default: False
+    choices: [ "yes", "no" ]
+    version_added: 2.3
+
+  jobs:
+    description:
+      - Number of packages to build simultaneously (--jobs)
+    required: false
+    default: null
+    version_added: 2.3
+
+  loadavg:
+    description:
+      - Do not start new builds while other builds are running and the
+        load average is at least this value (--load-average)
+    required: false
+    default: null
+    version_added: 2.3
+
 requirements: [ gentoolkit ]
 author: 
     - "Yap Sok Ann (@sayap)"
@@ -177,21 +201,66 @@ EXAMPLES = '''
 
 # Remove package foo if it is not explicitly needed
 - portage: package=foo state=absent depclean=yes
+
+# Update world with 4 parallel builds, reusing binary packages
+- portage: package=@world update=yes deep=yes jobs=4 loadavg=8 usepkg=yes getbinpkg=yes
+'''
+
+RETURN = '''
+timings:
+    description: Seconds spent merging each package, read from the emerge log
+    returned: when packages were emerged
+    type: dict
+    sample: {"app-misc/foo-1.0": 42, "dev-libs/bar-2.1": 7}
 '''
 
 
 import os
 import pipes
 import re
+import time
 
+EMERGE_LOG = '/var/log/emerge.log'
 
-def query_package(module, package, action):
+
+def query_packages(module, packages, action):
+    # Query all atoms with a single portageq call, sets are looked up
+    # in the world_sets file
+    atoms = [package for package in packages if not package.startswith('@')]
+    index = query_installed(module, atoms)
+    return [query_package(module, package, action, index) for package in packages]
+
+
+def query_installed(module, atoms):
+    # Map each atom to its best installed version, or to None if the
+    # atoms could not be queried at once
+    if not atoms or not module.portageq_path:
+        return None
+
+    cmd = [module.portageq_path, 'mass_best_version', '/'] + atoms
+    rc, out, err = module.run_command(cmd)
+    lines = out.splitlines()
+    if rc != 0 or len(lines) != len(atoms):
+        return None
+
+    index = {}
+    for atom, line in zip(atoms, lines):
+        if not line.startswith(atom + ':'):
+            return None
+        index[atom] = line[len(atom) + 1:]
+    return index
+
+
+def query_package(module, package, action, index=None):
     if package.startswith('@'):
         return query_set(module, package, action)
-    return query_atom(module, package, action)
+    return query_atom(module, package, action, index)
 
 
-def query_atom(module, atom, action):
+def query_atom(module, atom, action, index=None):
+    if index is not None and atom in index:
+        return index[atom] != ''
+
     cmd = '%s list %s' % (module.equery_path, atom)
 
     rc, out, err = module.run_command(cmd)
@@ -240,19 +309,54 @@ def sync_repositories(module, webrsync=False):
         module.fail_json(msg='could not sync package repositories')
 
 
-# Note: In the 3 functions below, equery is done one-by-one, but emerge is done
-# in one go. If that is not desirable, split the packages into multiple tasks
-# instead of joining them together with comma.
+# Note: In the 3 functions below, emerge is done in one go. If that is not
+# desirable, split the packages into multiple tasks instead of joining them
+# together with comma.
+
+
+def emerge_log_offset():
+    try:
+        return os.path.getsize(EMERGE_LOG)
+    except OSError:
+        return None
+
+
+def read_timings(offset):
+    # Pair the start and completion lines emerge logged since offset, e.g.
+    #   1500000000:  >>> emerge (1 of 2) app-misc/foo-1.0 to /
+    #   1500000042:  ::: completed emerge (1 of 2) app-misc/foo-1.0 to /
+    timings = {}
+    if offset is None:
+        return timings
+
+    try:
+        f = open(EMERGE_LOG)
+        try:
+            f.seek(offset)
+            data = f.read()
+        finally:
+            f.close()
+    except IOError:
+        return timings
+
+    started = {}
+    for line in data.splitlines():
+        match = re.match(r'(\d+):\s+(>>>|:::) (?:completed )?emerge \(\d+ of \d+\) (\S+)', line)
+        if not match:
+            continue
+        stamp, mark, package = match.groups()
+        if mark == '>>>':
+            started[package] = int(stamp)
+        elif package in started:
+            timings[package] = int(stamp) - started.pop(package)
+    return timings
 
 
 def emerge_packages(module, packages):
     p = module.params
 
     if not (p['update'] or p['noreplace']):
-        for package in packages:
-            if not query_package(module, package, 'emerge'):
-                break
-        else:
+        if False not in query_packages(module, packages, 'emerge'):
             module.exit_json(changed=False, msg='Packages already present.')
         if module.check_mode:
             module.exit_json(changed=True, msg='Packages would be installed.')
@@ -280,10 +384,22 @@ def emerge_packages(module, packages):
     if p['usepkg'] and p['usepkgonly']:
         module.fail_json(msg='Use only one of usepkg, usepkgonly')
 
+    emerge_values = {
+        'jobs': '--jobs=%s',
+        'loadavg': '--load-average=%s',
+    }
+    for flag, arg in emerge_values.iteritems():
+        if p[flag] is not None:
+            args.append(arg % p[flag])
+
+    offset = None
+    if not module.check_mode:
+        offset = emerge_log_offset()
     cmd, (rc, out, err) = run_emerge(module, packages, *args)
+    timings = read_timings(offset)
     if rc != 0:
         module.fail_json(
-            cmd=cmd, rc=rc, stdout=out, stderr=err,
+            cmd=cmd, rc=rc, stdout=out, stderr=err, timings=timings,
             msg='Packages not installed.',
         )
 
@@ -311,17 +427,14 @@ def emerge_packages(module, packages):
 
     module.exit_json(
         changed=changed, cmd=cmd, rc=rc, stdout=out, stderr=err,
-        msg=msg,
+        timings=timings, msg=msg,
     )
 
 
 def unmerge_packages(module, packages):
     p = module.params
 
-    for package in packages:
-        if query_package(module, package, 'unmerge'):
-            break
-    else:
+    if True not in query_packages(module, packages, 'unmerge'):
         module.exit_json(changed=False, msg='Packages already absent.')
 
     args = ['--unmerge']
@@ -348,10 +461,7 @@ def cleanup_packages(module, packages):
     p = module.params
 
     if packages:
-        for package in packages:
-            if query_package(module, package, 'unmerge'):
-                break
-        else:
+        if True not in query_packages(module, packages, 'unmerge'):
             module.exit_json(changed=False, msg='Packages already absent.')
 
     args = ['--depclean']
@@ -416,6 +526,8 @@ def main():
             getbinpkg=dict(default=False, type='bool'),
             usepkgonly=dict(default=False, type='bool'),
             usepkg=dict(default=False, type='bool'),
+            jobs=dict(default=None, type='int'),
+            loadavg=dict(default=None, type='float'),
         ),
         required_one_of=[['package', 'sync', 'depclean']],
         mutually_exclusive=[['nodeps', 'onlydeps'], ['quiet', 'verbose']],
@@ -424,6 +536,7 @@ def main():
 
     module.emerge_path = module.get_bin_path('emerge', required=True)
     module.equery_path = module.get_bin_path('equery', required=True)
+    module.portageq_path = module.get_bin_path('portageq')
 
     p = module.params
 
@@ -67,7 +67,28 @@ EXAMPLES = '''
 '''
 
 
-def query_package(module, slackpkg_path, name):
+def get_installed(module):
+    # Read the package database once, the entries in /var/log/packages are
+    # named name-version-arch-build
+    import os
+
+    installed = {}
+    try:
+        entries = os.listdir("/var/log/packages")
+    except OSError:
+        module.fail_json(msg="could not read /var/log/packages")
+
+    for entry in entries:
+        fields = entry.rsplit("-", 3)
+        if len(fields) == 4:
+            installed[fields[0]] = True
+    return installed
+
+
+def query_package(module, slackpkg_path, name, installed=None):
+
+    if installed is not None:
+        return name in installed
 
     import glob
     import platform
@@ -82,25 +103,30 @@ def query_package(module, slackpkg_path, name):
     return False
 
 
-def remove_packages(module, slackpkg_path, packages):
+def run_slackpkg(module, slackpkg_path, action, packages):
+    # One slackpkg transaction for all packages
+    return module.run_command("%s -default_answer=y -batch=on %s %s"
+                              % (slackpkg_path, action, " ".join(packages)))
 
-    remove_c = 0
-    # Using a for loop incase of error, we can report the package that failed
-    for package in packages:
-        # Query the package first, to see if we even need to remove
-        if not query_package(module, slackpkg_path, package):
-            continue
 
-        if not module.check_mode:
-            rc, out, err = module.run_command("%s -default_answer=y -batch=on \
-                                              remove %s" % (slackpkg_path,
-                                              package))
+def remove_packages(module, slackpkg_path, packages):
 
-        if not module.check_mode and query_package(module, slackpkg_path,
-                                                   package):
-            module.fail_json(msg="failed to remove %s: %s" % (package, out))
+    installed = get_installed(module)
+    # Query the packages first, to see if we even need to remove
+    to_remove = [package for package in packages
+                 if query_package(module, slackpkg_path, package, installed)]
+    remove_c = len(to_remove)
 
-        remove_c += 1
+    if remove_c > 0 and not module.check_mode:
+        rc, out, err = run_slackpkg(module, slackpkg_path, "remove", to_remove)
+
+        # Check afterwards which of them failed
+        installed = get_installed(module)
+        failed = [package for package in to_remove
+                  if query_package(module, slackpkg_path, package, installed)]
+        if failed:
+            module.fail_json(msg="failed to remove %s: %s"
+                             % (" ".join(failed), out), stderr=err)
 
     if remove_c > 0:
 
@@ -111,23 +137,23 @@ def remove_packages(module, slackpkg_path, packages):
 
 def install_packages(module, slackpkg_path, packages):
 
-    install_c = 0
-
-    for package in packages:
-        if query_package(module, slackpkg_path, package):
-            continue
-
-        if not module.check_mode:
-            rc, out, err = module.run_command("%s -default_answer=y -batch=on \
-                                              install %s" % (slackpkg_path,
-                                              package))
+    installed = get_installed(module)
+    to_install = [package for package in packages
+                  if not query_package(module, slackpkg_path, package,
+                                       installed)]
+    install_c = len(to_install)
 
-        if not module.check_mode and not query_package(module, slackpkg_path,
-                                                       package):
-            module.fail_json(msg="failed to install %s: %s" % (package, out),
-                             stderr=err)
+    if install_c > 0 and not module.check_mode:
+        rc, out, err = run_slackpkg(module, slackpkg_path, "install",
+                                    to_install)
 
-        install_c += 1
+        installed = get_installed(module)
+        failed = [package for package in to_install
+                  if not query_package(module, slackpkg_path, package,
+                                       installed)]
+        if failed:
+            module.fail_json(msg="failed to install %s: %s"
+                             % (" ".join(failed), out), stderr=err)
 
     if install_c > 0:
         module.exit_json(changed=True, msg="present %s package(s)"
@@ -137,20 +163,19 @@ def install_packages(module, slackpkg_path, packages):
 
 
 def upgrade_packages(module, slackpkg_path, packages):
-    install_c = 0
-
-    for package in packages:
-        if not module.check_mode:
-            rc, out, err = module.run_command("%s -default_answer=y -batch=on \
-                                              upgrade %s" % (slackpkg_path,
-                                              package))
-
-        if not module.check_mode and not query_package(module, slackpkg_path,
-                                                       package):
-            module.fail_json(msg="failed to install %s: %s" % (package, out),
-                             stderr=err)
-
-        install_c += 1
+    install_c = len(packages)
+
+    if install_c > 0 and not module.check_mode:
+        rc, out, err = run_slackpkg(module, slackpkg_path, "upgrade",
+                                    packages)
+
+        installed = get_installed(module)
+        failed = [package for package in packages
+                  if not query_package(module, slackpkg_path, package,
+                                       installed)]
+        if failed:
+            module.fail_json(msg="failed to install %s: %s"
+                             % (" ".join(failed), out), stderr=err)
 
     if install_c > 0:
         module.exit_json(changed=True, msg="present %s package(s)"
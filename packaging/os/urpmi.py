@@ -80,7 +80,30 @@ import sys
 URPMI_PATH = '/usr/sbin/urpmi'
 URPME_PATH = '/usr/sbin/urpme'
 
-def query_package(module, name):
+def get_installed(module):
+    # Read the rpm database once, indexing every installed package under
+    # the names rpm -q accepts for it
+    cmd = "rpm -qa --qf '%{NAME} %{VERSION} %{RELEASE} %{ARCH}\\n'"
+    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+    if rc != 0:
+        module.fail_json(msg="could not query the rpm database", stderr=stderr)
+
+    installed = {}
+    for line in stdout.splitlines():
+        fields = line.split()
+        if len(fields) != 4:
+            continue
+        name, version, release, arch = fields
+        for key in (name, "%s.%s" % (name, arch), "%s-%s" % (name, version),
+                    "%s-%s-%s" % (name, version, release),
+                    "%s-%s-%s.%s" % (name, version, release, arch)):
+            installed[key] = True
+    return installed
+
+def query_package(module, name, installed=None):
+    if installed is not None:
+        return name in installed
+
     # rpm -q returns 0 if the package is installed,
     # 1 if it is not installed
     cmd = "rpm -q %s" % (name)
@@ -90,14 +113,6 @@ def query_package(module, name):
     else:
         return False
 
-def query_package_provides(module, name):
-    # rpm -q returns 0 if the package is installed,
-    # 1 if it is not installed
-    cmd = "rpm -q --provides %s" % (name)
-    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
-    return rc == 0
-
-
 def update_package_db(module):
     cmd = "urpmi.update -a -q"
     rc, stdout, stderr = module.run_command(cmd, check_rc=False)
@@ -107,22 +122,22 @@ def update_package_db(module):
 
 def remove_packages(module, packages):
     
-    remove_c = 0
-    # Using a for loop incase of error, we can report the package that failed
-    for package in packages:
-        # Query the package first, to see if we even need to remove
-        if not query_package(module, package):
-            continue
+    installed = get_installed(module)
+    # Query the packages first, to see if we even need to remove
+    to_remove = [package for package in packages if query_package(module, package, installed)]
+    remove_c = len(to_remove)
 
-        cmd = "%s --auto %s" % (URPME_PATH, package)
-        rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+    if remove_c > 0:
 
-        if rc != 0:
-            module.fail_json(msg="failed to remove %s" % (package))
-    
-        remove_c += 1
+        # Remove all of them in one transaction, checking afterwards
+        # which ones failed
+        cmd = "%s --auto %s" % (URPME_PATH, " ".join(["'%s'" % package for package in to_remove]))
+        rc, stdout, stderr = module.run_command(cmd, check_rc=False)
 
-    if remove_c > 0:
+        installed = get_installed(module)
+        failed = [package for package in to_remove if query_package(module, package, installed)]
+        if rc != 0 or failed:
+            module.fail_json(msg="failed to remove %s" % (" ".join(failed or to_remove)), stderr=stderr)
 
         module.exit_json(changed=True, msg="removed %s package(s)" % remove_c)
 
@@ -131,9 +146,10 @@ def remove_packages(module, packages):
 
 def install_packages(module, pkgspec, force=True, no_recommends=True):
 
+    installed = get_installed(module)
     packages = ""
     for package in pkgspec:
-        if not query_package_provides(module, package):
+        if not query_package(module, package, installed):
             packages += "'%s' " % package
 
     if len(packages) != 0:
@@ -151,13 +167,11 @@ def install_packages(module, pkgspec, force=True, no_recommends=True):
 
         rc, out, err = module.run_command(cmd)
 
-        installed = True
-        for packages in pkgspec:
-            if not query_package_provides(module, package):
-                installed = False
+        installed = get_installed(module)
+        failed = [package for package in pkgspec if not query_package(module, package, installed)]
 
         # urpmi always have 0 for exit code if --force is used
-        if rc or not installed:
+        if rc or failed:
             module.fail_json(msg="'urpmi %s' failed: %s" % (packages, err))
         else:
             module.exit_json(changed=True, msg="%s present(s)" % packages)
@@ -186,7 +200,10 @@ def main():
     if p['update_cache']:
         update_package_db(module)
 
-    packages = p['package'].split(',')
+    packages = []
+    for package in p['package'].split(','):
+        if package not in packages:
+            packages.append(package)
 
     if p['state'] in [ 'installed', 'present' ]:
         install_packages(module, packages, force_yes, no_recommends_yes)
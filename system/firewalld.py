@@ -86,6 +86,16 @@ options:
     required: false
     default: null
     version_added: "2.1"
+  items:
+    description:
+      - 'List of changes to apply at once instead of a single service, port, rich_rule, source, interface or masquerade.
+        Each item is a dict with exactly one of these keys and optionally its own C(zone) and C(state), which default to
+        the I(zone) and I(state) options. I(permanent), I(immediate) and I(timeout) apply to all items.'
+      - 'The permanent settings of each zone are read once, changed in memory and written back once, and the runtime
+        configuration of each zone is queried once.'
+    required: false
+    default: null
+    version_added: "2.3"
 notes:
   - Not tested on any Debian based system.
   - Requires the python2 bindings of firewalld, which may not be installed by default if the distribution switched to python 3 
@@ -102,6 +112,18 @@ EXAMPLES = '''
 - firewalld: source='192.0.2.0/24' zone=internal state=enabled
 - firewalld: zone=trusted interface=eth2 permanent=true state=enabled
 - firewalld: masquerade=yes state=enabled permanent=true zone=dmz
+- firewalld:
+    permanent: true
+    immediate: true
+    state: enabled
+    items:
+      - service: https
+      - port: 8081/tcp
+      - port: 161-162/udp
+        zone: dmz
+      - rich_rule: 'rule service name="ftp" audit limit value="1/m" accept'
+      - service: telnet
+        state: disabled
 '''
 
 import os
@@ -326,6 +348,215 @@ def set_rich_rule_disabled_permanent(zone, rule):
     fw_zone.update(fw_settings)
 
 
+####################
+# batch handling
+#
+BATCH_KINDS = ['service', 'port', 'rich_rule', 'source', 'interface', 'masquerade']
+
+class PermanentZones(object):
+    """Permanent zone settings, read once per zone and written back once"""
+
+    def __init__(self):
+        self.zones = {}
+        self.changed = []
+
+    def settings(self, zone):
+        if zone not in self.zones:
+            fw_zone = fw.config().getZoneByName(zone)
+            self.zones[zone] = (fw_zone, fw_zone.getSettings())
+        return self.zones[zone][1]
+
+    def is_enabled(self, zone, kind, value):
+        fw_settings = self.settings(zone)
+        if kind == 'service':
+            return value in fw_settings.getServices()
+        elif kind == 'port':
+            return value in [tuple(port) for port in fw_settings.getPorts()]
+        elif kind == 'rich_rule':
+            return value in fw_settings.getRichRules()
+        elif kind == 'source':
+            return value in fw_settings.getSources()
+        elif kind == 'interface':
+            return value in fw_settings.getInterfaces()
+        elif kind == 'masquerade':
+            return fw_settings.getMasquerade() == True
+
+    def set_enabled(self, zone, kind, value, enabled):
+        fw_settings = self.settings(zone)
+        if kind == 'service':
+            if enabled:
+                fw_settings.addService(value)
+            else:
+                fw_settings.removeService(value)
+        elif kind == 'port':
+            if enabled:
+                fw_settings.addPort(*value)
+            else:
+                fw_settings.removePort(*value)
+        elif kind == 'rich_rule':
+            if enabled:
+                fw_settings.addRichRule(value)
+            else:
+                fw_settings.removeRichRule(value)
+        elif kind == 'source':
+            if enabled:
+                fw_settings.addSource(value)
+            else:
+                fw_settings.removeSource(value)
+        elif kind == 'interface':
+            if enabled:
+                # an interface can only be bound to one zone
+                old_zone_name = fw.config().getZoneOfInterface(value)
+                for other in set([old_zone_name] + list(self.zones.keys())):
+                    if other and other != zone and self.is_enabled(other, kind, value):
+                        self.settings(other).removeInterface(value)
+                        self.mark_changed(other)
+                fw_settings.addInterface(value)
+            else:
+                fw_settings.removeInterface(value)
+        elif kind == 'masquerade':
+            fw_settings.setMasquerade(enabled)
+        self.mark_changed(zone)
+
+    def mark_changed(self, zone):
+        if zone not in self.changed:
+            self.changed.append(zone)
+
+    def update(self):
+        for zone in self.changed:
+            fw_zone, fw_settings = self.zones[zone]
+            fw_zone.update(fw_settings)
+
+class RuntimeZones(object):
+    """Runtime zone configuration, queried once per zone and kind"""
+
+    def __init__(self):
+        self.state = {}
+
+    def current(self, zone, kind):
+        if (zone, kind) not in self.state:
+            if kind == 'service':
+                current = fw.getServices(zone)
+            elif kind == 'port':
+                current = [tuple(port) for port in fw.getPorts(zone)]
+            elif kind == 'rich_rule':
+                current = fw.getRichRules(zone)
+            elif kind == 'interface':
+                current = fw.getInterfaces(zone)
+            elif kind == 'masquerade':
+                current = []
+                if get_masquerade_enabled(zone):
+                    current.append(True)
+            self.state[(zone, kind)] = list(current)
+        return self.state[(zone, kind)]
+
+    def is_enabled(self, zone, kind, value):
+        return value in self.current(zone, kind)
+
+    def set_enabled(self, zone, kind, value, enabled, timeout):
+        if kind == 'service':
+            if enabled:
+                set_service_enabled(zone, value, timeout)
+            else:
+                set_service_disabled(zone, value)
+        elif kind == 'port':
+            if enabled:
+                set_port_enabled(zone, value[0], value[1], timeout)
+            else:
+                set_port_disabled(zone, value[0], value[1])
+        elif kind == 'rich_rule':
+            if enabled:
+                set_rich_rule_enabled(zone, value, timeout)
+            else:
+                set_rich_rule_disabled(zone, value)
+        elif kind == 'interface':
+            if enabled:
+                change_zone_of_interface(zone, value)
+                for (other, other_kind), current in self.state.items():
+                    if other_kind == kind and value in current:
+                        current.remove(value)
+            else:
+                remove_interface(zone, value)
+        elif kind == 'masquerade':
+            if enabled:
+                set_masquerade_enabled(zone)
+            else:
+                set_masquerade_disabled(zone)
+
+        current = self.current(zone, kind)
+        if enabled:
+            current.append(value)
+        else:
+            current.remove(value)
+
+def parse_item(module, item, default_zone, default_state):
+    if not isinstance(item, dict):
+        module.fail_json(msg='items must be dicts, got %s' % item)
+    kinds = [kind for kind in BATCH_KINDS if item.get(kind) is not None]
+    unknown = [key for key in item if key not in BATCH_KINDS + ['zone', 'state']]
+    if len(kinds) != 1 or unknown:
+        module.fail_json(msg='each item needs exactly one of %s and optionally zone and state, got %s'
+                         % (', '.join(BATCH_KINDS), item))
+
+    kind = kinds[0]
+    value = item[kind]
+    if kind == 'port':
+        if '/' not in value:
+            module.fail_json(msg='improper port format (missing protocol?): %s' % value)
+        value = tuple(value.split('/', 1))
+    elif kind == 'rich_rule':
+        # Convert the rule string to standard format
+        # before checking whether it is present
+        value = str(Rich_Rule(rule_str=value))
+    elif kind == 'masquerade':
+        value = True
+
+    state = item.get('state') or default_state
+    if state not in ['enabled', 'disabled']:
+        module.fail_json(msg='state of %s must be enabled or disabled' % item)
+
+    return item.get('zone') or default_zone, kind, value, state
+
+def describe_item(zone, kind, value, state):
+    if kind == 'port':
+        value = '%s/%s' % value
+    elif kind == 'masquerade':
+        return 'Changed masquerade of zone %s to %s' % (zone, state)
+    return 'Changed %s %s in zone %s to %s' % (kind, value, zone, state)
+
+def apply_items(module, items, default_zone, default_state, permanent, immediate, timeout):
+    """Apply all items, writing each changed permanent zone once"""
+    items = [parse_item(module, item, default_zone, default_state) for item in items]
+    msgs = []
+
+    if permanent or [item for item in items if item[1] == 'source']:
+        zones = PermanentZones()
+        for zone, kind, value, state in items:
+            # sources are always permanent, like with the source option
+            if not (permanent or kind == 'source'):
+                continue
+            enabled = state == 'enabled'
+            if zones.is_enabled(zone, kind, value) != enabled:
+                if not module.check_mode:
+                    zones.set_enabled(zone, kind, value, enabled)
+                msgs.append('Permanent: %s' % describe_item(zone, kind, value, state))
+        if not module.check_mode:
+            zones.update()
+
+    if immediate or not permanent:
+        runtime = RuntimeZones()
+        for zone, kind, value, state in items:
+            if kind == 'source':
+                continue
+            enabled = state == 'enabled'
+            if runtime.is_enabled(zone, kind, value) != enabled:
+                if not module.check_mode:
+                    runtime.set_enabled(zone, kind, value, enabled, timeout)
+                msgs.append('Non-permanent: %s' % describe_item(zone, kind, value, state))
+
+    return len(msgs) > 0, msgs
+
+
 def main():
 
     module = AnsibleModule(
@@ -341,8 +572,10 @@ def main():
             timeout=dict(type='int',required=False,default=0),
             interface=dict(required=False,default=None),
             masquerade=dict(required=False,default=None),
+            items=dict(type='list',required=False,default=None),
         ),
-        supports_check_mode=True
+        supports_check_mode=True,
+        mutually_exclusive=[['items', k] for k in ('service', 'port', 'rich_rule', 'source', 'interface', 'masquerade')],
     )
     if module.params['source'] == None and module.params['permanent'] == None:
         module.fail_json(msg='permanent is a required parameter')
@@ -390,6 +623,11 @@ def main():
     interface = module.params['interface']
     masquerade = module.params['masquerade']
 
+    if module.params['items'] != None:
+        changed, msgs = apply_items(module, module.params['items'], zone, desired_state,
+                                    permanent, immediate, timeout)
+        module.exit_json(changed=changed, msg=', '.join(msgs))
+
     modification_count = 0
     if service != None:
         modification_count += 1
@@ -45,14 +45,37 @@ options:
         default: None
         description:
             - "character used to split the database values into lists/arrays such as ':' or '\t', otherwise  it will try to pick one depending on the database"
+    keys:
+        required: False
+        default: None
+        version_added: "2.3"
+        description:
+            - list of keys to look up at once instead of a single I(key).
     fail_key:
         required: False
         default: True
         description:
             - If a supplied key is missing this will make the task fail if True
+    fields:
+        required: False
+        default: None
+        version_added: "2.3"
+        description:
+            - list of the fields to return for each entry, instead of all of them. Fields are
+              given by their position after the key, starting at 0, or by name for the passwd
+              (password, uid, gid, gecos, home, shell), group (password, gid, members),
+              shadow and gshadow databases.
+    limit:
+        required: False
+        default: None
+        version_added: "2.3"
+        description:
+            - maximum number of entries to return, mostly useful when listing a whole database.
 
 notes:
    - "Not all databases support enumeration, check system documentation for details"
+   - "The passwd and group databases are looked up in-process through the system's name
+     service switch, other databases with a single getent call for all keys."
 requirements: [ ]
 author: "Brian Coca (@bcoca)"
 '''
@@ -78,19 +101,122 @@ EXAMPLES = '''
 - getent: database=shadow key=www-data split=:
 - debug: var=getent_shadow
 
+# get the home directory and shell of several users at once
+- getent:
+    database: passwd
+    keys: [ root, www-data, nobody ]
+    fields: [ home, shell ]
+- debug: var=getent_passwd
+
+# get the first 100 groups only
+- getent: database=group limit=100
+
 '''
 
+import grp
+import pwd
+
 from ansible.module_utils.basic import *
 from ansible.module_utils.pycompat24 import get_exception
 
+FIELDS = {
+    'passwd': [ 'password', 'uid', 'gid', 'gecos', 'home', 'shell' ],
+    'group': [ 'password', 'gid', 'members' ],
+    'shadow': [ 'password', 'lastchg', 'min', 'max', 'warn', 'inactive', 'expire', 'flag' ],
+    'gshadow': [ 'password', 'admins', 'members' ],
+}
+
+def nss_record(database, entry):
+    """ format a pwd or grp entry the way getent prints it """
+    if database == 'passwd':
+        return [ entry.pw_name, entry.pw_passwd, str(entry.pw_uid), str(entry.pw_gid),
+                 entry.pw_gecos, entry.pw_dir, entry.pw_shell ]
+    return [ entry.gr_name, entry.gr_passwd, str(entry.gr_gid), ','.join(entry.gr_mem) ]
+
+def nss_lookup(database, keys):
+    """ look up passwd or group entries in-process, returns the records and the missing keys """
+    if database == 'passwd':
+        by_name, by_id, enumerate_all = pwd.getpwnam, pwd.getpwuid, pwd.getpwall
+    else:
+        by_name, by_id, enumerate_all = grp.getgrnam, grp.getgrgid, grp.getgrall
+
+    if not keys:
+        return [ nss_record(database, entry) for entry in enumerate_all() ], []
+
+    records = []
+    missing = []
+    for key in keys:
+        try:
+            # like getent, numeric keys are ids
+            if key.isdigit():
+                records.append(nss_record(database, by_id(int(key))))
+            else:
+                records.append(nss_record(database, by_name(key)))
+        except KeyError:
+            missing.append(key)
+    return records, missing
+
+def getent_lookup(module, getent_bin, database, keys, split):
+    """ look up all keys with a single getent call, returns the records and the missing keys """
+    try:
+        rc, out, err = module.run_command([ getent_bin, database ] + keys)
+    except Exception:
+        e = get_exception()
+        module.fail_json(msg=str(e))
+
+    if rc == 1:
+        module.fail_json(msg="Missing arguments, or database unknown.")
+    elif rc == 3:
+        module.fail_json(msg="Enumeration not supported on this database.")
+    elif rc not in [ 0, 2 ]:
+        module.fail_json(msg="Unexpected failure!")
+
+    records = [ line.split(split) for line in out.splitlines() ]
+    missing = []
+    if rc == 2:
+        # getent does not tell which keys were not found, take those not
+        # showing up in any of the records
+        found = {}
+        for record in records:
+            for value in record:
+                for word in value.split():
+                    found[word] = True
+        missing = [ key for key in keys if key not in found ]
+        if not missing:
+            missing = keys
+    return records, missing
+
+def project(module, database, values, fields):
+    """ pick the requested fields of a record """
+    if fields is None:
+        return values
+    projected = []
+    for field in fields:
+        field = str(field)
+        if field.isdigit():
+            index = int(field)
+        elif field in FIELDS.get(database, []):
+            index = FIELDS[database].index(field)
+        else:
+            module.fail_json(msg="Unknown field %s for database %s" % (field, database))
+        if index < len(values):
+            projected.append(values[index])
+        else:
+            projected.append(None)
+    return projected
+
 def main():
     module = AnsibleModule(
         argument_spec = dict(
             database = dict(required=True),
             key      = dict(required=False, default=None),
+            keys     = dict(required=False, default=None, type='list'),
             split    = dict(required=False, default=None),
             fail_key = dict(required=False, type='bool', default=True),
+            fields   = dict(required=False, default=None, type='list'),
+            limit    = dict(required=False, default=None, type='int'),
         ),
+        mutually_exclusive = [ [ 'key', 'keys' ] ],
         supports_check_mode = True,
     )
 
@@ -98,48 +224,44 @@ def main():
 
     database = module.params['database']
     key      = module.params.get('key')
+    keys     = module.params.get('keys')
     split    = module.params.get('split')
     fail_key = module.params.get('fail_key')
-
-    getent_bin = module.get_bin_path('getent', True)
+    fields   = module.params.get('fields')
+    limit    = module.params.get('limit')
 
     if key is not None:
-        cmd = [ getent_bin, database, key ]
-    else:
-        cmd = [ getent_bin, database ]
+        keys = [ key ]
+    elif keys is None:
+        keys = []
+    keys = [ str(k) for k in keys ]
 
     if split is None and database in colon:
         split = ':'
 
-    try:
-        rc, out, err = module.run_command(cmd)
-    except Exception:
-        e = get_exception()
-        module.fail_json(msg=str(e))
+    if database in [ 'passwd', 'group' ] and split == ':':
+        records, missing = nss_lookup(database, keys)
+    else:
+        getent_bin = module.get_bin_path('getent', True)
+        records, missing = getent_lookup(module, getent_bin, database, keys, split)
 
-    msg = "Unexpected failure!"
     dbtree = 'getent_%s' % database
     results = { dbtree: {} }
 
-    if rc == 0:
-        for line in out.splitlines():
-            record = line.split(split)
-            results[dbtree][record[0]] = record[1:]
-
-        module.exit_json(ansible_facts=results)
+    for record in records:
+        if limit is not None and len(results[dbtree]) >= limit:
+            break
+        results[dbtree][record[0]] = project(module, database, record[1:], fields)
 
-    elif rc == 1:
-        msg = "Missing arguments, or database unknown."
-    elif rc == 2:
+    if missing:
         msg = "One or more supplied key could not be found in the database."
-        if not fail_key:
-            results[dbtree][key] = None
-            module.exit_json(ansible_facts=results, msg=msg)
-    elif rc == 3:
-        msg = "Enumeration not supported on this database."
-
-    module.fail_json(msg=msg)
+        if fail_key:
+            module.fail_json(msg=msg, missing=missing)
+        for k in missing:
+            results[dbtree][k] = None
+        module.exit_json(ansible_facts=results, msg=msg)
 
+    module.exit_json(ansible_facts=results)
 
 main()
 
@@ -18,11 +18,26 @@
 # You should have received a copy of the GNU General Public License
 # along with this software.  If not, see <http://www.gnu.org/licenses/>.
 
+import binascii
+import pwd
+import re
+import socket
+
 BINS = dict(
     ipv4='iptables',
     ipv6='ip6tables',
 )
 
+SAVE_BINS = dict(
+    ipv4='iptables-save',
+    ipv6='ip6tables-save',
+)
+
+RESTORE_BINS = dict(
+    ipv4='iptables-restore',
+    ipv6='ip6tables-restore',
+)
+
 DOCUMENTATION = '''
 ---
 module: iptables
@@ -37,9 +52,9 @@ description:
     that are present in memory. This is the same as the behaviour of the
     "iptables" and "ip6tables" command which this module uses internally.
 notes:
-  - This module just deals with individual rules. If you need advanced
-    chaining of rules the recommended way is to template the iptables restore
-    file.
+  - This module just deals with individual rules, or a list of them with
+    C(rules). If you need advanced chaining of rules the recommended way is
+    to template the iptables restore file.
 options:
   table:
     description:
@@ -291,6 +306,22 @@ options:
         ACCEPT, DROP, QUEUE, RETURN. Only built in chains can have policies.
         This parameter requires the chain parameter. Ignores all other
         parameters."
+  rules:
+    version_added: "2.3"
+    description:
+      - "A list of rules to manage in a single transaction. Each rule is
+        a dictionary of the rule options of this module (e.g. C(chain),
+        C(protocol), C(jump)) and may also set C(state) and C(action).
+        Options a rule does not set default to the module options, except
+        for C(table) and C(ip_version) which apply to all rules."
+      - "The table is dumped once with iptables-save, the missing and
+        unwanted rules are computed in memory and the changes are applied
+        with a single iptables-restore --noflush call. Rules which cannot
+        be compared against the dump reliably (e.g. using hostnames or
+        service names) are checked with iptables -C instead."
+      - "Mutually exclusive with C(flush) and C(policy)."
+    required: false
+    default: null
 '''
 
 EXAMPLES = '''
@@ -311,8 +342,118 @@ EXAMPLES = '''
 
 # Tag all outbound tcp packets with DSCP DiffServ class CS1
 - iptables: chain=OUTPUT jump=DSCP table=mangle set_dscp_mark_class=CS1 protocol=tcp
+
+# Manage a set of rules at once, removing an obsolete one
+- iptables:
+    chain: INPUT
+    protocol: tcp
+    jump: ACCEPT
+    rules:
+      - destination_port: 22
+        comment: ssh
+      - destination_port: 443
+        ctstate: NEW
+      - destination_port: 8080
+        state: absent
+  become: yes
+'''
+
+RETURN = '''
+added:
+    description: rules added by C(rules), as chain followed by the rule
+    returned: success, if rules is set
+    type: list
+    sample: [ "INPUT -p tcp -j ACCEPT --destination-port 22 -m comment --comment ssh" ]
+removed:
+    description: rules removed by C(rules), as chain followed by the rule
+    returned: success, if rules is set
+    type: list
+    sample: [ "INPUT -p tcp -j ACCEPT --destination-port 8080" ]
 '''
 
+# options a single entry of the rules parameter may set
+RULE_PARAMS = [
+    'state', 'action', 'chain', 'protocol', 'source', 'to_source',
+    'destination', 'to_destination', 'match', 'jump', 'goto', 'in_interface',
+    'out_interface', 'fragment', 'set_counters', 'source_port',
+    'destination_port', 'to_ports', 'set_dscp_mark', 'set_dscp_mark_class',
+    'comment', 'ctstate', 'limit', 'limit_burst', 'uid_owner', 'reject_with',
+    'icmp_type',
+]
+
+OPTION_ALIASES = {
+    '--protocol': '-p',
+    '--source': '-s',
+    '--src': '-s',
+    '--destination': '-d',
+    '--dst': '-d',
+    '--in-interface': '-i',
+    '--out-interface': '-o',
+    '--fragment': '-f',
+    '--match': '-m',
+    '--jump': '-j',
+    '--goto': '-g',
+    '--set-counters': '-c',
+    '--source-port': '--sport',
+    '--destination-port': '--dport',
+    '--source-ports': '--sports',
+    '--destination-ports': '--dports',
+}
+
+PORT_MATCHES = ['tcp', 'udp', 'udplite', 'sctp', 'dccp']
+
+# match modules owning the match options construct_rule() emits, options of
+# the protocol matches load the match implicitly
+MATCH_OPTIONS = {
+    '--sport': PORT_MATCHES,
+    '--dport': PORT_MATCHES,
+    '--sports': ['multiport'],
+    '--dports': ['multiport'],
+    '--ports': ['multiport'],
+    '--icmp-type': ['icmp'],
+    '--comment': ['comment'],
+    '--state': ['state'],
+    '--ctstate': ['conntrack'],
+    '--limit': ['limit'],
+    '--limit-burst': ['limit'],
+    '--uid-owner': ['owner'],
+}
+
+TARGET_OPTIONS = [
+    '--to-destination', '--to-source', '--to-ports', '--set-dscp',
+    '--set-dscp-class', '--reject-with',
+]
+
+# protocols iptables-save prints as given
+PROTOCOLS = [
+    'tcp', 'udp', 'udplite', 'icmp', 'esp', 'ah', 'sctp', 'dccp', 'mh',
+    'ipv6-icmp',
+]
+
+LIMIT_UNITS = dict(s=1, m=60, h=3600, d=86400)
+
+SAVE_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|(\S+)')
+SAVE_ESCAPE = re.compile(r'\\(.)')
+
+REJECT_ALIASES = {
+    'net-unreach': 'icmp-net-unreachable',
+    'host-unreach': 'icmp-host-unreachable',
+    'proto-unreach': 'icmp-proto-unreachable',
+    'port-unreach': 'icmp-port-unreachable',
+    'net-prohib': 'icmp-net-prohibited',
+    'host-prohib': 'icmp-host-prohibited',
+    'admin-prohib': 'icmp-admin-prohibited',
+    'tcp-rst': 'tcp-reset',
+    'no-route': 'icmp6-no-route',
+    'addr-unreach': 'icmp6-addr-unreachable',
+    'adm-prohibited': 'icmp6-adm-prohibited',
+}
+
+REJECT_DEFAULTS = dict(
+    ipv4='icmp-port-unreachable',
+    ipv6='icmp6-port-unreachable',
+)
+
 
 def append_param(rule, param, flag, is_list):
     if is_list:
@@ -376,6 +517,449 @@ def construct_rule(params):
     return rule
 
 
+def normalize_address(value, ip_version):
+    if ',' in value:
+        # iptables expands address lists into several rules
+        return None
+    if '/' in value:
+        address, mask = value.split('/', 1)
+    else:
+        address, mask = value, None
+    if ip_version == 'ipv6':
+        family = socket.AF_INET6
+    else:
+        family = socket.AF_INET
+    try:
+        packed = socket.inet_pton(family, address)
+    except (socket.error, ValueError):
+        # hostnames are resolved by iptables
+        return None
+    bits = len(packed) * 8
+    if mask is None:
+        prefix = bits
+    elif mask.isdigit():
+        prefix = int(mask)
+    else:
+        try:
+            netmask = int(binascii.hexlify(socket.inet_pton(family, mask)), 16)
+        except (socket.error, ValueError):
+            return None
+        prefix = bin_count(netmask)
+        if netmask != ((1 << bits) - 1) ^ ((1 << (bits - prefix)) - 1):
+            # non contiguous masks are printed as given
+            return None
+    if prefix > bits:
+        return None
+    # iptables stores the network address only
+    network = int(binascii.hexlify(packed), 16) >> (bits - prefix) << (bits - prefix)
+    packed = binascii.unhexlify('%0*x' % (bits // 4, network))
+    return '%s/%d' % (socket.inet_ntop(family, packed), prefix)
+
+
+def bin_count(value):
+    count = 0
+    while value:
+        count += value & 1
+        value >>= 1
+    return count
+
+
+def normalize_protocol(value, ip_version):
+    value = value.lower()
+    if value in ['all', '0']:
+        return ''
+    if ip_version == 'ipv6' and value in ['icmpv6', 'icmp6']:
+        value = 'ipv6-icmp'
+    if value not in PROTOCOLS:
+        return None
+    return value
+
+
+def normalize_ports(value, ip_version):
+    ports = value.split(':')
+    if len(ports) == 1:
+        ports = [value, value]
+    if len(ports) != 2:
+        return None
+    first = ports[0] or '0'
+    last = ports[1] or '65535'
+    if not (first.isdigit() and last.isdigit()):
+        # service names are resolved by iptables
+        return None
+    first, last = int(first), int(last)
+    if first > last:
+        first, last = last, first
+    if first == last:
+        return str(first)
+    return '%d:%d' % (first, last)
+
+
+def normalize_port_list(value, ip_version):
+    ports = []
+    for port in value.split(','):
+        port = normalize_ports(port, ip_version)
+        if port is None:
+            return None
+        ports.append(port)
+    return ','.join(ports)
+
+
+def normalize_states(value, ip_version):
+    states = [state.upper() for state in value.split(',')]
+    states.sort()
+    return ','.join(states)
+
+
+def normalize_limit(value, ip_version):
+    if '/' in value:
+        count, unit = value.split('/', 1)
+    else:
+        count, unit = value, 'second'
+    if not count.isdigit() or not unit or unit[0] not in LIMIT_UNITS:
+        return None
+    # iptables-save picks its own unit, compare rates per day
+    return str(int(count) * 86400 // LIMIT_UNITS[unit[0]])
+
+
+def normalize_uid(value, ip_version):
+    if value.replace('-', '').isdigit():
+        return value
+    try:
+        return str(pwd.getpwnam(value).pw_uid)
+    except KeyError:
+        return None
+
+
+def normalize_dscp(value, ip_version):
+    try:
+        if value.lower().startswith('0x'):
+            return str(int(value, 16))
+        return str(int(value))
+    except ValueError:
+        return None
+
+
+def normalize_dscp_class(value, ip_version):
+    name = value.upper()
+    if name == 'EF':
+        return '46'
+    if name.startswith('CS') and name[2:].isdigit():
+        return str(int(name[2:]) * 8)
+    if name.startswith('AF') and len(name) == 4 and name[2:].isdigit():
+        return str(int(name[2]) * 8 + int(name[3]) * 2)
+    return None
+
+
+def normalize_icmp_type(value, ip_version):
+    if ip_version == 'ipv6' or not value.isdigit():
+        # type names are printed as numbers
+        return None
+    return value
+
+
+def normalize_reject(value, ip_version):
+    return REJECT_ALIASES.get(value, value)
+
+
+NORMALIZERS = {
+    '-s': normalize_address,
+    '-d': normalize_address,
+    '-p': normalize_protocol,
+    '--sport': normalize_ports,
+    '--dport': normalize_ports,
+    '--sports': normalize_port_list,
+    '--dports': normalize_port_list,
+    '--ports': normalize_port_list,
+    '--state': normalize_states,
+    '--ctstate': normalize_states,
+    '--limit': normalize_limit,
+    '--uid-owner': normalize_uid,
+    '--set-dscp': normalize_dscp,
+    '--set-dscp-class': normalize_dscp_class,
+    '--icmp-type': normalize_icmp_type,
+    '--reject-with': normalize_reject,
+}
+
+
+def is_option(token):
+    return token.startswith('-') and len(token) > 1 and not token[1:].isdigit()
+
+
+# Parse the arguments of a rule, as produced by construct_rule() or found in
+# iptables-save output, into a hashable key. Options are assigned to the match
+# or target they belong to and their values are normalized the way
+# iptables-save prints them. Returns None if the rule cannot be normalized
+# reliably.
+def rule_key(tokens, ip_version):
+    base = {}
+    matches = []
+    target = None
+    module = None
+    protocol = None
+    negate = False
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        i += 1
+        if token == '!':
+            negate = True
+            continue
+        if not is_option(token):
+            return None
+        option = OPTION_ALIASES.get(token, token)
+        values = []
+        while i < len(tokens) and tokens[i] != '!' and not is_option(tokens[i]):
+            values.append(tokens[i])
+            i += 1
+        value = ' '.join(values)
+        if value.startswith('!'):
+            # old style inversion
+            return None
+
+        if option == '-c':
+            # counters are not part of the rule
+            negate = False
+            continue
+        if option == '-f':
+            return None
+        if option == '-m':
+            module = (value, {})
+            matches.append(module)
+            negate = False
+            continue
+        if option in ['-j', '-g']:
+            if target is not None:
+                return None
+            module = target = (option, value, {})
+            negate = False
+            continue
+
+        if option in ['--sport', '--dport'] and 'multiport' in [m[0] for m in matches]:
+            if [m for m in matches if m[0] in PORT_MATCHES]:
+                # which of the matches gets the option depends on the
+                # iptables version
+                return None
+            # iptables hands the port options to an explicit multiport
+            # match, iptables-save prints them as port lists
+            option = option + 's'
+
+        if option in ['-p', '-s', '-d', '-i', '-o']:
+            options = base
+        elif option in MATCH_OPTIONS:
+            options = None
+            for match in matches:
+                if match[0] in MATCH_OPTIONS[option]:
+                    options = match[1]
+            if options is None:
+                if protocol not in MATCH_OPTIONS[option]:
+                    return None
+                matches.append((protocol, {}))
+                options = matches[-1][1]
+        elif option in TARGET_OPTIONS:
+            if target is None:
+                return None
+            options = target[2]
+        elif module is not None:
+            options = module[-1]
+        else:
+            return None
+
+        if option in NORMALIZERS:
+            value = NORMALIZERS[option](value, ip_version)
+            if value is None:
+                return None
+        if option == '-p':
+            protocol = value
+            if not value:
+                negate = False
+                continue
+        if negate:
+            option = '!' + option
+            negate = False
+        if option in options:
+            return None
+        options[option] = value
+
+    if target is not None:
+        options = target[2]
+        if target[1] == 'REJECT' and '--reject-with' not in options:
+            options['--reject-with'] = REJECT_DEFAULTS[ip_version]
+        if '--set-dscp-class' in options:
+            options['--set-dscp'] = options.pop('--set-dscp-class')
+        target = (target[0], target[1], sort_items(options))
+
+    key_matches = []
+    for name, options in matches:
+        if name == 'limit' and options.get('--limit-burst') == '5':
+            del options['--limit-burst']
+        if name == 'state':
+            # newer iptables save state matches as conntrack matches
+            name = 'conntrack'
+            for option in list(options.keys()):
+                options[option.replace('--state', '--ctstate')] = options.pop(option)
+        key_matches.append((name, sort_items(options)))
+
+    return (sort_items(base), tuple(key_matches), target)
+
+
+def sort_items(options):
+    items = list(options.items())
+    items.sort()
+    return tuple(items)
+
+
+# Split the rules of an iptables-save dump by chain, in chain order. The rules
+# are kept as given and only split and normalized when their chain is queried.
+def parse_save(output):
+    chains = {}
+    for line in output.splitlines():
+        if line.startswith(':'):
+            chains.setdefault(line[1:].split()[0], [])
+        elif line.startswith('-A '):
+            fields = line.split(None, 2)
+            if len(fields) == 3:
+                chains.setdefault(fields[1], []).append(fields[2])
+    return chains
+
+
+def split_save_line(line):
+    # iptables-save double quotes arguments with blanks, shlex is too slow for
+    # tables with thousands of rules
+    if '"' not in line:
+        return line.split()
+    tokens = []
+    for match in SAVE_TOKEN.finditer(line):
+        if match.group(2) is None:
+            tokens.append(SAVE_ESCAPE.sub(r'\1', match.group(1)))
+        else:
+            tokens.append(match.group(2))
+    return tokens
+
+
+class RuleIndex(object):
+    # Snapshot of the rules of a table, dumped with iptables-save at most once
+    # per module run. Presence queries of the rules mode are answered from the
+    # snapshot instead of forking iptables -C for every rule.
+
+    def __init__(self, module, save_path):
+        self.module = module
+        self.save_path = save_path
+        self.ip_version = module.params['ip_version']
+        self.table = module.params['table']
+        self.chains = None
+        self.positions = {}
+
+    def load(self):
+        if self.chains is None:
+            rc, out, err = self.module.run_command([self.save_path, '-t', self.table], check_rc=True)
+            self.chains = parse_save(out)
+        return self.chains
+
+    def chain_positions(self, chain):
+        # map the keys of the rules in the chain to their positions, rules
+        # which cannot be normalized are left out
+        if chain not in self.positions:
+            positions = {}
+            for position, line in enumerate(self.load().get(chain, [])):
+                key = rule_key(split_save_line(line), self.ip_version)
+                if key is not None:
+                    positions.setdefault(key, []).append(position + 1)
+            self.positions[chain] = positions
+        return self.positions[chain]
+
+    def has_chain(self, chain):
+        return chain in self.load()
+
+    def count(self, chain, key):
+        return len(self.chain_positions(chain).get(key, []))
+
+
+def get_rule_index(module, required=False):
+    save_path = module.get_bin_path(SAVE_BINS[module.params['ip_version']], required)
+    if save_path is None:
+        return None
+    return RuleIndex(module, save_path)
+
+
+def quote_argument(argument):
+    argument = str(argument)
+    if argument and not [c for c in argument if c.isspace() or c in '"\\\'']:
+        return argument
+    return '"%s"' % argument.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def rule_params(module, rule):
+    params = dict(module.params)
+    for name, value in rule.items():
+        if name not in RULE_PARAMS:
+            module.fail_json(msg="Unsupported rule option %s, must be one of %s" % (name, ', '.join(RULE_PARAMS)))
+        if name in ['match', 'ctstate']:
+            if not isinstance(value, list):
+                value = str(value).split(',')
+        elif value is not None:
+            value = str(value)
+        params[name] = value
+    if params['chain'] is None:
+        module.fail_json(msg="Every rule needs a chain, got %s" % rule)
+    if params['state'] not in ['present', 'absent']:
+        module.fail_json(msg="Rule state must be present or absent, got %s" % params['state'])
+    if params['action'] not in ['append', 'insert']:
+        module.fail_json(msg="Rule action must be append or insert, got %s" % params['action'])
+    return params
+
+
+# Bring a list of rules to their desired state with one iptables-save and one
+# iptables-restore call. Returns the added and removed rules.
+def apply_rules(iptables_path, module, rules, index):
+    ip_version = module.params['ip_version']
+    table = module.params['table']
+    restore_path = module.get_bin_path(RESTORE_BINS[ip_version], True)
+
+    # rules added (1) or removed (-1) by this call, a rule may be present
+    # more than once
+    changes = {}
+    lines = []
+    added = []
+    removed = []
+    positions = {}
+    for rule in rules:
+        if not isinstance(rule, dict):
+            module.fail_json(msg="Every rule must be a dictionary, got %s" % rule)
+        params = rule_params(module, rule)
+        chain = params['chain']
+        if not index.has_chain(chain):
+            module.fail_json(msg="Chain %s does not exist in table %s" % (chain, table))
+        args = construct_rule(params)
+        key = rule_key(args, ip_version)
+        if key is None:
+            rule_is_present = check_present(iptables_path, module, params)
+        else:
+            rule_is_present = index.count(chain, key) + changes.get((chain, key), 0) > 0
+
+        if params['state'] == 'present' and not rule_is_present:
+            if params['action'] == 'insert':
+                # keep the order of the inserted rules
+                positions[chain] = positions.get(chain, 0) + 1
+                command = ['-I', chain, str(positions[chain])]
+            else:
+                command = ['-A', chain]
+            lines.append(' '.join([quote_argument(arg) for arg in command + args]))
+            added.append(' '.join([chain] + args))
+            if key is not None:
+                changes[(chain, key)] = changes.get((chain, key), 0) + 1
+        elif params['state'] == 'absent' and rule_is_present:
+            lines.append(' '.join([quote_argument(arg) for arg in ['-D', chain] + args]))
+            removed.append(' '.join([chain] + args))
+            if key is not None:
+                changes[(chain, key)] = changes.get((chain, key), 0) - 1
+
+    if lines and not module.check_mode:
+        data = '\n'.join(['*' + table] + lines + ['COMMIT'])
+        module.run_command([restore_path, '--noflush'], data=data, check_rc=True)
+
+    return added, removed
+
+
 def push_arguments(iptables_path, action, params, make_rule=True):
     cmd = [iptables_path]
     cmd.extend(['-t', params['table']])
@@ -385,7 +969,12 @@ def push_arguments(iptables_path, action, params, make_rule=True):
     return cmd
 
 
-def check_present(iptables_path, module, params):
+def check_present(iptables_path, module, params, index=None):
+    if index is not None and index.has_chain(params['chain']):
+        key = rule_key(construct_rule(params), params['ip_version'])
+        if key is not None:
+            return index.count(params['chain'], key) > 0
+    # fall back to iptables for rules the index cannot answer
     cmd = push_arguments(iptables_path, '-C', params)
     rc, _, __ = module.run_command(cmd, check_rc=False)
     return (rc == 0)
@@ -469,10 +1058,13 @@ def main():
                 default=None,
                 type='str',
                 choices=['ACCEPT', 'DROP', 'QUEUE', 'RETURN']),
+            rules=dict(required=False, default=None, type='list'),
         ),
         mutually_exclusive=(
             ['set_dscp_mark', 'set_dscp_mark_class'],
             ['flush', 'policy'],
+            ['flush', 'rules'],
+            ['policy', 'rules'],
         ),
     )
     args = dict(
@@ -489,6 +1081,18 @@ def main():
     ip_version = module.params['ip_version']
     iptables_path = module.get_bin_path(BINS[ip_version], True)
 
+    # Apply a list of rules in one transaction
+    if module.params['rules'] is not None:
+        index = get_rule_index(module, required=True)
+        added, removed = apply_rules(iptables_path, module, module.params['rules'], index)
+        module.exit_json(
+            changed=bool(added or removed),
+            ip_version=ip_version,
+            table=args['table'],
+            added=added,
+            removed=removed,
+        )
+
     # Check if chain option is required
     if args['flush'] is False and args['chain'] is None:
         module.fail_json(
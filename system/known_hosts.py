@@ -33,7 +33,8 @@ options:
     aliases: [ 'host' ]
     description:
       - The host to add or remove (must match a host specified in key)
-    required: true
+      - Required unless C(hosts) is given.
+    required: false
     default: null
   key:
     description:
@@ -51,6 +52,14 @@ options:
     choices: [ "present", "absent" ]
     required: no
     default: present
+  hosts:
+    description:
+      - A list of hosts to add or remove in one go, each a dictionary with a C(name), a C(key) and optionally a C(state), which defaults to the I(state) option.
+      - The file is read once and rewritten at most once for all hosts. Every entry is compared with the file as it was before the task.
+      - Mutually exclusive with I(name) and I(key).
+    required: false
+    default: null
+    version_added: "2.3"
 requirements: [ ]
 author: "Matthew Vernon (@mcv21)"
 '''
@@ -61,6 +70,17 @@ EXAMPLES = '''
   known_hosts: path='/etc/ssh/ssh_known_hosts'
                name='foo.com.invalid'
                key="{{ lookup('file', 'pubkeys/foo.com.invalid') }}"
+
+# Manage the keys of several hosts with a single rewrite of the file
+- known_hosts:
+    path: /etc/ssh/ssh_known_hosts
+    hosts:
+      - name: foo.com.invalid
+        key: "{{ lookup('file', 'pubkeys/foo.com.invalid') }}"
+      - name: bar.com.invalid
+        key: "{{ lookup('file', 'pubkeys/bar.com.invalid') }}"
+      - name: old.com.invalid
+        state: absent
 '''
 
 # Makes sure public host keys are present or absent in the given known_hosts
@@ -69,6 +89,7 @@ EXAMPLES = '''
 # Arguments
 # =========
 #    name = hostname whose key should be added (alias: host)
+#    hosts = list of name/key/state dicts managed in one rewrite
 #    key = line(s) to add to known_hosts file
 #    path = the known_hosts file to edit (default: ~/.ssh/known_hosts)
 #    state = absent|present (default: present)
@@ -78,9 +99,197 @@ import os.path
 import tempfile
 import errno
 import re
+import sys
+import base64
+import hmac
+import mmap
+try:
+    from hashlib import sha1
+except ImportError:
+    import sha as sha1
 from ansible.module_utils.pycompat24 import get_exception
 from ansible.module_utils.basic import *
 
+class KnownHosts(object):
+    '''Index of the entries of a known_hosts file by host.
+
+    The file is parsed once. Plain host names are looked up directly, wildcard
+    patterns are matched and hashed entries are checked by computing the
+    HMAC-SHA1 of the host with the salt of each entry, as ssh-keygen -F does.
+    Entries keep their @cert-authority or @revoked marker and are only found
+    when looking up that marker, so that removing a host leaves them alone
+    like ssh-keygen -R does.
+    '''
+
+    def __init__(self, data):
+        self.lines = data.splitlines(True)
+        self.plain = {}
+        self.patterns = []
+        self.hashed = []
+        self.found = {}
+        for number, line in enumerate(self.lines):
+            fields = line.split()
+            if not fields or fields[0][0] == '#':
+                continue
+            #The optional "marker" field, used for @cert-authority or @revoked
+            marker = None
+            if fields[0][0] == '@':
+                marker = fields[0]
+                fields = fields[1:]
+            if len(fields) < 3:
+                continue
+            hosts = fields[0]
+            if hosts.startswith('|1|'):
+                try:
+                    salt, digest = hosts[3:].split('|')
+                    salt = base64.b64decode(salt)
+                    digest = base64.b64decode(digest)
+                except (TypeError, ValueError):
+                    continue
+                # the copied hmac keeps the state of the salted key
+                self.hashed.append((hmac.new(salt, digestmod=sha1), digest, marker, number + 1))
+                continue
+            patterns = hosts.lower().split(',')
+            if [p for p in patterns if '*' in p or '?' in p or p.startswith('!')]:
+                self.patterns.append(([compile_host_pattern(p) for p in patterns], marker, number + 1))
+            else:
+                for pattern in patterns:
+                    self.plain.setdefault(pattern, []).append((marker, number + 1))
+
+    def lookup(self, host, marker=None):
+        '''Returns the line numbers of the entries with marker matching host, in order'''
+        if (host, marker) not in self.found:
+            numbers = [n for m, n in self.plain.get(host.lower(), []) if m == marker]
+            for patterns, m, number in self.patterns:
+                if m == marker and match_host_patterns(host.lower(), patterns):
+                    numbers.append(number)
+            name = host
+            if sys.version_info[0] >= 3:
+                name = host.encode('utf-8')
+            for salted, digest, m, number in self.hashed:
+                if m != marker:
+                    continue
+                h = salted.copy()
+                h.update(name)
+                if h.digest() == digest:
+                    numbers.append(number)
+            numbers.sort()
+            self.found[(host, marker)] = numbers
+        return self.found[(host, marker)]
+
+def key_marker(key):
+    '''Returns the @cert-authority or @revoked marker of a key, or None'''
+    if key is not None and key.lstrip().startswith('@'):
+        return key.split()[0]
+    return None
+
+def compile_host_pattern(pattern):
+    '''Turns a known_hosts host pattern into (negated, regex)'''
+    negated = pattern.startswith('!')
+    if negated:
+        pattern = pattern[1:]
+    regex = re.escape(pattern).replace('\\*', '.*').replace('\\?', '.')
+    return negated, re.compile(regex + '$')
+
+def match_host_patterns(host, patterns):
+    matched = False
+    for negated, regex in patterns:
+        if regex.match(host):
+            if negated:
+                return False
+            matched = True
+    return matched
+
+def load_known_hosts(module, path):
+    '''Returns the KnownHosts index of path, None if it does not exist.
+
+    The file is memory mapped rather than read, known_hosts files on busy
+    hosts can get large.
+    '''
+    try:
+        inf=open(path,"rb")
+    except IOError:
+        e = get_exception()
+        if e.errno == errno.ENOENT:
+            return None
+        module.fail_json(msg="Failed to read %s: %s" % \
+                             (path,str(e)))
+    try:
+        size = os.fstat(inf.fileno()).st_size
+        data = ''
+        if size > 0:
+            m = mmap.mmap(inf.fileno(), size, access=mmap.ACCESS_READ)
+            try:
+                data = m[:]
+            finally:
+                m.close()
+            if sys.version_info[0] >= 3:
+                data = data.decode('utf-8')
+    finally:
+        inf.close()
+    return KnownHosts(data)
+
+def write_known_hosts(module, path, index, remove, keys):
+    '''Atomically rewrites path without the lines in remove, adding keys'''
+    try:
+        outf=tempfile.NamedTemporaryFile(dir=os.path.dirname(path))
+        last=''
+        if index is not None:
+            for line_number, line in enumerate(index.lines):
+                if line_number + 1 in remove:
+                    continue # skip this line to replace its key
+                outf.write(line)
+                last=line
+        if keys and last and last[-1] != '\n':
+            outf.write('\n')
+        for key in keys:
+            outf.write(key)
+        outf.flush()
+        module.atomic_move(outf.name,path)
+    except (IOError,OSError):
+        e = get_exception()
+        module.fail_json(msg="Failed to write to file %s: %s" % \
+                             (path,str(e)))
+
+    try:
+        outf.close()
+    except:
+        pass
+
+def plan_host(module, index, host, key, state):
+    '''plan_host(module,index,host,key,state) -> (changed,remove,add)
+
+    Works out how to bring the entries of host in the known_hosts index to
+    state. Returns whether anything must change, the set of line numbers to
+    remove and the key to add, or None.
+    '''
+    if key is None and state != "absent":
+        module.fail_json(msg="No key specified when adding a host")
+
+    sanity_check(module,host,key)
+
+    found,replace_or_add,found_line=search_for_host_key(module,host,key,index)
+
+    remove = set()
+    add = None
+
+    #Only remove whole host if found and no key provided
+    if found and key is None and state=="absent":
+        remove.update(index.lookup(host))
+
+    #Next, add a new (or replacing) entry
+    if replace_or_add or found != (state=="present"):
+        if found_line is not None and (replace_or_add or state=='absent'):
+            remove.add(found_line)
+        if state == 'present':
+            add = key
+
+    #We will change state if found==True & state!="present"
+    #or found==False & state=="present"
+    #i.e found XOR (state=="present")
+    #Alternatively, if replace is true (i.e. key present, and we must change it)
+    return replace_or_add or (state=="present") != found, remove, add
+
 def enforce_state(module, params):
     """
     Add or remove key.
@@ -88,156 +297,112 @@ def enforce_state(module, params):
 
     host = params["name"]
     key = params.get("key",None)
-    port = params.get("port",None)
     path = params.get("path")
     state = params.get("state")
-    #Find the ssh-keygen binary
-    sshkeygen = module.get_bin_path("ssh-keygen",True)
 
     # Trailing newline in files gets lost, so re-add if necessary
     if key and key[-1] != '\n':
         key+='\n'
 
-    if key is None and state != "absent":
-        module.fail_json(msg="No key specified when adding a host")
-
-    sanity_check(module,host,key,sshkeygen)
+    index = load_known_hosts(module, path)
+    changed, remove, add = plan_host(module, index, host, key, state)
 
-    found,replace_or_add,found_line=search_for_host_key(module,host,key,path,sshkeygen)
-
-    #We will change state if found==True & state!="present"
-    #or found==False & state=="present"
-    #i.e found XOR (state=="present")
-    #Alternatively, if replace is true (i.e. key present, and we must change it)
     if module.check_mode:
-        module.exit_json(changed = replace_or_add or (state=="present") != found)
-
-    #Now do the work.
-
-    #Only remove whole host if found and no key provided
-    if found and key is None and state=="absent":
-        module.run_command([sshkeygen,'-R',host,'-f',path], check_rc=True)
-        params['changed'] = True
-
-    #Next, add a new (or replacing) entry
-    if replace_or_add or found != (state=="present"):
-        try:
-            inf=open(path,"r")
-        except IOError:
-            e = get_exception()
-            if e.errno == errno.ENOENT:
-                inf=None
-            else:
-                module.fail_json(msg="Failed to read %s: %s" % \
-                                     (path,str(e)))
-        try:
-            outf=tempfile.NamedTemporaryFile(dir=os.path.dirname(path))
-            if inf is not None:
-                for line_number, line in enumerate(inf, start=1):
-                    if found_line==line_number and (replace_or_add or state=='absent'):
-                        continue # skip this line to replace its key
-                    outf.write(line)
-                inf.close()
-            if state == 'present':
-                outf.write(key)
-            outf.flush()
-            module.atomic_move(outf.name,path)
-        except (IOError,OSError):
-            e = get_exception()
-            module.fail_json(msg="Failed to write to file %s: %s" % \
-                                 (path,str(e)))
-
-        try:
-            outf.close()
-        except:
-            pass
+        module.exit_json(changed = changed)
 
+    if changed:
+        keys = []
+        if add is not None:
+            keys.append(add)
+        write_known_hosts(module, path, index, remove, keys)
         params['changed'] = True
 
     return params
 
-def sanity_check(module,host,key,sshkeygen):
+def enforce_hosts(module, params):
+    """
+    Add or remove the keys of several hosts, rewriting the file at most once.
+    Every entry is checked against the file as it was before the run.
+    """
+
+    path = params.get("path")
+    index = load_known_hosts(module, path)
+
+    changed = False
+    remove = set()
+    keys = []
+    results = []
+    for entry in params["hosts"]:
+        if not isinstance(entry, dict):
+            module.fail_json(msg="Each entry of hosts must be a dictionary, got %s" % entry)
+        host = entry.get("name", entry.get("host"))
+        if not host:
+            module.fail_json(msg="Each entry of hosts needs a name, got %s" % entry)
+        key = entry.get("key", None)
+        state = entry.get("state", params.get("state"))
+        if state not in ["present", "absent"]:
+            module.fail_json(msg="state of host %s must be present or absent, got %s" % (host, state))
+
+        if key and key[-1] != '\n':
+            key+='\n'
+
+        host_changed, host_remove, add = plan_host(module, index, host, key, state)
+        remove.update(host_remove)
+        if add is not None and add not in keys:
+            keys.append(add)
+        changed = changed or host_changed
+        results.append(dict(name=host, state=state, changed=host_changed))
+
+    if changed and not module.check_mode:
+        write_known_hosts(module, path, index, remove, keys)
+
+    return dict(changed=changed, path=path, hosts=results)
+
+def sanity_check(module,host,key):
     '''Check supplied key is sensible
 
     host and key are parameters provided by the user; If the host
     provided is inconsistent with the key supplied, then this function
     quits, providing an error to the user.
-    sshkeygen is the path to ssh-keygen, found earlier with get_bin_path
     '''
     #If no key supplied, we're doing a removal, and have nothing to check here.
     if key is None:
         return
-    #Rather than parsing the key ourselves, get ssh-keygen to do it
-    #(this is essential for hashed keys, but otherwise useful, as the
-    #key question is whether ssh-keygen thinks the key matches the host).
-
-    #The approach is to write the key to a temporary file,
-    #and then attempt to look up the specified host in that file.
-    try:
-        outf=tempfile.NamedTemporaryFile()
-        outf.write(key)
-        outf.flush()
-    except IOError:
-        e = get_exception()
-        module.fail_json(msg="Failed to write to temporary file %s: %s" % \
-                             (outf.name,str(e)))
-    rc,stdout,stderr=module.run_command([sshkeygen,'-F',host,
-                                         '-f',outf.name],
-                                        check_rc=True)
-    try:
-        outf.close()
-    except:
-        pass
-
-    if stdout=='': #host not found
+    #Parse the key the same way as the known_hosts file (this is essential
+    #for hashed keys, but otherwise useful, as the key question is whether
+    #the key matches the host).
+    if not KnownHosts(key).lookup(host, key_marker(key)):
         module.fail_json(msg="Host parameter does not match hashed host field in supplied key")
 
-def search_for_host_key(module,host,key,path,sshkeygen):
-    '''search_for_host_key(module,host,key,path,sshkeygen) -> (found,replace_or_add,found_line)
+def search_for_host_key(module,host,key,index):
+    '''search_for_host_key(module,host,key,index) -> (found,replace_or_add,found_line)
 
-    Looks up host and keytype in the known_hosts file path; if it's there, looks to see
+    Looks up host and keytype in the known_hosts index; if it's there, looks to see
     if one of those entries matches key. Returns:
     found (Boolean): is host found in path?
     replace_or_add (Boolean): is the key in path different to that supplied by user?
     found_line (int or None): the line where a key of the same type was found
     if found=False, then replace is always False.
-    sshkeygen is the path to ssh-keygen, found earlier with get_bin_path
+    index is the KnownHosts index of the known_hosts file, None if it does not exist
     '''
-    if os.path.exists(path)==False:
+    if index is None:
         return False, False, None
-    #openssh >=6.4 has changed ssh-keygen behaviour such that it returns
-    #1 if no host is found, whereas previously it returned 0
-    rc,stdout,stderr=module.run_command([sshkeygen,'-F',host,'-f',path],
-                                 check_rc=False)
-    if stdout=='' and stderr=='' and (rc==0 or rc==1):
-        return False, False, None #host not found, no other errors
-    if rc!=0: #something went wrong
-        module.fail_json(msg="ssh-keygen failed (rc=%d,stdout='%s',stderr='%s')" % (rc,stdout,stderr))
+    found_lines = index.lookup(host, key_marker(key))
+    if not found_lines:
+        return False, False, None #host not found
 
     #If user supplied no key, we don't want to try and replace anything with it
     if key is None:
         return True, False, None
 
-    lines=stdout.split('\n')
     new_key = normalize_known_hosts_key(key, host)
 
-    for l in lines:
-        if l=='':
-            continue
-        elif l[0]=='#': # info output from ssh-keygen; contains the line number where key was found
-            try:
-                # This output format has been hardcoded in ssh-keygen since at least OpenSSH 4.0
-                # It always outputs the non-localized comment before the found key
-                found_line = int(re.search(r'found: line (\d+)', l).group(1))
-            except IndexError:
-                e = get_exception()
-                module.fail_json(msg="failed to parse output of ssh-keygen for line number: '%s'" % l)
-        else:
-            found_key = normalize_known_hosts_key(l,host)
-            if new_key==found_key: #found a match
-                return True, False, found_line  #found exactly the same key, don't replace
-            elif new_key['type'] == found_key['type']: # found a different key for the same key type
-                return True, True, found_line
+    for found_line in found_lines:
+        found_key = normalize_known_hosts_key(index.lines[found_line - 1],host)
+        if new_key==found_key: #found a match
+            return True, False, found_line  #found exactly the same key, don't replace
+        elif new_key['type'] == found_key['type']: # found a different key for the same key type
+            return True, True, found_line
     #No match found, return found and replace, but no line
     return True, True, None
 
@@ -269,15 +434,22 @@ def main():
 
     module = AnsibleModule(
         argument_spec = dict(
-            name      = dict(required=True,  type='str', aliases=['host']),
+            name      = dict(required=False, type='str', aliases=['host']),
             key       = dict(required=False,  type='str'),
             path      = dict(default="~/.ssh/known_hosts", type='path'),
             state     = dict(default='present', choices=['absent','present']),
+            hosts     = dict(required=False, type='list'),
             ),
+        required_one_of = [['name', 'hosts']],
+        mutually_exclusive = [['name', 'hosts'], ['key', 'hosts']],
         supports_check_mode = True
         )
 
-    results = enforce_state(module,module.params)
+    if module.params['hosts'] is not None:
+        results = enforce_hosts(module,module.params)
+    else:
+        results = enforce_state(module,module.params)
     module.exit_json(**results)
 
-main()
+if __name__ == '__main__':
+    main()
@@ -62,6 +62,8 @@ options:
     required: false
 notes:
   - module does not modify PE size for already present volume group
+  - The volume groups and physical volumes are read with a single
+    C(lvm fullreport) on LVM versions supporting JSON reports.
 '''
 
 EXAMPLES = '''
@@ -79,6 +81,17 @@ EXAMPLES = '''
 - lvg: vg=vg.services state=absent
 '''
 
+import os
+
+try:
+    import json
+except ImportError:
+    try:
+        import simplejson as json
+    except ImportError:
+        # Let snippet from module_utils/basic.py return a proper error in this case
+        pass
+
 def parse_vgs(data):
     vgs = []
     for line in data.splitlines():
@@ -91,6 +104,16 @@ def parse_vgs(data):
     return vgs
 
 def find_mapper_device_name(module, dm_device):
+        # the name of a device mapper device is in sysfs, dmsetup is only
+        # needed without it
+        try:
+            f = open('/sys/block/%s/dm/name' % os.path.basename(dm_device))
+            try:
+                return '/dev/mapper/' + f.read().rstrip()
+            finally:
+                f.close()
+        except IOError:
+            pass
         dmsetup_cmd = module.get_bin_path('dmsetup', True)
         mapper_prefix = '/dev/mapper/'
         rc, dm_name, err = module.run_command("%s info -C --noheadings -o name %s" % (dmsetup_cmd, dm_device))
@@ -112,6 +135,62 @@ def parse_pvs(module, data):
         })
     return pvs
 
+def parse_fullreport(module, data):
+    """ Get the VGs and PVs from lvm fullreport --reportformat json output """
+    vgs = []
+    pvs = []
+    dm_prefix = '/dev/dm-'
+    for report in json.loads(data)['report']:
+        # orphan PVs are reported without a VG
+        vg_name = ''
+        for vg in report.get('vg', []):
+            vg_name = vg['vg_name']
+            vgs.append({
+                'name': vg_name,
+                'pv_count': int(vg['pv_count']),
+                'lv_count': int(vg['lv_count']),
+            })
+        for pv in report.get('pv', []):
+            name = pv['pv_name']
+            if name.startswith(dm_prefix):
+                name = find_mapper_device_name(module, name)
+            pvs.append({
+                'name': name,
+                'vg_name': vg_name,
+            })
+    return vgs, pvs
+
+def get_lvm_state(module, need_pvs):
+    """ Get the VGs and PVs with a single lvm fullreport, falling back to
+    vgs and pvs on LVM versions without JSON reports """
+    lvm_cmd = module.get_bin_path('lvm')
+    if lvm_cmd:
+        rc, out, err = module.run_command("%s fullreport --reportformat json"
+                                          " --configreport vg -o vg_name,pv_count,lv_count"
+                                          " --configreport pv -o pv_name" % lvm_cmd)
+        if rc == 0:
+            try:
+                return parse_fullreport(module, out)
+            except (ValueError, KeyError, TypeError):
+                pass
+
+    pvs = []
+    if need_pvs:
+        ### get pv list
+        pvs_cmd = module.get_bin_path('pvs', True)
+        rc,current_pvs,err = module.run_command("%s --noheadings -o pv_name,vg_name --separator ';'" % pvs_cmd)
+        if rc != 0:
+            module.fail_json(msg="Failed executing pvs command.",rc=rc, err=err)
+        pvs = parse_pvs(module, current_pvs)
+
+    vgs_cmd = module.get_bin_path('vgs', True)
+    rc,current_vgs,err = module.run_command("%s --noheadings -o vg_name,pv_count,lv_count --separator ';'" % vgs_cmd)
+
+    if rc != 0:
+        module.fail_json(msg="Failed executing vgs command.",rc=rc, err=err)
+
+    return parse_vgs(current_vgs), pvs
+
 def main():
     module = AnsibleModule(
         argument_spec = dict(
@@ -146,28 +225,16 @@ def main():
             if not os.path.exists(test_dev):
                 module.fail_json(msg="Device %s not found."%test_dev)
 
-        ### get pv list
-        pvs_cmd = module.get_bin_path('pvs', True)
-        rc,current_pvs,err = module.run_command("%s --noheadings -o pv_name,vg_name --separator ';'" % pvs_cmd)
-        if rc != 0:
-            module.fail_json(msg="Failed executing pvs command.",rc=rc, err=err)
+    vgs, pvs = get_lvm_state(module, state == 'present')
 
+    if state=='present':
         ### check pv for devices
-        pvs = parse_pvs(module, current_pvs)
         used_pvs = [ pv for pv in pvs if pv['name'] in dev_list and pv['vg_name'] and pv['vg_name'] != vg ]
         if used_pvs:
             module.fail_json(msg="Device %s is already in %s volume group."%(used_pvs[0]['name'],used_pvs[0]['vg_name']))
 
-    vgs_cmd = module.get_bin_path('vgs', True)
-    rc,current_vgs,err = module.run_command("%s --noheadings -o vg_name,pv_count,lv_count --separator ';'" % vgs_cmd)
-
-    if rc != 0:
-        module.fail_json(msg="Failed executing vgs command.",rc=rc, err=err)
-
     changed = False
 
-    vgs = parse_vgs(current_vgs)
-
     for test_vg in vgs:
         if test_vg['name'] == vg:
             this_vg = test_vg
@@ -36,7 +36,8 @@ options:
   lv:
     description:
     - The name of the logical volume.
-    required: true
+    - Required unless I(lvs) is given.
+    required: false
   size:
     description:
     - The size of the logical volume, according to lvcreate(8) --size, by
@@ -86,6 +87,16 @@ options:
     - shrink if current size is higher than size requested
     required: false
     default: yes
+  lvs:
+    version_added: "2.3"
+    description:
+    - List of logical volumes of I(vg) to create, resize or remove in one
+      task. Each item is a dict with a C(lv) key and optionally C(size),
+      C(state), C(opts), C(force), C(shrink), C(active), C(snapshot) and
+      C(pvs) keys, which default to the options of the same name.
+    - The volume groups and logical volumes are read with a single
+      C(lvm fullreport) where supported and only read again after a change.
+    required: false
 notes:
   - Filesystems on top of the volume are not resized.
 '''
@@ -138,12 +149,43 @@ EXAMPLES = '''
 
 # Create a deactivated logical volume
 - lvol: vg=firefly lv=test size=512g active=false
+
+# Create or resize several logical volumes at once
+- lvol:
+    vg: firefly
+    lvs:
+      - { lv: root, size: 10g }
+      - { lv: var, size: 20g }
+      - { lv: data, size: 100%FREE }
+      - { lv: old, state: absent, force: yes }
+'''
+
+RETURN = '''
+results:
+    description: The result of each item of I(lvs)
+    returned: when I(lvs) is given
+    type: list
+    sample: [{"changed": true, "lv": "root", "vg": "firefly", "size": 10}]
 '''
 
 import re
 
+try:
+    import json
+except ImportError:
+    try:
+        import simplejson as json
+    except ImportError:
+        # Let snippet from module_utils/basic.py return a proper error in this case
+        pass
+
 decimal_point = re.compile(r"(\d+)")
 
+# Bytes per unit of the --units option, lower case units are powers of 1024
+UNITS = {'b': 1, 's': 512}
+for i, u in enumerate('kmgtpe'):
+    UNITS[u] = 1024 ** (i + 1)
+
 def mkversion(major, minor, patch):
     return (1000 * 1000 * int(major)) + (1000 * int(minor)) + int(patch)
 
@@ -154,7 +196,8 @@ def parse_lvs(data):
         lvs.append({
             'name': parts[0].replace('[','').replace(']',''),
             'size': int(decimal_point.match(parts[1]).group(1)),
-            'active': (parts[2][4] == 'a')
+            'active': (parts[2][4] == 'a'),
+            'vg': parts[3]
         })
     return lvs
 
@@ -170,6 +213,107 @@ def parse_vgs(data):
         })
     return vgs
 
+def parse_fullreport(data):
+    """ Get the VGs and LVs from lvm fullreport --reportformat json output """
+    vgs = []
+    lvs = []
+    for report in json.loads(data)['report']:
+        for vg in report.get('vg', []):
+            vgs.append({
+                'name': vg['vg_name'],
+                'size': int(decimal_point.match(vg['vg_size']).group(1)),
+                'free': int(decimal_point.match(vg['vg_free']).group(1)),
+                'ext_size': int(decimal_point.match(vg['vg_extent_size']).group(1))
+            })
+            for lv in report.get('lv', []):
+                lvs.append({
+                    'name': lv['lv_name'].replace('[','').replace(']',''),
+                    'size': int(decimal_point.match(lv['lv_size']).group(1)),
+                    'active': (lv['lv_attr'][4] == 'a'),
+                    'vg': vg['vg_name']
+                })
+    return vgs, lvs
+
+
+class LVMState(object):
+    """ Snapshot of the VGs and LVs, taken with a single lvm fullreport where
+    available and refreshed only after a change. Sizes are kept in bytes. """
+
+    def __init__(self, module, version):
+        self.module = module
+        self.fullreport = version >= mkversion(2, 2, 158) # First LVM with JSON reports
+        self.vgs = None
+        self.lvs = None
+
+    def invalidate(self):
+        self.vgs = None
+        self.lvs = None
+
+    def load(self):
+        if self.fullreport:
+            lvm_cmd = self.module.get_bin_path("lvm", required=True)
+            rc, out, err = self.module.run_command(
+                "%s fullreport --reportformat json --units b --nosuffix"
+                " --configreport vg -o vg_name,vg_size,vg_free,vg_extent_size"
+                " --configreport lv -o lv_name,lv_size,lv_attr" % lvm_cmd)
+            if rc == 0:
+                try:
+                    vgs, lvs = parse_fullreport(out)
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    self.fullreport = False
+                else:
+                    self.index(vgs, lvs)
+                    return
+            else:
+                self.fullreport = False
+
+        vgs_cmd = self.module.get_bin_path("vgs", required=True)
+        rc, current_vgs, err = self.module.run_command(
+            "%s --noheadings --nosuffix -o vg_name,size,free,vg_extent_size --units b --separator ';'" % vgs_cmd)
+        if rc != 0:
+            self.module.fail_json(msg="Failed executing vgs command.", rc=rc, err=err)
+
+        lvs_cmd = self.module.get_bin_path("lvs", required=True)
+        rc, current_lvs, err = self.module.run_command(
+            "%s -a --noheadings --nosuffix -o lv_name,size,lv_attr,vg_name --units b --separator ';'" % lvs_cmd)
+        if rc != 0:
+            self.module.fail_json(msg="Failed executing lvs command.", rc=rc, err=err)
+
+        self.index(parse_vgs(current_vgs), parse_lvs(current_lvs))
+
+    def index(self, vgs, lvs):
+        self.vgs = {}
+        for vg in vgs:
+            self.vgs[vg['name']] = vg
+        self.lvs = {}
+        for lv in lvs:
+            self.lvs[(lv['vg'], lv['name'])] = lv
+
+    def set_active(self, vg, lv, active):
+        if self.lvs is not None and (vg, lv) in self.lvs:
+            self.lvs[(vg, lv)]['active'] = active
+
+    def get_vg(self, vg, unit):
+        """ Get a VG with its sizes in unit, or None if it does not exist """
+        if self.vgs is None:
+            self.load()
+        if vg not in self.vgs:
+            return None
+        this_vg = dict(self.vgs[vg])
+        for key in ('size', 'free', 'ext_size'):
+            this_vg[key] = this_vg[key] // UNITS[unit]
+        return this_vg
+
+    def get_lv(self, vg, lv, unit):
+        """ Get a LV with its size in unit, or None if it does not exist """
+        if self.lvs is None:
+            self.load()
+        if (vg, lv) not in self.lvs:
+            return None
+        this_lv = dict(self.lvs[(vg, lv)])
+        this_lv['size'] = this_lv['size'] // UNITS[unit]
+        return this_lv
+
 
 def get_lvm_version(module):
     ver_cmd = module.get_bin_path("lvm", required=True)
@@ -182,45 +326,10 @@ def get_lvm_version(module):
     return mkversion(m.group(1), m.group(2), m.group(3))
 
 
-def main():
-    module = AnsibleModule(
-        argument_spec=dict(
-            vg=dict(required=True),
-            lv=dict(required=True),
-            size=dict(type='str'),
-            opts=dict(type='str'),
-            state=dict(choices=["absent", "present"], default='present'),
-            force=dict(type='bool', default='no'),
-            shrink=dict(type='bool', default='yes'),
-            active=dict(type='bool', default='yes'),
-            snapshot=dict(type='str', default=None),
-            pvs=dict(type='str')
-        ),
-        supports_check_mode=True,
-    )
-
-    # Determine if the "--yes" option should be used
-    version_found = get_lvm_version(module)
-    if version_found == None:
-        module.fail_json(msg="Failed to get LVM version number")
-    version_yesopt = mkversion(2, 2, 99) # First LVM with the "--yes" option
-    if version_found >= version_yesopt:
-        yesopt = "--yes"
-    else:
-        yesopt = ""
-
-    vg = module.params['vg']
-    lv = module.params['lv']
-    size = module.params['size']
-    opts = module.params['opts']
-    state = module.params['state']
-    force = module.boolean(module.params['force'])
-    shrink = module.boolean(module.params['shrink'])
-    active = module.boolean(module.params['active'])
+def ensure_lv(module, lvm, yesopt, vg, lv, size, opts, state, force, shrink, active, snapshot, pvs):
+    """ Bring a single LV to the requested state, returns the result to report """
     size_opt = 'L'
     size_unit = 'm'
-    snapshot = module.params['snapshot']
-    pvs = module.params['pvs']
 
     if pvs is None:
         pvs = ""
@@ -237,6 +346,7 @@ def main():
         test_opt = ''
 
     if size:
+        size = str(size)
         # LVCREATE(8) -l --extents option with percentage
         if '%' in size:
             size_parts = size.split('%', 1)
@@ -270,44 +380,22 @@ def main():
         unit = size_unit
 
     # Get information on volume group requested
-    vgs_cmd = module.get_bin_path("vgs", required=True)
-    rc, current_vgs, err = module.run_command(
-        "%s --noheadings -o vg_name,size,free,vg_extent_size --units %s --separator ';' %s" % (vgs_cmd, unit, vg))
-
-    if rc != 0:
-        if state == 'absent':
-            module.exit_json(changed=False, stdout="Volume group %s does not exist." % vg)
-        else:
-            module.fail_json(msg="Volume group %s does not exist." % vg, rc=rc, err=err)
-
-    vgs = parse_vgs(current_vgs)
-    this_vg = vgs[0]
+    this_vg = lvm.get_vg(vg, unit)
 
-    # Get information on logical volume requested
-    lvs_cmd = module.get_bin_path("lvs", required=True)
-    rc, current_lvs, err = module.run_command(
-        "%s -a --noheadings --nosuffix -o lv_name,size,lv_attr --units %s --separator ';' %s" % (lvs_cmd, unit, vg))
-
-    if rc != 0:
+    if this_vg is None:
         if state == 'absent':
-            module.exit_json(changed=False, stdout="Volume group %s does not exist." % vg)
+            return dict(changed=False, stdout="Volume group %s does not exist." % vg)
         else:
-            module.fail_json(msg="Volume group %s does not exist." % vg, rc=rc, err=err)
+            module.fail_json(msg="Volume group %s does not exist." % vg)
 
     changed = False
 
-    lvs = parse_lvs(current_lvs)
-
+    # Get information on logical volume requested
     if snapshot is None:
         check_lv = lv
     else:
         check_lv = snapshot
-    for test_lv in lvs:
-        if test_lv['name'] == check_lv:
-            this_lv = test_lv
-            break
-    else:
-        this_lv = None
+    this_lv = lvm.get_lv(vg, check_lv, unit)
 
     if state == 'present' and not size:
         if this_lv is None:
@@ -325,6 +413,7 @@ def main():
             rc, _, err = module.run_command(cmd)
             if rc == 0:
                 changed = True
+                lvm.invalidate()
             else:
                 module.fail_json(msg="Creating logical volume '%s' failed" % lv, rc=rc, err=err)
     else:
@@ -335,7 +424,8 @@ def main():
             lvremove_cmd = module.get_bin_path("lvremove", required=True)
             rc, _, err = module.run_command("%s %s --force %s/%s" % (lvremove_cmd, test_opt, vg, this_lv['name']))
             if rc == 0:
-                module.exit_json(changed=True)
+                lvm.invalidate()
+                return dict(changed=True)
             else:
                 module.fail_json(msg="Failed to remove logical volume %s" % (lv), rc=rc, err=err)
 
@@ -373,11 +463,12 @@ def main():
                     module.fail_json(msg="Unable to resize %s to %s%s" % (lv, size, size_unit), rc=rc, err=err, out=out)
                 elif rc == 0:
                     changed = True
+                    lvm.invalidate()
                     msg="Volume %s resized to %s%s" % (this_lv['name'], size_requested, unit)
                 elif "matches existing size" in err:
-                    module.exit_json(changed=False, vg=vg, lv=this_lv['name'], size=this_lv['size'])
+                    return dict(changed=False, vg=vg, lv=this_lv['name'], size=this_lv['size'])
                 elif "not larger than existing size" in err:
-                    module.exit_json(changed=False, vg=vg, lv=this_lv['name'], size=this_lv['size'], msg="Original size is larger than requested size", err=err)
+                    return dict(changed=False, vg=vg, lv=this_lv['name'], size=this_lv['size'], msg="Original size is larger than requested size", err=err)
                 else:
                     module.fail_json(msg="Unable to resize %s to %s%s" % (lv, size, size_unit), rc=rc, err=err)
 
@@ -402,30 +493,97 @@ def main():
                     module.fail_json(msg="Unable to resize %s to %s%s" % (lv, size, size_unit), rc=rc, err=err, out=out)
                 elif rc == 0:
                     changed = True
+                    lvm.invalidate()
                 elif "matches existing size" in err:
-                    module.exit_json(changed=False, vg=vg, lv=this_lv['name'], size=this_lv['size'])
+                    return dict(changed=False, vg=vg, lv=this_lv['name'], size=this_lv['size'])
                 elif "not larger than existing size" in err:
-                    module.exit_json(changed=False, vg=vg, lv=this_lv['name'], size=this_lv['size'], msg="Original size is larger than requested size", err=err)
+                    return dict(changed=False, vg=vg, lv=this_lv['name'], size=this_lv['size'], msg="Original size is larger than requested size", err=err)
                 else:
                     module.fail_json(msg="Unable to resize %s to %s%s" % (lv, size, size_unit), rc=rc, err=err)
 
     if this_lv is not None:
-        if active:
+        if active and not this_lv['active']:
             lvchange_cmd = module.get_bin_path("lvchange", required=True)
             rc, _, err = module.run_command("%s -ay %s/%s" % (lvchange_cmd, vg, this_lv['name']))
             if rc == 0:
-                module.exit_json(changed=((not this_lv['active']) or changed), vg=vg, lv=this_lv['name'], size=this_lv['size'])
+                lvm.set_active(vg, this_lv['name'], True)
+                changed = True
             else:
                 module.fail_json(msg="Failed to activate logical volume %s" % (lv), rc=rc, err=err)
-        else:
+        elif not active and this_lv['active']:
             lvchange_cmd = module.get_bin_path("lvchange", required=True)
             rc, _, err = module.run_command("%s -an %s/%s" % (lvchange_cmd, vg, this_lv['name']))
             if rc == 0:
-                module.exit_json(changed=(this_lv['active'] or changed), vg=vg, lv=this_lv['name'], size=this_lv['size'])
+                lvm.set_active(vg, this_lv['name'], False)
+                changed = True
             else:
                 module.fail_json(msg="Failed to deactivate logical volume %s" % (lv), rc=rc, err=err)
+        return dict(changed=changed, vg=vg, lv=this_lv['name'], size=this_lv['size'])
+
+    return dict(changed=changed, msg=msg)
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            vg=dict(required=True),
+            lv=dict(),
+            size=dict(type='str'),
+            opts=dict(type='str'),
+            state=dict(choices=["absent", "present"], default='present'),
+            force=dict(type='bool', default='no'),
+            shrink=dict(type='bool', default='yes'),
+            active=dict(type='bool', default='yes'),
+            snapshot=dict(type='str', default=None),
+            pvs=dict(type='str'),
+            lvs=dict(type='list')
+        ),
+        required_one_of=[['lv', 'lvs']],
+        mutually_exclusive=[['lv', 'lvs']],
+        supports_check_mode=True,
+    )
 
-    module.exit_json(changed=changed, msg=msg)
+    # Determine if the "--yes" option should be used
+    version_found = get_lvm_version(module)
+    if version_found == None:
+        module.fail_json(msg="Failed to get LVM version number")
+    version_yesopt = mkversion(2, 2, 99) # First LVM with the "--yes" option
+    if version_found >= version_yesopt:
+        yesopt = "--yes"
+    else:
+        yesopt = ""
+
+    lvm = LVMState(module, version_found)
+    p = module.params
+
+    if p['lvs'] is None:
+        result = ensure_lv(module, lvm, yesopt, p['vg'], p['lv'], p['size'], p['opts'], p['state'],
+                           module.boolean(p['force']), module.boolean(p['shrink']), module.boolean(p['active']),
+                           p['snapshot'], p['pvs'])
+        module.exit_json(**result)
+
+    ### batch mode, the keys of each item default to the module options
+    keys = ['lv', 'size', 'opts', 'state', 'force', 'shrink', 'active', 'snapshot', 'pvs']
+    results = []
+    changed = False
+    for item in p['lvs']:
+        if not isinstance(item, dict) or not item.get('lv'):
+            module.fail_json(msg="lvs must be a list of dicts with a lv key, got %s" % item)
+        unknown = [key for key in item if key not in keys]
+        if unknown:
+            module.fail_json(msg="Unsupported keys %s in %s" % (', '.join(unknown), item))
+        params = dict([(key, item.get(key, p.get(key))) for key in keys])
+        if params['state'] not in ["absent", "present"]:
+            module.fail_json(msg="state must be present or absent in %s" % item)
+
+        result = ensure_lv(module, lvm, yesopt, p['vg'], params['lv'], params['size'], params['opts'], params['state'],
+                           module.boolean(params['force']), module.boolean(params['shrink']), module.boolean(params['active']),
+                           params['snapshot'], params['pvs'])
+        result['lv'] = params['lv']
+        changed = changed or result['changed']
+        results.append(result)
+
+    module.exit_json(changed=changed, results=results)
 
 # import module snippets
 from ansible.module_utils.basic import *
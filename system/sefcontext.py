@@ -29,7 +29,8 @@ options:
   target:
     description:
       - Target path (expression).
-    required: true
+      - Required unless I(items) is given.
+    required: false
     default: null
     aliases: ['path']
   ftype:
@@ -40,7 +41,8 @@ options:
   setype:
     description:
       - SELinux type for the specified target.
-    required: true
+      - Required unless I(items) is given.
+    required: false
     default: null
   seuser:
     description:
@@ -64,6 +66,17 @@ options:
       - Reload SELinux policy after commit.
     required: false
     default: yes
+  items:
+    description:
+      - List of file context mapping definitions, each a dict with C(target)
+        and the optional C(ftype), C(setype), C(seuser), C(selevel) and
+        C(state) keys, which default to the options of the same name.
+      - The existing definitions are read once and all changes are applied
+        in a single semanage transaction, so the policy is reloaded at most
+        once.
+    required: false
+    default: null
+    version_added: "2.3"
 notes:
    - The changes are persistent across reboots
 requirements: [ 'libselinux-python', 'policycoreutils-python' ]
@@ -73,6 +86,16 @@ author: Dag Wieers
 EXAMPLES = '''
 # Allow apache to modify files in /srv/git_repos
 - sefcontext: target='/srv/git_repos(/.*)?' setype=httpd_git_rw_content_t state=present
+
+# Manage several file context mappings with a single policy reload
+- sefcontext:
+    setype: httpd_sys_content_t
+    items:
+      - target: '/srv/www(/.*)?'
+      - target: '/srv/git_repos(/.*)?'
+        setype: httpd_git_rw_content_t
+      - target: '/srv/old(/.*)?'
+        state: absent
 '''
 
 RETURN = '''
@@ -198,18 +221,96 @@ def semanage_fcontext_delete(module, result, target, ftype, do_reload, sestore='
 
     module.exit_json(changed=changed, **result)
 
+def semanage_fcontext_batch(module, result, items, do_reload, sestore=''):
+    ''' Apply a list of SELinux file context mapping definitions in a single transaction. '''
+
+    changes = []
+    prepared_diff = ''
+
+    try:
+        sefcontext = seobject.fcontextRecords(sestore)
+        sefcontext.set_reload(do_reload)
+
+        # Index the existing definitions once and keep the index in step
+        # with the planned changes
+        records = sefcontext.get_all()
+        for target, ftype, setype, seuser, serange, state in items:
+            record = (target, ftype)
+            exists = records.get(record)
+            if state == 'present' and exists:
+                # Modify existing entry
+                orig_seuser, orig_serole, orig_setype, orig_serange = exists
+
+                if seuser is None:
+                    seuser = orig_seuser
+                if serange is None:
+                    serange = orig_serange
+
+                if setype != orig_setype or seuser != orig_seuser or serange != orig_serange:
+                    changes.append((sefcontext.modify, (target, setype, ftype, serange, seuser)))
+                    records[record] = (seuser, orig_serole, setype, serange)
+
+                    if module._diff:
+                        prepared_diff += '# Change to semanage file context mappings\n'
+                        prepared_diff += '-%s      %s      %s:%s:%s:%s\n' % (target, ftype, orig_seuser, orig_serole, orig_setype, orig_serange)
+                        prepared_diff += '+%s      %s      %s:%s:%s:%s\n' % (target, ftype, seuser, orig_serole, setype, serange)
+            elif state == 'present':
+                # Add missing entry
+                if seuser is None:
+                    seuser = 'system_u'
+                if serange is None:
+                    serange = 's0'
+
+                changes.append((sefcontext.add, (target, setype, ftype, serange, seuser)))
+                records[record] = (seuser, 'object_r', setype, serange)
+
+                if module._diff:
+                    prepared_diff += '# Addition to semanage file context mappings\n'
+                    prepared_diff += '+%s      %s      %s:%s:%s:%s\n' % (target, ftype, seuser, 'object_r', setype, serange)
+            elif exists:
+                # Remove existing entry
+                changes.append((sefcontext.delete, (target, ftype)))
+                del records[record]
+
+                if module._diff:
+                    prepared_diff += '# Deletion to semanage file context mappings\n'
+                    prepared_diff += '-%s      %s      %s:%s:%s:%s\n' % (target, ftype, exists[0], exists[1], exists[2], exists[3])
+
+        if changes and not module.check_mode:
+            # Inside a transaction seobject commits, and reloads, only once
+            # at finish(), older versions commit every change
+            transaction = hasattr(sefcontext, 'start')
+            if transaction:
+                sefcontext.start()
+            for change, args in changes:
+                change(*args)
+            if transaction:
+                sefcontext.finish()
+
+    except Exception:
+        e = get_exception()
+        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
+
+    if module._diff and prepared_diff:
+        result['diff'] = dict(prepared=prepared_diff)
+
+    module.exit_json(changed=len(changes) > 0, **result)
+
 
 def main():
     module = AnsibleModule(
         argument_spec = dict(
-                target  = dict(required=True, aliases=['path']),
+                target  = dict(required=False, aliases=['path']),
                 ftype   = dict(required=False, choices=option_to_file_type_str.keys(), default='a'),
-                setype  = dict(required=True),
+                setype  = dict(required=False),
                 seuser  = dict(required=False, default=None),
                 selevel = dict(required=False, default=None, aliases=['serange']),
                 state   = dict(required=False, choices=['present', 'absent'], default='present'),
                 reload  = dict(required=False, type='bool', default='yes'),
+                items   = dict(required=False, type='list'),
             ),
+        required_one_of = [['target', 'items']],
+        mutually_exclusive = [['target', 'items']],
         supports_check_mode = True,
     )
     if not HAVE_SELINUX:
@@ -229,6 +330,25 @@ def main():
     state = module.params['state']
     do_reload = module.params['reload']
 
+    if module.params['items'] is not None:
+        items = []
+        for item in module.params['items']:
+            if not isinstance(item, dict) or not (item.get('target') or item.get('path')):
+                module.fail_json(msg='items must be dicts with a target key, got %s' % item)
+            item_ftype = item.get('ftype', ftype)
+            item_setype = item.get('setype', setype)
+            item_state = item.get('state', state)
+            if item_ftype not in option_to_file_type_str or item_state not in ['present', 'absent'] \
+                    or (item_state == 'present' and not item_setype):
+                module.fail_json(msg='invalid file context mapping definition: %s' % item)
+            items.append((item.get('target') or item.get('path'), option_to_file_type_str[item_ftype],
+                          item_setype, item.get('seuser', seuser),
+                          item.get('selevel', item.get('serange', serange)), item_state))
+        semanage_fcontext_batch(module, dict(items=module.params['items']), items, do_reload)
+
+    if setype is None:
+        module.fail_json(msg='setype is required with target')
+
     result = dict(target=target, ftype=ftype, setype=setype, state=state)
 
     # Convert file types to (internally used) strings
@@ -28,25 +28,38 @@ options:
   ports:
     description:
       - Ports or port ranges, separated by a comma
-    required: true
+      - Required unless I(items) is given.
+    required: false
     default: null
   proto:
     description:
       - Protocol for the specified port.
-    required: true
+      - Required unless I(items) is given.
+    required: false
     default: null
     choices: [ 'tcp', 'udp' ]
   setype:
     description:
       - SELinux type for the specified port.
-    required: true
+      - Required unless I(items) is given.
+    required: false
     default: null
   state:
     description:
       - Desired boolean value.
-    required: true
+    required: false
     default: present
     choices: [ 'present', 'absent' ]
+  items:
+    description:
+      - List of port type definitions, each a dict with C(ports), C(proto),
+        C(setype) and C(state) keys, where C(proto), C(setype) and C(state)
+        default to the options of the same name.
+      - All definitions are applied in a single semanage transaction, so the
+        policy is reloaded at most once.
+    required: false
+    default: null
+    version_added: "2.3"
   reload:
     description:
       - Reload SELinux policy after commit.
@@ -66,6 +79,15 @@ EXAMPLES = '''
 - seport: ports=8991 proto=tcp setype=ssh_port_t state=present
 # Allow memcached to listen on tcp ports 10000-10100 and 10112
 - seport: ports=10000-10100,10112 proto=tcp setype=memcache_port_t state=present
+# Define several port types with a single policy reload
+- seport:
+    proto: tcp
+    state: present
+    items:
+      - { ports: 8888, setype: http_port_t }
+      - { ports: 8991, setype: ssh_port_t }
+      - { ports: '10000-10100,10112', setype: memcache_port_t }
+      - { ports: 9999, proto: udp, setype: memcache_port_t, state: absent }
 '''
 
 try:
@@ -84,51 +106,75 @@ from ansible.module_utils.basic import *
 from ansible.module_utils.pycompat24 import get_exception
 
 
-def semanage_port_get_ports(seport, setype, proto):
-    """ Get the list of ports that have the specified type definition.
-
-    :param seport: Instance of seobject.portRecords
-
-    :type setype: str
-    :param setype: SELinux type.
-
-    :type proto: str
-    :param proto: Protocol ('tcp' or 'udp')
+def semanage_port_key(port, proto):
+    """ Get the key of a port or port range in seobject.portRecords.get_all() """
+    ports = port.split('-', 1)
+    if len(ports) == 1:
+        ports.extend(ports)
+    return (int(ports[0]), int(ports[1]), proto)
 
-    :rtype: list
-    :return: List of ports that have the specified SELinux type.
-    """
-    records = seport.get_all_by_type()
-    if (setype, proto) in records:
-        return records[(setype, proto)]
-    else:
-        return []
 
+def semanage_port_batch(module, items, do_reload, sestore=''):
+    """ Apply SELinux port type definitions in a single transaction.
 
-def semanage_port_get_type(seport, port, proto):
-    """ Get the SELinux type of the specified port.
+    :type module: AnsibleModule
+    :param module: Ansible module
 
-    :param seport: Instance of seobject.portRecords
+    :type items: list
+    :param items: List of (ports, proto, setype, state, serange) tuples
 
-    :type port: str
-    :param port: Port or port range (example: "8080", "8080-9090")
+    :type do_reload: bool
+    :param do_reload: Whether to reload SELinux policy after commit
 
-    :type proto: str
-    :param proto: Protocol ('tcp' or 'udp')
+    :type sestore: str
+    :param sestore: SELinux store
 
-    :rtype: tuple
-    :return: Tuple containing the SELinux type and MLS/MCS level, or None if not found.
+    :rtype: bool
+    :return: True if the policy was changed, otherwise False
     """
-    ports = port.split('-', 1)
-    if len(ports) == 1:
-        ports.extend(ports)
-    key = (int(ports[0]), int(ports[1]), proto)
+    try:
+        seport = seobject.portRecords(sestore)
+        seport.set_reload(do_reload)
 
-    records = seport.get_all()
-    if key in records:
-        return records[key]
-    else:
-        return None
+        # Index the records once and keep the index in step with the
+        # planned changes
+        ports_by_type = seport.get_all_by_type()
+        records = seport.get_all()
+        changes = []
+        for ports, proto, setype, state, serange in items:
+            for port in ports:
+                key = semanage_port_key(port, proto)
+                if state == 'present' and port not in ports_by_type.get((setype, proto), []):
+                    if key in records:
+                        changes.append((seport.modify, (port, proto, serange, setype)))
+                        old = ports_by_type.get((records[key][0], proto), [])
+                        if port in old:
+                            old.remove(port)
+                    else:
+                        changes.append((seport.add, (port, proto, serange, setype)))
+                    ports_by_type.setdefault((setype, proto), []).append(port)
+                    records[key] = (setype, serange)
+                elif state == 'absent' and port in ports_by_type.get((setype, proto), []):
+                    changes.append((seport.delete, (port, proto)))
+                    ports_by_type[(setype, proto)].remove(port)
+                    records.pop(key, None)
+
+        if changes and not module.check_mode:
+            # Inside a transaction seobject commits, and reloads, only once
+            # at finish(), older versions commit every change
+            transaction = hasattr(seport, 'start')
+            if transaction:
+                seport.start()
+            for change, args in changes:
+                change(*args)
+            if transaction:
+                seport.finish()
+
+    except (ValueError, IOError, KeyError, OSError, RuntimeError):
+        e = get_exception()
+        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
+
+    return len(changes) > 0
 
 
 def semanage_port_add(module, ports, proto, setype, do_reload, serange='s0', sestore=''):
@@ -158,37 +204,7 @@ def semanage_port_add(module, ports, proto, setype, do_reload, serange='s0', ses
     :rtype: bool
     :return: True if the policy was changed, otherwise False
     """
-    try:
-        seport = seobject.portRecords(sestore)
-        seport.set_reload(do_reload)
-        change = False
-        ports_by_type = semanage_port_get_ports(seport, setype, proto)
-        for port in ports:
-            if port not in ports_by_type:
-                change = True
-                port_type = semanage_port_get_type(seport, port, proto)
-                if port_type is None and not module.check_mode:
-                    seport.add(port, proto, serange, setype)
-                elif port_type is not None and not module.check_mode:
-                    seport.modify(port, proto, serange, setype)
-
-    except ValueError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
-    except IOError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
-    except KeyError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
-    except OSError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
-    except RuntimeError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
-
-    return change
+    return semanage_port_batch(module, [(ports, proto, setype, 'present', serange)], do_reload, sestore)
 
 
 def semanage_port_del(module, ports, proto, setype, do_reload, sestore=''):
@@ -215,52 +231,34 @@ def semanage_port_del(module, ports, proto, setype, do_reload, sestore=''):
     :rtype: bool
     :return: True if the policy was changed, otherwise False
     """
-    try:
-        seport = seobject.portRecords(sestore)
-        seport.set_reload(do_reload)
-        change = False
-        ports_by_type = semanage_port_get_ports(seport, setype, proto)
-        for port in ports:
-            if port in ports_by_type:
-                change = True
-                if not module.check_mode:
-                    seport.delete(port, proto)
-
-    except ValueError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
-    except IOError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
-    except KeyError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
-    except OSError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
-    except RuntimeError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
+    return semanage_port_batch(module, [(ports, proto, setype, 'absent', None)], do_reload, sestore)
+
 
-    return change
+def split_ports(ports):
+    return [x.strip() for x in str(ports).split(',')]
 
 
 def main():
     module = AnsibleModule(
         argument_spec={
                 'ports': {
-                    'required': True,
+                    'required': False,
                 },
                 'proto': {
-                    'required': True,
+                    'required': False,
                     'choices': ['tcp', 'udp'],
                 },
                 'setype': {
-                    'required': True,
+                    'required': False,
                 },
                 'state': {
-                    'required': True,
+                    'required': False,
                     'choices': ['present', 'absent'],
+                    'default': 'present',
+                },
+                'items': {
+                    'required': False,
+                    'type': 'list',
                 },
                 'reload': {
                     'required': False,
@@ -268,6 +266,8 @@ def main():
                     'default': 'yes',
                 },
             },
+        required_one_of=[['ports', 'items']],
+        mutually_exclusive=[['ports', 'items']],
         supports_check_mode=True
     )
     if not HAVE_SELINUX:
@@ -279,12 +279,34 @@ def main():
     if not selinux.is_selinux_enabled():
         module.fail_json(msg="SELinux is disabled on this host.")
 
-    ports = [x.strip() for x in str(module.params['ports']).split(',')]
     proto = module.params['proto']
     setype = module.params['setype']
     state = module.params['state']
     do_reload = module.params['reload']
 
+    if module.params['items'] is not None:
+        items = []
+        for item in module.params['items']:
+            if not isinstance(item, dict) or 'ports' not in item:
+                module.fail_json(msg="items must be dicts with a ports key, got %s" % item)
+            item_proto = item.get('proto', proto)
+            item_setype = item.get('setype', setype)
+            item_state = item.get('state', state)
+            if item_proto not in ['tcp', 'udp'] or not item_setype or item_state not in ['present', 'absent']:
+                module.fail_json(msg="each item needs a proto of tcp or udp, a setype and a state of present or absent: %s" % item)
+            items.append((split_ports(item['ports']), item_proto, item_setype, item_state, 's0'))
+
+        result = {
+            'items': module.params['items'],
+            'changed': semanage_port_batch(module, items, do_reload),
+        }
+        module.exit_json(**result)
+
+    if proto is None or setype is None:
+        module.fail_json(msg="proto and setype are required with ports")
+
+    ports = split_ports(module.params['ports'])
+
     result = {
         'ports': ports,
         'proto': proto,
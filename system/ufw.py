@@ -121,6 +121,20 @@ options:
       - Apply the rule to routed/forwarded packets.
     required: false
     choices: ['yes', 'no']
+  rules:
+    description:
+      - List of rules to add, or delete with C(delete=yes), in one task. Each
+        rule is a dict taking the same keys as the rule options of this module,
+        e.g. C(rule), C(direction), C(interface), C(log), C(from_ip),
+        C(from_port), C(to_ip), C(to_port), C(proto), C(name), C(route),
+        C(delete) and C(insert).
+      - The existing rules are read from the C(### tuple) lines of the ufw
+        user rules files once and ufw is only run for the rules that need to
+        change. Rules using application profiles or port names cannot be
+        compared this way and are always passed to ufw, which skips existing
+        rules itself.
+    required: false
+    version_added: "2.3"
 '''
 
 EXAMPLES = '''
@@ -179,10 +193,242 @@ ufw: rule=deny proto=tcp src=2001:db8::/32 port=25
 # Deny forwarded/routed traffic from subnet 1.2.3.0/24 to subnet 4.5.6.0/24.
 # Can be used to further restrict a global FORWARD policy set to allow
 ufw: rule=deny route=yes src=1.2.3.0/24 dest=4.5.6.0/24
+
+# Manage a set of rules at once, running ufw only for the missing ones
+- ufw:
+    rules:
+      - { rule: allow, port: 22, proto: tcp }
+      - { rule: allow, port: 80, proto: tcp }
+      - { rule: allow, port: 443, proto: tcp }
+      - { rule: allow, src: 10.0.0.0/8 }
+      - { rule: deny, port: 23, proto: tcp, delete: yes }
 '''
 
+import re
+import socket
+import struct
 from operator import itemgetter
 
+USER_RULES = {
+    'v4': ['/lib/ufw/user.rules', '/etc/ufw/user.rules'],
+    'v6': ['/lib/ufw/user6.rules', '/etc/ufw/user6.rules'],
+}
+UFW_DEFAULTS = '/etc/default/ufw'
+
+RULE_KEYS = {
+    'rule': 'rule', 'direction': 'direction', 'interface': 'interface',
+    'if': 'interface', 'log': 'log', 'from_ip': 'from_ip', 'src': 'from_ip',
+    'from': 'from_ip', 'from_port': 'from_port', 'to_ip': 'to_ip',
+    'dest': 'to_ip', 'to': 'to_ip', 'to_port': 'to_port', 'port': 'to_port',
+    'proto': 'proto', 'protocol': 'proto', 'app': 'app', 'name': 'app',
+    'route': 'route', 'delete': 'delete', 'insert': 'insert',
+}
+PORT = re.compile(r'^\d+([:,]\d+)*$')
+
+
+def read_rule_tuples():
+    """ Returns the (family, tuple) of the rules in the ufw user rules files, in file order """
+    tuples = []
+    for family, paths in USER_RULES.items():
+        for path in paths:
+            try:
+                f = open(path)
+            except IOError:
+                continue
+            try:
+                for line in f:
+                    if line.startswith('### tuple ### '):
+                        # drop the comment newer ufw versions append
+                        line = line[len('### tuple ### '):].split(' comment=')[0]
+                        tuples.append((family, line.strip()))
+            finally:
+                f.close()
+            break
+    return tuples
+
+
+def ipv6_enabled():
+    try:
+        f = open(UFW_DEFAULTS)
+    except IOError:
+        return True
+    try:
+        for line in f:
+            if line.strip().startswith('IPV6='):
+                return line.split('=', 1)[1].strip().strip('"\'').lower() == 'yes'
+    finally:
+        f.close()
+    return True
+
+
+def normalize_address(address):
+    """ Returns (family, address) as ufw writes it to the rules files, or None """
+    if '/' in address:
+        address, prefix = address.split('/', 1)
+    else:
+        prefix = None
+
+    for family, af, size in (('v4', socket.AF_INET, 32), ('v6', socket.AF_INET6, 128)):
+        try:
+            packed = socket.inet_pton(af, address)
+        except (socket.error, ValueError):
+            continue
+
+        if prefix is None:
+            bits = size
+        elif family == 'v4' and '.' in prefix:
+            try:
+                mask = struct.unpack('!L', socket.inet_pton(af, prefix))[0]
+            except (socket.error, ValueError):
+                return None
+            bits = 0
+            while bits < 32 and mask & (1 << (31 - bits)):
+                bits += 1
+        elif prefix.isdigit() and int(prefix) <= size:
+            bits = int(prefix)
+        else:
+            return None
+
+        if bits == size:
+            return family, socket.inet_ntop(af, packed)
+
+        # ufw stores the network address of a subnet
+        octets = list(struct.unpack('!%dB' % len(packed), packed))
+        for i in range(len(octets)):
+            keep = min(max(bits - i * 8, 0), 8)
+            octets[i] = octets[i] & (0xff00 >> keep) & 0xff
+        packed = struct.pack('!%dB' % len(octets), *octets)
+        return family, "%s/%d" % (socket.inet_ntop(af, packed), bits)
+    return None
+
+
+def rule_tuples(rule, ipv6):
+    """ Returns the set of (family, tuple) ufw writes for a rule, or None if
+    the rule cannot be resolved without ufw (application profiles, port names) """
+    if rule.get('app'):
+        return None
+
+    for key in ('from_port', 'to_port'):
+        if rule.get(key) and not PORT.match(str(rule[key])):
+            return None
+
+    families = ['v4']
+    if ipv6:
+        families.append('v6')
+    addresses = {}
+    for key in ('from_ip', 'to_ip'):
+        address = rule.get(key) or 'any'
+        if address == 'any':
+            continue
+        normalized = normalize_address(address)
+        if normalized is None:
+            return None
+        family, addresses[key] = normalized
+        if family not in families:
+            return None
+        families = [family]
+
+    action = rule['rule']
+    if rule.get('log'):
+        action += '_log'
+    if rule.get('route'):
+        action = 'route:' + action
+
+    direction = {'incoming': 'in', 'outgoing': 'out'}.get(rule.get('direction'), rule.get('direction') or 'in')
+    if rule.get('interface'):
+        direction += '_' + rule['interface']
+
+    tuples = set()
+    for family in families:
+        anywhere = {'v4': '0.0.0.0/0', 'v6': '::/0'}[family]
+        tuples.add((family, ' '.join([
+            action, rule.get('proto') or 'any',
+            str(rule.get('to_port') or 'any'), addresses.get('to_ip', anywhere),
+            str(rule.get('from_port') or 'any'), addresses.get('from_ip', anywhere),
+            direction])))
+    return tuples
+
+
+def rule_command(module, ufw_bin, params):
+    # Rules are constructed according to the long format
+    #
+    # ufw [--dry-run] [delete] [insert NUM] [route] allow|deny|reject|limit [in|out on INTERFACE] [log|log-all] \
+    #     [from ADDRESS [port PORT]] [to ADDRESS [port PORT]] \
+    #     [proto protocol] [app application]
+    cmd = [[ufw_bin], [module.check_mode, '--dry-run']]
+    cmd.append([module.boolean(params['delete']), 'delete'])
+    cmd.append([module.boolean(params['route']), 'route'])
+    cmd.append([params['insert'], "insert %s" % params['insert']])
+    cmd.append([params['rule']])
+    cmd.append([params['direction'], "%s" % params['direction']])
+    cmd.append([params['interface'], "on %s" % params['interface']])
+    cmd.append([module.boolean(params['log']), 'log'])
+
+    for (key, template) in [('from_ip',   "from %s" ), ('from_port', "port %s" ),
+                            ('to_ip',     "to %s"   ), ('to_port',   "port %s" ),
+                            ('proto',     "proto %s"), ('app',       "app '%s'")]:
+
+        value = params[key]
+        cmd.append([value, template % (value)])
+
+    return cmd
+
+
+def parse_rules(module, rules):
+    """ Returns the rules list with the keys normalized to the module options """
+    parsed = []
+    for rule in rules:
+        if not isinstance(rule, dict):
+            module.fail_json(msg="rules must be dicts, got %s" % rule)
+        params = dict(delete=False, route=False, insert=None, rule=None, direction=None,
+                      interface=None, log=False, from_ip='any', from_port=None,
+                      to_ip='any', to_port=None, proto=None, app=None)
+        for key, value in rule.items():
+            if key not in RULE_KEYS:
+                module.fail_json(msg="unsupported key %s in rule %s" % (key, rule))
+            params[RULE_KEYS[key]] = value
+        for key in ('delete', 'route', 'log'):
+            params[key] = module.boolean(params[key])
+        if params['rule'] not in ['allow', 'deny', 'reject', 'limit']:
+            module.fail_json(msg="rule must be one of allow, deny, reject or limit in %s" % rule)
+        if params['interface'] is not None and params['direction'] is None:
+            module.fail_json(msg="Direction must be specified when creating a rule on an interface")
+        if params['app'] and params['proto']:
+            module.fail_json(msg="app and proto are mutually exclusive in %s" % rule)
+        parsed.append(params)
+    return parsed
+
+
+def apply_rules(module, ufw_bin, rules, execute):
+    """ Runs ufw for the rules differing from the rules files, returns whether anything changed """
+    before = read_rule_tuples()
+    current = set(before)
+    ipv6 = ipv6_enabled()
+    changed = False
+
+    for params in parse_rules(module, rules):
+        tuples = rule_tuples(params, ipv6)
+        if tuples is not None:
+            if params['delete']:
+                # also remove what is left of a rule present for one family only
+                done = not (tuples & current)
+            else:
+                done = tuples.issubset(current)
+            if done:
+                continue
+            if module.check_mode:
+                changed = True
+                continue
+
+        out = execute(rule_command(module, ufw_bin, params))
+        if module.check_mode:
+            # ufw --dry-run reports rules it would leave alone
+            changed = changed or not ('Skipping' in out or 'non-existent' in out)
+
+    if not module.check_mode:
+        changed = read_rule_tuples() != before
+    return changed
+
 
 def main():
     module = AnsibleModule(
@@ -202,10 +448,11 @@ def main():
             to_ip     = dict(default='any', aliases=['dest', 'to']),
             to_port   = dict(default=None,  aliases=['port']),
             proto     = dict(default=None,  aliases=['protocol'], choices=['any', 'tcp', 'udp', 'ipv6', 'esp', 'ah']),
-            app       = dict(default=None,  aliases=['name'])
+            app       = dict(default=None,  aliases=['name']),
+            rules     = dict(default=None,  type='list')
         ),
         supports_check_mode = True,
-        mutually_exclusive = [['app', 'proto', 'logging']]
+        mutually_exclusive = [['app', 'proto', 'logging'], ['rule', 'rules']]
     )
 
     cmds = []
@@ -219,10 +466,12 @@ def main():
         if rc != 0:
             module.fail_json(msg=err or out)
 
+        return out
+
     params = module.params
 
     # Ensure at least one of the command arguments are given
-    command_keys = ['state', 'default', 'rule', 'logging']
+    command_keys = ['state', 'default', 'rule', 'logging', 'rules']
     commands = dict((key, params[key]) for key in command_keys if params[key])
 
     if len(commands) < 1:
@@ -234,9 +483,14 @@ def main():
     # Ensure ufw is available
     ufw_bin = module.get_bin_path('ufw', True)
 
-    # Save the pre state and rules in order to recognize changes
-    (_, pre_state, _) = module.run_command(ufw_bin + ' status verbose')
-    (_, pre_rules, _) = module.run_command("grep '^### tuple' /lib/ufw/user*.rules")
+    # Save the pre state and rules in order to recognize changes, the rules
+    # mode works out its changes from the rules files itself
+    status = [key for key in commands if key != 'rules']
+    pre_state = ''
+    if status:
+        (_, pre_state, _) = module.run_command(ufw_bin + ' status verbose')
+    pre_rules = read_rule_tuples()
+    rules_changed = False
 
     # Execute commands
     for (command, value) in commands.iteritems():
@@ -254,32 +508,17 @@ def main():
             execute(cmd + [[command], [value], [params['direction']]])
 
         elif command == 'rule':
-            # Rules are constructed according to the long format
-            #
-            # ufw [--dry-run] [delete] [insert NUM] [route] allow|deny|reject|limit [in|out on INTERFACE] [log|log-all] \
-            #     [from ADDRESS [port PORT]] [to ADDRESS [port PORT]] \
-            #     [proto protocol] [app application]
-            cmd.append([module.boolean(params['delete']), 'delete'])
-            cmd.append([module.boolean(params['route']), 'route'])
-            cmd.append([params['insert'], "insert %s" % params['insert']])
-            cmd.append([value])
-            cmd.append([params['direction'], "%s" % params['direction']])
-            cmd.append([params['interface'], "on %s" % params['interface']])
-            cmd.append([module.boolean(params['log']), 'log'])
-
-            for (key, template) in [('from_ip',   "from %s" ), ('from_port', "port %s" ),
-                                    ('to_ip',     "to %s"   ), ('to_port',   "port %s" ),
-                                    ('proto',     "proto %s"), ('app',       "app '%s'")]:
-
-                value = params[key]
-                cmd.append([value, template % (value)])
-
-            execute(cmd)
+            execute(rule_command(module, ufw_bin, params))
+
+        elif command == 'rules':
+            rules_changed = apply_rules(module, ufw_bin, value, execute)
 
     # Get the new state
-    (_, post_state, _) = module.run_command(ufw_bin + ' status verbose')
-    (_, post_rules, _) = module.run_command("grep '^### tuple' /lib/ufw/user*.rules")
-    changed = (pre_state != post_state) or (pre_rules != post_rules)
+    post_state = ''
+    if status:
+        (_, post_state, _) = module.run_command(ufw_bin + ' status verbose')
+    post_rules = read_rule_tuples()
+    changed = (pre_state != post_state) or (pre_rules != post_rules) or rules_changed
 
     return module.exit_json(changed=changed, commands=cmds, msg=post_state.rstrip())
 
@@ -1,6 +1,7 @@
 #!/usr/bin/python
 
 import boto3
+import botocore
 import unittest
 
 import cloud.amazon.kinesis_stream as kinesis_stream
@@ -123,6 +124,35 @@ class AnsibleKinesisStreamFunctions(unittest.TestCase):
         self.assertTrue(success)
         self.assertEqual(stream, should_return)
 
+    def test_get_stream_summary(self):
+        client = boto3.client('kinesis', region_name=aws_region)
+        summary = (
+            kinesis_stream.get_stream_summary(client, 'test', check_mode=True)
+        )
+        should_return = {
+            'RetentionPeriodHours': 24,
+            'StreamName': 'test',
+            'StreamARN': 'arn:aws:kinesis:east-side:123456789:stream/test',
+            'StreamStatus': 'ACTIVE'
+        }
+        self.assertEqual(summary, should_return)
+
+    def test_backoff_delay(self):
+        for attempt in range(10):
+            delay = kinesis_stream.backoff_delay(attempt, 1, 30)
+            ceiling = min(30, 2 ** attempt)
+            self.assertTrue(ceiling / 2.0 <= delay <= ceiling)
+
+    def test_is_throttled(self):
+        throttled = botocore.exceptions.ClientError(
+            {'Error': {'Code': 'LimitExceededException'}}, 'DescribeStream'
+        )
+        not_found = botocore.exceptions.ClientError(
+            {'Error': {'Code': 'ResourceNotFoundException'}}, 'DescribeStream'
+        )
+        self.assertTrue(kinesis_stream.is_throttled(throttled))
+        self.assertFalse(kinesis_stream.is_throttled(not_found))
+
     def test_tags_action_create(self):
         client = boto3.client('kinesis', region_name=aws_region)
         tags = {
@@ -229,6 +259,40 @@ class AnsibleKinesisStreamFunctions(unittest.TestCase):
         )
         self.assertFalse(success)
 
+    def test_shard_count_steps(self):
+        self.assertEqual(
+            kinesis_stream.shard_count_steps(10, 500),
+            [20, 40, 80, 160, 320, 500]
+        )
+        self.assertEqual(kinesis_stream.shard_count_steps(10, 3), [5, 3])
+        self.assertEqual(kinesis_stream.shard_count_steps(7, 4), [4])
+        self.assertEqual(kinesis_stream.shard_count_steps(10, 10), [])
+
+    def test_is_open_shard(self):
+        open_shard = {
+            'ShardId': 'shardId-000000000001',
+            'SequenceNumberRange': {
+                'StartingSequenceNumber': '1'
+            }
+        }
+        closed_shard = {
+            'ShardId': 'shardId-000000000000',
+            'SequenceNumberRange': {
+                'StartingSequenceNumber': '0',
+                'EndingSequenceNumber': '1'
+            }
+        }
+        self.assertTrue(kinesis_stream.is_open_shard(open_shard))
+        self.assertFalse(kinesis_stream.is_open_shard(closed_shard))
+
+    def test_shard_action(self):
+        client = boto3.client('kinesis', region_name=aws_region)
+        success, err_msg = (
+            kinesis_stream.shard_action(client, 'test', 20, check_mode=True)
+        )
+        self.assertTrue(success)
+        self.assertEqual(err_msg, 'Shard count updated successfully to 20')
+
     def test_update(self):
         client = boto3.client('kinesis', region_name=aws_region)
         current_stream = {
@@ -252,6 +316,25 @@ class AnsibleKinesisStreamFunctions(unittest.TestCase):
         self.assertTrue(changed)
         self.assertEqual(err_msg, 'Kinesis Stream test updated successfully.')
 
+    def test_update_shards(self):
+        client = boto3.client('kinesis', region_name=aws_region)
+        current_stream = {
+            'HasMoreShards': True,
+            'RetentionPeriodHours': 24,
+            'StreamName': 'test',
+            'StreamARN': 'arn:aws:kinesis:east-side:123456789:stream/test',
+            'StreamStatus': 'ACTIVE'
+        }
+        success, changed, err_msg = (
+            kinesis_stream.update(
+                client, current_stream, 'test', number_of_shards=10,
+                check_mode=True
+            )
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(err_msg, 'Kinesis Stream test updated successfully.')
+
     def test_create_stream(self):
         client = boto3.client('kinesis', region_name=aws_region)
         tags = {
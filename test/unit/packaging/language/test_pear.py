@@ -0,0 +1,63 @@
+#!/usr/bin/python
+
+import unittest
+
+import packaging.language.pear as pear
+
+# pear list -a run without a terminal, captions and headlines are upper-cased
+LIST_ALL = """INSTALLED PACKAGES, CHANNEL __URI:
+==================================
+(no packages installed)
+
+INSTALLED PACKAGES, CHANNEL DOC.PHP.NET:
+========================================
+(no packages installed)
+
+INSTALLED PACKAGES, CHANNEL PEAR.PHP.NET:
+=========================================
+PACKAGE          VERSION STATE
+Archive_Tar      1.4.3   stable
+Console_Getopt   1.4.1   stable
+PEAR             1.10.5  stable
+Structures_Graph 1.1.1   stable
+XML_Util         1.4.2   stable
+
+INSTALLED PACKAGES, CHANNEL PECL.PHP.NET:
+=========================================
+PACKAGE VERSION STATE
+xdebug  2.5.5   stable
+"""
+
+# the same with TERM set, captions and headlines are printed in bold
+LIST_ALL_BOLD = """\x1b[1mInstalled packages, channel pear.php.net:\x1b(B\x1b[m
+=========================================
+\x1b[1mPackage          Version State\x1b(B\x1b[m
+Archive_Tar      1.4.3   stable
+PEAR             1.10.5  stable
+"""
+
+
+class AnsiblePearFunctions(unittest.TestCase):
+
+    def test_get_installed_packages(self):
+        installed = pear.get_installed_packages(LIST_ALL)
+        self.assertEqual(installed, {
+            'pear.php.net/archive_tar': '1.4.3',
+            'pear.php.net/console_getopt': '1.4.1',
+            'pear.php.net/pear': '1.10.5',
+            'pear.php.net/structures_graph': '1.1.1',
+            'pear.php.net/xml_util': '1.4.2',
+            'pecl.php.net/xdebug': '2.5.5',
+        })
+
+    def test_get_installed_packages_bold(self):
+        installed = pear.get_installed_packages(LIST_ALL_BOLD)
+        self.assertEqual(installed, {
+            'pear.php.net/archive_tar': '1.4.3',
+            'pear.php.net/pear': '1.10.5',
+        })
+
+    def test_package_key(self):
+        self.assertEqual(pear.package_key('Archive_Tar'), 'pear.php.net/archive_tar')
+        self.assertEqual(pear.package_key('pecl/xdebug'), 'pecl.php.net/xdebug')
+        self.assertEqual(pear.package_key('pecl.php.net/xdebug'), 'pecl.php.net/xdebug')
@@ -0,0 +1,111 @@
+#!/usr/bin/python
+
+import unittest
+
+import system.iptables as iptables
+
+
+def params(**kwargs):
+    result = dict((name, None) for name in iptables.RULE_PARAMS)
+    result.update(match=[], ctstate=[])
+    result.update(kwargs)
+    return result
+
+
+def rule_key(params, ip_version='ipv4'):
+    return iptables.rule_key(iptables.construct_rule(params), ip_version)
+
+
+def save_key(line, ip_version='ipv4'):
+    return iptables.rule_key(iptables.split_save_line(line), ip_version)
+
+
+class FakeModule(object):
+
+    check_mode = False
+
+    def __init__(self, dump, **params):
+        self.dump = dump
+        self.params = params
+        self.commands = []
+
+    def run_command(self, cmd, check_rc=False, data=None):
+        self.commands.append(cmd)
+        return 0, self.dump, ''
+
+
+class AnsibleIptablesRuleKey(unittest.TestCase):
+
+    # rules built from module options and the line iptables-save prints for them
+    EQUIVALENT = [
+        (params(protocol='tcp', destination_port='22', jump='ACCEPT'),
+         '-p tcp -m tcp --dport 22 -j ACCEPT'),
+        (params(protocol='tcp', source='10.0.0.1', destination_port='1000:2000', jump='ACCEPT'),
+         '-s 10.0.0.1/32 -p tcp -m tcp --dport 1000:2000 -j ACCEPT'),
+        (params(protocol='tcp', source='10.0.0.7/255.255.255.0', jump='DROP'),
+         '-s 10.0.0.0/24 -p tcp -j DROP'),
+        (params(ctstate=['RELATED', 'ESTABLISHED'], jump='ACCEPT'),
+         '-m conntrack --ctstate RELATED,ESTABLISHED -j ACCEPT'),
+        (params(protocol='tcp', match=['multiport'], destination_port='80', jump='ACCEPT'),
+         '-p tcp -m multiport --dports 80 -j ACCEPT'),
+        (params(protocol='udp', match=['multiport'], source_port='53,1000:2000', jump='ACCEPT'),
+         '-p udp -m multiport --sports 53,1000:2000 -j ACCEPT'),
+        (params(protocol='tcp', comment='ssh access', jump='ACCEPT'),
+         '-p tcp -m comment --comment "ssh access" -j ACCEPT'),
+        (params(protocol='tcp', jump='REJECT'),
+         '-p tcp -j REJECT --reject-with icmp-port-unreachable'),
+    ]
+
+    DIFFERENT = [
+        (params(protocol='tcp', match=['multiport'], destination_port='80', jump='ACCEPT'),
+         '-p tcp -m tcp --dport 80 -j ACCEPT'),
+        (params(protocol='tcp', destination_port='22', jump='ACCEPT'),
+         '-p tcp -m tcp --dport 23 -j ACCEPT'),
+    ]
+
+    def test_equivalent(self):
+        for rule, line in self.EQUIVALENT:
+            key = rule_key(rule)
+            self.assertNotEqual(key, None)
+            self.assertEqual(key, save_key(line))
+
+    def test_different(self):
+        for rule, line in self.DIFFERENT:
+            self.assertNotEqual(rule_key(rule), save_key(line))
+
+    def test_ambiguous_multiport(self):
+        rule = params(protocol='tcp', match=['tcp', 'multiport'], destination_port='80', jump='ACCEPT')
+        self.assertEqual(rule_key(rule), None)
+
+    def test_hostnames_are_not_indexed(self):
+        self.assertEqual(rule_key(params(source='example.org', jump='ACCEPT')), None)
+
+
+class AnsibleIptablesRuleIndex(unittest.TestCase):
+
+    @staticmethod
+    def rule(n):
+        return '-s 10.0.%d.%d/32 -p tcp -m tcp --dport %d -j ACCEPT' % (n >> 8 & 255, n & 255, 1024 + n)
+
+    @staticmethod
+    def params(n):
+        return params(
+            table='filter', ip_version='ipv4', chain='TEST', protocol='tcp',
+            match=['tcp'], source='10.0.%d.%d' % (n >> 8 & 255, n & 255),
+            destination_port=str(1024 + n), jump='ACCEPT')
+
+    def test_check_present(self):
+        dump = '\n'.join(['*filter', ':TEST - [0:0]'] +
+                         ['-A TEST %s' % self.rule(n) for n in range(0, 200, 2)] +
+                         ['COMMIT'])
+        module = FakeModule(dump, table='filter', ip_version='ipv4')
+        index = iptables.RuleIndex(module, 'iptables-save')
+        for n in range(200):
+            self.assertEqual(iptables.check_present(None, module, self.params(n), index), n % 2 == 0)
+        # the table is dumped once for all checks
+        self.assertEqual(module.commands, [['iptables-save', '-t', 'filter']])
+
+    def test_split_save_line(self):
+        self.assertEqual(
+            iptables.split_save_line('-p tcp -m comment --comment "a \\"quoted\\" comment" -j ACCEPT'),
+            ['-p', 'tcp', '-m', 'comment', '--comment', 'a "quoted" comment', '-j', 'ACCEPT'])
@@ -0,0 +1,48 @@
+#!/usr/bin/python
+
+import unittest
+
+import system.known_hosts as known_hosts
+
+KNOWN_HOSTS = """@cert-authority *.example.com ssh-rsa AAAAB3NzaC1yc2EAAAADAQABAAABAQCA
+foo.example.com ssh-rsa AAAAB3NzaC1yc2EAAAADAQABAAABAQCF
+@revoked foo.example.com ssh-rsa AAAAB3NzaC1yc2EAAAADAQABAAABAQCR
+"""
+
+
+class FakeModule(object):
+
+    def fail_json(self, **kwargs):
+        raise AssertionError(kwargs['msg'])
+
+
+class AnsibleKnownHostsIndex(unittest.TestCase):
+
+    def test_lookup_skips_marker_lines(self):
+        index = known_hosts.KnownHosts(KNOWN_HOSTS)
+        self.assertEqual(index.lookup('foo.example.com'), [2])
+        self.assertEqual(index.lookup('bar.example.com'), [])
+
+    def test_lookup_marker(self):
+        index = known_hosts.KnownHosts(KNOWN_HOSTS)
+        self.assertEqual(index.lookup('bar.example.com', '@cert-authority'), [1])
+        self.assertEqual(index.lookup('foo.example.com', '@revoked'), [3])
+
+    def test_remove_host_keeps_marker_lines(self):
+        index = known_hosts.KnownHosts(KNOWN_HOSTS)
+        changed, remove, add = known_hosts.plan_host(
+            FakeModule(), index, 'bar.example.com', None, 'absent')
+        self.assertFalse(changed)
+        self.assertEqual(remove, set())
+        changed, remove, add = known_hosts.plan_host(
+            FakeModule(), index, 'foo.example.com', None, 'absent')
+        self.assertTrue(changed)
+        self.assertEqual(remove, set([2]))
+
+    def test_marker_key_present(self):
+        index = known_hosts.KnownHosts(KNOWN_HOSTS)
+        key = KNOWN_HOSTS.splitlines(True)[0]
+        changed, remove, add = known_hosts.plan_host(
+            FakeModule(), index, 'bar.example.com', key, 'present')
+        self.assertFalse(changed)
+        self.assertEqual(add, None)